@@ -12,6 +12,7 @@ urlpatterns = [
     path("", views.get_routes),
     path("token/", CustomTokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("metrics", views.metrics, name="metrics"),
     path("", include(integrations_router.urls), name="integrations"),
     path("", include(mapper_router.urls), name="mappers"),
     path("", include(endpoint_router.urls), name="endpoints"),
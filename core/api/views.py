@@ -1,8 +1,11 @@
+from django.http import HttpResponse
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from core.metrics import registry
+
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
@@ -27,6 +30,14 @@ def get_routes(request):
         "/api/integrations",
         "/api/mappers/json",
         "/api/models",
+        "/api/metrics",
     ]
 
     return Response(routes)
+
+
+def metrics(request):
+    """Process metrics in the Prometheus text format"""
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
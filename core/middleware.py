@@ -0,0 +1,110 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from core.metrics import REQUEST_LATENCY
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTiming:
+    """Query count and time spent in the database during one request.
+    Installed as an `execute_wrapper`, so it counts with `DEBUG=False`."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.total_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+    @property
+    def view_time(self) -> float:
+        """Time spent outside the database"""
+        return max(self.total_time - self.db_time, 0.0)
+
+
+class QueryTimingMiddleware:
+    """Counts SQL queries, DB time and view time of each request
+
+    The numbers are returned in a `Server-Timing` header, and a structured
+    warning is logged when a request goes over one of the
+    `settings.REQUEST_BUDGETS`. Queries run while a streaming response is
+    consumed happen after the headers are sent and are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = RequestTiming()
+        request.timing = timing
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timing))
+            response = self.get_response(request)
+        timing.total_time = time.perf_counter() - start
+
+        match = getattr(request, "resolver_match", None)
+        REQUEST_LATENCY.observe(
+            timing.total_time,
+            # Unresolved paths share a label to keep the cardinality bounded
+            view=match.view_name if match else "unresolved",
+            method=request.method,
+            status=response.status_code,
+        )
+        response["Server-Timing"] = self.get_server_timing(timing)
+        over_budget = self.get_over_budget(timing)
+        if over_budget:
+            self.log_over_budget(request, response, timing, over_budget)
+        return response
+
+    @staticmethod
+    def get_server_timing(timing: RequestTiming) -> str:
+        return ", ".join(
+            [
+                f'db;dur={timing.db_time * 1000:.2f};desc="{timing.queries} queries"',
+                f"view;dur={timing.view_time * 1000:.2f}",
+                f"total;dur={timing.total_time * 1000:.2f}",
+            ]
+        )
+
+    def get_over_budget(self, timing: RequestTiming) -> list:
+        budgets = getattr(settings, "REQUEST_BUDGETS", {})
+        measured = {
+            "QUERIES": timing.queries,
+            "DB_TIME_MS": timing.db_time * 1000,
+            "TIME_MS": timing.total_time * 1000,
+        }
+        return [
+            budget
+            for budget, value in measured.items()
+            if budgets.get(budget) is not None and value > budgets[budget]
+        ]
+
+    def log_over_budget(self, request, response, timing, over_budget: list) -> None:
+        match = getattr(request, "resolver_match", None)
+        record = {
+            "event": "request_over_budget",
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "queries": timing.queries,
+            "db_time_ms": round(timing.db_time * 1000, 2),
+            "view_time_ms": round(timing.view_time * 1000, 2),
+            "total_time_ms": round(timing.total_time * 1000, 2),
+            "over_budget": over_budget,
+        }
+        logger.warning(json.dumps(record), extra={"request_timing": record})
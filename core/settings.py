@@ -59,6 +59,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.QueryTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -71,6 +72,14 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "core.urls"
 
+# Requests over any of these budgets are logged by QueryTimingMiddleware,
+# None disables a budget
+REQUEST_BUDGETS = {
+    "QUERIES": int(get_env("REQUEST_BUDGET_QUERIES", default=50)),
+    "DB_TIME_MS": float(get_env("REQUEST_BUDGET_DB_TIME_MS", default=200)),
+    "TIME_MS": float(get_env("REQUEST_BUDGET_TIME_MS", default=1000)),
+}
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -193,6 +202,55 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
 }
 
+# Mappers
+# Max number of compiled mapping plans kept in each process
+MAPPING_PLAN_CACHE_SIZE = int(get_env("MAPPING_PLAN_CACHE_SIZE", default=256))
+# Seconds a cached plan is served before its mapper's version is read again
+# from the database, which bounds how long edits made by other processes go
+# unnoticed. 0 reads it on every lookup
+MAPPING_PLAN_CACHE_VERSION_TTL = float(
+    get_env("MAPPING_PLAN_CACHE_VERSION_TTL", default=5)
+)
+# "interpreted" or "compiled", see mappers.constants.MappingEngine
+MAPPING_ENGINE = get_env("MAPPING_ENGINE", default="interpreted")
+# `manage.py mapping_worker` defaults, see mappers.events.queues
+MAPPING_WORKER = {
+    "QUEUE_BACKEND": "mappers.events.queues.SQLiteQueueBackend",
+    "QUEUE_OPTIONS": {"path": str(BASE_DIR / "mapping_queue.sqlite3")},
+    "INPUT_QUEUE": "mapping-events",
+    "OUTPUT_QUEUE": "mapped-events",
+    # Deliveries of a message before it is moved to the dead-letter queue
+    "MAX_RECEIVE_COUNT": int(get_env("MAPPING_WORKER_MAX_RECEIVE_COUNT", default=5)),
+    "DEAD_LETTER_QUEUE": "mapping-events-dead-letter",
+    "CONCURRENCY": int(get_env("MAPPING_WORKER_CONCURRENCY", default=1)),
+    # Events in flight at once with --async
+    "ASYNC_CONCURRENCY": int(get_env("MAPPING_WORKER_ASYNC_CONCURRENCY", default=100)),
+    "PREFETCH": int(get_env("MAPPING_WORKER_PREFETCH", default=10)),
+    "WAIT_TIME_SECONDS": 1,
+    "DB_THREADS": int(get_env("MAPPING_WORKER_DB_THREADS", default=4)),
+}
+# Share of mapping batches traced into GET /api/mappers/json/trace, 0 to 1
+MAPPING_TRACE_SAMPLE_RATE = float(get_env("MAPPING_TRACE_SAMPLE_RATE", default=0))
+# Where `manage.py bench --save` stores runs for `manage.py bench_compare`
+MAPPING_BENCHMARK_RESULTS = str(BASE_DIR / "benchmark_results.json")
+# Large batches are mapped in worker processes, 0 workers disables the pool
+MAPPING_PROCESS_POOL = {
+    "MAX_WORKERS": int(get_env("MAPPING_PROCESS_POOL_WORKERS", default=0)),
+    "CHUNK_SIZE": int(get_env("MAPPING_PROCESS_POOL_CHUNK_SIZE", default=500)),
+    "MIN_BATCH_SIZE": int(get_env("MAPPING_PROCESS_POOL_MIN_BATCH", default=2000)),
+}
+# Memoized transformers check their hit rate once, after SAMPLE_SIZE values,
+# and stop caching for fields below MIN_HIT_RATE
+MAPPING_TRANSFORMER_MEMOIZATION = {
+    "SAMPLE_SIZE": int(get_env("MAPPING_MEMOIZATION_SAMPLE_SIZE", default=1000)),
+    "MIN_HIT_RATE": float(get_env("MAPPING_MEMOIZATION_MIN_HIT_RATE", default=0.5)),
+}
+# List item types are merged from the first item and a random sample of the
+# others, up to SAMPLE_SIZE items per list
+MAPPING_LIST_INFERENCE_SAMPLE_SIZE = int(
+    get_env("MAPPING_LIST_INFERENCE_SAMPLE_SIZE", default=20)
+)
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -0,0 +1,61 @@
+from django.test import SimpleTestCase
+
+from core.metrics import Metric, MetricsRegistry
+
+
+class TestMetricsRegistry(SimpleTestCase):
+    """
+    Test suite for the Prometheus metrics registry
+    """
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_render_counter(self):
+        counter = self.registry.counter("events_total", "Events", labelnames=("kind",))
+        counter.inc(kind="a")
+        counter.inc(2, kind='b"c')
+
+        assert self.registry.render() == (
+            "# HELP events_total Events\n"
+            "# TYPE events_total counter\n"
+            'events_total{kind="a"} 1\n'
+            'events_total{kind="b\\"c"} 2\n'
+        )
+
+    def test_render_histogram(self):
+        histogram = self.registry.histogram("latency", "Latency", buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+
+        lines = self.registry.render().splitlines()[2:]
+        assert lines == [
+            'latency_bucket{le="0.1"} 2',
+            'latency_bucket{le="1"} 3',
+            'latency_bucket{le="+Inf"} 4',
+            "latency_sum 3.65",
+            "latency_count 4",
+        ]
+
+    def test_drained_counter_values_merge_into_another_counter(self):
+        worker = MetricsRegistry().counter("events_total", "Events", ("kind",))
+        counter = self.registry.counter("events_total", "Events", ("kind",))
+        counter.inc(kind="a")
+        worker.inc(2, kind="a")
+        worker.inc(kind="b")
+
+        counter.merge(worker.drain())
+
+        assert worker.get(kind="a") == 0
+        assert counter.get(kind="a") == 3
+        assert counter.get(kind="b") == 1
+
+    def test_labels_must_match(self):
+        counter = self.registry.counter("events_total", "Events", labelnames=("kind",))
+
+        with self.assertRaises(ValueError):
+            counter.inc(other="a")
+
+    def test_metric_types_must_collect(self):
+        with self.assertRaises(TypeError):
+            Metric("events_total", "Events")
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from mappers.models import Model
+
+
+@pytest.mark.django_db
+class TestQueryTimingMiddleware(TestCase):
+    """
+    Test suite for the request query and time accounting middleware
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            user=User.objects.create_user(username="test", password="test")
+        )
+        Model.objects.bulk_create([Model(name=f"model {n}") for n in range(3)])
+
+    def test_server_timing_header(self):
+        response = self.client.get("/api/models")
+        assert response.status_code == 200
+
+        timings = dict(
+            metric.strip().split(";", 1)
+            for metric in response["Server-Timing"].split(",")
+        )
+        assert set(timings) == {"db", "view", "total"}
+        assert 'desc="' in timings["db"]
+
+    @override_settings(REQUEST_BUDGETS={"QUERIES": 0})
+    def test_over_budget_request_is_logged(self):
+        with self.assertLogs("core.middleware", level="WARNING") as logs:
+            self.client.get("/api/models")
+
+        record = json.loads(logs.records[0].getMessage())
+        assert record["event"] == "request_over_budget"
+        assert record["over_budget"] == ["QUERIES"]
+        assert record["queries"] > 0
+        assert record["view"] == "api:models-list"
@@ -2,7 +2,15 @@ from django.contrib import admin
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 
-from mappers.models import Field, FieldMap, Mapper, Model, ModelMap, Transformer
+from mappers.models import (
+    Field,
+    FieldMap,
+    FieldMapTransformer,
+    Mapper,
+    Model,
+    ModelMap,
+    Transformer,
+)
 
 
 class FieldInline(admin.TabularInline):
@@ -65,7 +73,7 @@ class FieldAdmin(admin.ModelAdmin):
 @admin.register(Transformer)
 class TransformerAdmin(admin.ModelAdmin):
 
-    list_display = ("type",)
+    list_display = ("type", "memoize_size")
     list_display_links = ("type",)
     exclude = ("created", "modified")
 
@@ -86,9 +94,17 @@ class TargetModelAdmin(admin.ModelAdmin):
     exclude = ("created", "modified")
 
 
+class FieldMapTransformerInline(admin.TabularInline):
+
+    model = FieldMapTransformer
+    exclude = ("created", "modified")
+    extra = 0
+
+
 @admin.register(FieldMap)
 class TargetFieldAdmin(admin.ModelAdmin):
 
     list_display = ("id", "mapper", "source_field", "target_field", "transformer")
     list_display_links = ("id", "mapper")
     exclude = ("created", "modified")
+    inlines = (FieldMapTransformerInline,)
@@ -1,10 +1,16 @@
+import json
+from typing import IO, Dict, Iterable, Iterator, Optional, Union
+
 from integrations.api import IntegrationsApi
+from mappers.exceptions import InvalidType
 from mappers.services.json_mapper_factory import JSONMapperFactory
 from mappers.services.json_mapper_service import JSONMapperService
 from mappers.services.map_service import MapService
+from mappers.services.mapping_plan import MappingPlan
 from mappers.services.model_field_service import ModelFieldService
 from mappers.services.transformer_factory import TransformerFactory
 from mappers.services.transformer_service import TransformerService
+from mappers.tracing import TraceStore, trace_store, tracing
 
 
 class JsonMapperApi:
@@ -28,3 +34,72 @@ class JsonMapperApi:
         )
         IntegrationsApi.save_endpoint_model(endpoint_id, model_id=model.id)
         return model
+
+    def create_model_from_json_stream(
+        self, stream: IO, model_name: str, endpoint_id: int
+    ):
+        type_map = self.service.map_stream_to_json_types(stream=stream)
+        model = self.service.create_models_and_fields_from_type_map(
+            type_map=type_map, model_name=model_name
+        )
+        IntegrationsApi.save_endpoint_model(endpoint_id, model_id=model.id)
+        return model
+
+    def get_mapping_plan(self, source_model_id: int, map_id: int) -> MappingPlan:
+        return self.service.get_mapping_plan(
+            source_model_id=source_model_id, map_id=map_id
+        )
+
+    def map_ndjson_lines(
+        self, lines: Iterable[Union[bytes, str]], plan: MappingPlan
+    ) -> Iterator[str]:
+        """Lazily maps NDJSON source records, one output line per input line \
+            A record that cannot be mapped yields an error line instead of \
+            aborting the stream, so only one record is held in memory at a time.
+
+        Args:
+            lines (Iterable[Union[bytes, str]]): NDJSON lines of source dtos
+            plan (MappingPlan): Compiled plan for the dtos' source model
+
+        Yields:
+            str: NDJSON line with either the target dto or the line's error
+        """
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                source_dto = json.loads(line)
+                if not isinstance(source_dto, dict):
+                    raise InvalidType(msg="Expected a JSON object")
+                result = {
+                    "line": line_number,
+                    "data": self.service.map_to_target_dto_with_plan(
+                        source_dto=source_dto, plan=plan
+                    ),
+                }
+            except KeyError as e:
+                result = {"line": line_number, "error": f"Missing field: {e}"}
+            except Exception as e:
+                # Whatever a transformer raises only fails the record's line
+                result = {"line": line_number, "error": str(e) or repr(e)}
+            yield json.dumps(result) + "\n"
+
+    def get_trace_breakdown(self, map_id: Optional[int] = None) -> Dict[int, Dict]:
+        return trace_store.get_breakdown(map_id=map_id)
+
+    def reset_traces(self) -> None:
+        trace_store.reset()
+
+    def trace_mapping(
+        self, source_dto: dict, source_model_id: int, map_id: int
+    ) -> Dict:
+        """Maps one dto under a tracer and returns its breakdown, without \
+            adding it to the process-wide traces
+        """
+        plan = self.get_mapping_plan(source_model_id=source_model_id, map_id=map_id)
+        store = TraceStore()
+        with tracing(store=store):
+            data = self.service.map_to_target_dto_with_plan(
+                source_dto=source_dto, plan=plan
+            )
+        return {"data": data, "trace": store.get_breakdown(map_id=map_id)[map_id]}
@@ -8,4 +8,4 @@ class ModelsApi:
         return ModelFieldService.list_models(category_id=category_id)
 
     def get_by_id(id: int):
-        return ModelFieldService.get_model_by_id(id=id)
+        return ModelFieldService.get_model_graph(model_id=id).root
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MappersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "mappers"
+
+    def ready(self):
+        from mappers import signals  # noqa: F401
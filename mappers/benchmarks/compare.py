@@ -0,0 +1,167 @@
+import json
+import math
+import statistics
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def get_iqr(values: Sequence[float]) -> float:
+    if len(values) < 2:
+        return 0.0
+    quartiles = statistics.quantiles(values, n=4, method="inclusive")
+    return quartiles[2] - quartiles[0]
+
+
+@lru_cache(maxsize=None)
+def _count_u(u: int, n1: int, n2: int) -> int:
+    # Orderings of n1 + n2 untied samples whose U statistic equals u
+    if u < 0 or u > n1 * n2:
+        return 0
+    if n1 == 0 or n2 == 0:
+        return 1 if u == 0 else 0
+    return _count_u(u - n2, n1 - 1, n2) + _count_u(u, n1, n2 - 1)
+
+
+def mann_whitney_u(x: Sequence[float], y: Sequence[float]) -> Tuple[float, float]:
+    """Two sided Mann-Whitney U test
+
+    Uses the exact distribution for small samples without ties and the tie
+    corrected normal approximation otherwise.
+
+    Returns:
+        Tuple[float, float]: U statistic of `x` and the p-value
+    """
+    n1, n2 = len(x), len(y)
+    if not n1 or not n2:
+        return 0.0, 1.0
+
+    combined = sorted([(value, 0) for value in x] + [(value, 1) for value in y])
+    ranks = [0.0] * len(combined)
+    tie_sizes = []
+    start = 0
+    while start < len(combined):
+        end = start
+        while end + 1 < len(combined) and combined[end + 1][0] == combined[start][0]:
+            end += 1
+        for index in range(start, end + 1):
+            ranks[index] = (start + end) / 2 + 1
+        tie_sizes.append(end - start + 1)
+        start = end + 1
+
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    u_min = min(u, n1 * n2 - u)
+    has_ties = any(size > 1 for size in tie_sizes)
+
+    if not has_ties and n1 + n2 <= 40:
+        total = math.comb(n1 + n2, n1)
+        tail = sum(_count_u(value, n1, n2) for value in range(int(u_min) + 1))
+        return u, min(1.0, 2 * tail / total)
+
+    n = n1 + n2
+    tie_term = sum(size**3 - size for size in tie_sizes) / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return u, 1.0
+    z = (abs(u - n1 * n2 / 2) - 0.5) / sigma
+    return u, min(1.0, math.erfc(max(z, 0) / math.sqrt(2)))
+
+
+class MetricComparison:
+    """Baseline and candidate values of one metric of one benchmark"""
+
+    def __init__(
+        self,
+        benchmark: str,
+        metric: str,
+        baseline: float,
+        candidate: float,
+        baseline_iqr: float = 0.0,
+        candidate_iqr: float = 0.0,
+        p_value: Optional[float] = None,
+        regressed: bool = False,
+    ):
+        self.benchmark = benchmark
+        self.metric = metric
+        self.baseline = baseline
+        self.candidate = candidate
+        self.baseline_iqr = baseline_iqr
+        self.candidate_iqr = candidate_iqr
+        self.p_value = p_value
+        self.regressed = regressed
+
+    @property
+    def change(self) -> float:
+        """Relative change from baseline, 0.1 means 10% higher"""
+        if self.baseline == 0:
+            return 0.0 if self.candidate == 0 else math.inf
+        return (self.candidate - self.baseline) / self.baseline
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}"
+            f"(benchmark: {self.benchmark}, metric: {self.metric}, "
+            f"change: {self.change:+.1%})"
+        )
+
+
+def get_benchmark_id(result: Dict) -> str:
+    return f"{result['name']} {json.dumps(result['shape'], sort_keys=True)}"
+
+
+def compare_runs(
+    baseline: Dict,
+    candidate: Dict,
+    threshold: float = 0.1,
+    alpha: float = 0.05,
+) -> List[MetricComparison]:
+    """Compares the benchmarks two stored runs have in common
+
+    Timings are compared per record, so runs made with a different number of
+    records are comparable. Time regresses when the median grows by more than
+    `threshold` and the Mann-Whitney U test is significant at `alpha`. Peak
+    memory, a single sample, regresses past `threshold` alone and is only
+    compared between runs of as many records. Any extra query is a regression.
+    """
+    baseline_results = {get_benchmark_id(r): r for r in baseline["results"]}
+    comparisons = []
+    for result in candidate["results"]:
+        benchmark_id = get_benchmark_id(result)
+        base = baseline_results.get(benchmark_id)
+        if base is None:
+            continue
+
+        base_timings = [t / base["records"] for t in base["timings"]]
+        timings = [t / result["records"] for t in result["timings"]]
+        _, p_value = mann_whitney_u(base_timings, timings)
+        time = MetricComparison(
+            benchmark=benchmark_id,
+            metric="time_per_record",
+            baseline=statistics.median(base_timings),
+            candidate=statistics.median(timings),
+            baseline_iqr=get_iqr(base_timings),
+            candidate_iqr=get_iqr(timings),
+            p_value=p_value,
+        )
+        time.regressed = time.change > threshold and p_value < alpha
+
+        queries = MetricComparison(
+            benchmark=benchmark_id,
+            metric="queries",
+            baseline=base["queries"] / base["records"],
+            candidate=result["queries"] / result["records"],
+        )
+        queries.regressed = queries.candidate > queries.baseline
+
+        comparisons.extend([time, queries])
+
+        if base["records"] == result["records"]:
+            memory = MetricComparison(
+                benchmark=benchmark_id,
+                metric="peak_memory",
+                baseline=base["peak_memory"],
+                candidate=result["peak_memory"],
+            )
+            memory.regressed = memory.change > threshold
+            comparisons.append(memory)
+    return comparisons
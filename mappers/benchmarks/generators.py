@@ -0,0 +1,184 @@
+import random
+from typing import Dict, List, Optional
+
+from mappers.models import FieldMap, Mapper, Model, Transformer, TransformerTypeChoices
+from mappers.services.json_mapper_service import JSONMapperService
+
+TARGET_PREFIX = "t_"
+
+# Field kinds cycled through when generating a model, with the transformer
+# that fits each kind's values
+FIELD_KINDS = (
+    ("string", TransformerTypeChoices.UPPERCASE),
+    ("number", None),
+    ("numeric_string", TransformerTypeChoices.STRING_TO_FLOAT),
+    ("boolean", None),
+    ("string_list", TransformerTypeChoices.UPPERCASE),
+    ("object", None),
+    ("object_list", None),
+)
+NESTED_KINDS = ("object", "object_list")
+
+
+class PayloadShape:
+    """Describes a synthetic source model
+
+    Args:
+        width (int): Fields per model
+        depth (int): Levels of nesting, 1 means a flat model
+        list_length (int): Items in every list value
+        transformer_mix (float): Share of transformable fields, 0 to 1, \
+            that get a transformer
+        seed (int): Seed making the generated payload and mapping reproducible
+    """
+
+    def __init__(
+        self,
+        width: int = 10,
+        depth: int = 2,
+        list_length: int = 5,
+        transformer_mix: float = 0.5,
+        seed: int = 0,
+    ):
+        if width < 1 or depth < 1 or list_length < 1:
+            raise ValueError("width, depth and list_length must be at least 1")
+        self.width = width
+        self.depth = depth
+        self.list_length = list_length
+        self.transformer_mix = transformer_mix
+        self.seed = seed
+
+    def as_dict(self) -> Dict:
+        return {
+            "width": self.width,
+            "depth": self.depth,
+            "list_length": self.list_length,
+            "transformer_mix": self.transformer_mix,
+            "seed": self.seed,
+        }
+
+    def __repr__(self) -> str:
+        shape = ", ".join(f"{key}: {value}" for key, value in self.as_dict().items())
+        return f"{self.__class__.__name__}({shape})"
+
+
+def get_field_kind(index: int, depth: int) -> str:
+    kind = FIELD_KINDS[index % len(FIELD_KINDS)][0]
+    if depth <= 1 and kind in NESTED_KINDS:
+        return "string"
+    return kind
+
+
+def generate_source_dto(
+    shape: PayloadShape, depth: int = None, record: int = 0
+) -> dict:
+    """Generates a source dto of `shape`. Values vary with `record`, keys and
+    types don't, so every record matches the same source model."""
+    depth = shape.depth if depth is None else depth
+    dto = {}
+    for index in range(shape.width):
+        kind = get_field_kind(index, depth)
+        name = f"{kind}_{index}"
+        value = record * shape.width + index
+        if kind == "string":
+            dto[name] = f"value {value}"
+        elif kind == "number":
+            dto[name] = value
+        elif kind == "numeric_string":
+            dto[name] = f"{value}.5"
+        elif kind == "boolean":
+            dto[name] = value % 2 == 0
+        elif kind == "string_list":
+            dto[name] = [f"item {item}" for item in range(shape.list_length)]
+        elif kind == "object":
+            dto[name] = generate_source_dto(shape, depth - 1, record)
+        else:
+            dto[name] = [
+                generate_source_dto(shape, depth - 1, record)
+                for _ in range(shape.list_length)
+            ]
+    return dto
+
+
+def generate_source_dtos(shape: PayloadShape, count: int) -> List[dict]:
+    return [generate_source_dto(shape, record=record) for record in range(count)]
+
+
+def get_target_dto(source_dto: dict) -> dict:
+    """Prefixes every key of `source_dto`, the target side of the mapping"""
+    target = {}
+    for key, value in source_dto.items():
+        if isinstance(value, dict):
+            value = get_target_dto(value)
+        elif value and isinstance(value, list) and isinstance(value[0], dict):
+            value = [get_target_dto(item) for item in value]
+        target[TARGET_PREFIX + key] = value
+    return target
+
+
+class BenchmarkMapping:
+    """Source and target models of a shape, mapped field to field"""
+
+    def __init__(self, shape: PayloadShape, source_model: Model, mapper: Mapper):
+        self.shape = shape
+        self.source_model = source_model
+        self.mapper = mapper
+
+    @property
+    def source_model_id(self) -> int:
+        return self.source_model.id
+
+    @property
+    def map_id(self) -> int:
+        return self.mapper.id
+
+
+def generate_mapping(
+    json_mapper_service: JSONMapperService, shape: PayloadShape
+) -> BenchmarkMapping:
+    """Creates the source and target models of `shape`, a mapper between them
+    and a field map per source field. A `transformer_mix` share of the fields
+    whose kind has a transformer get one."""
+    source_dto = generate_source_dto(shape)
+    source_model = json_mapper_service.create_models_and_fields_from_type_map(
+        json_mapper_service.map_to_json_types(source_dto)
+    )
+    target_model = json_mapper_service.create_models_and_fields_from_type_map(
+        json_mapper_service.map_to_json_types(get_target_dto(source_dto))
+    )
+    mapper = Mapper.objects.create(source_model=source_model, target_model=target_model)
+
+    rng = random.Random(shape.seed)
+    transformers: Dict[str, Transformer] = {}
+    field_maps: List[FieldMap] = []
+    pending = [(source_model, target_model)]
+    while pending:
+        source, target = pending.pop()
+        target_fields = {field.name: field for field in target.fields.all()}
+        for source_field in source.fields.all():
+            target_field = target_fields[TARGET_PREFIX + source_field.name]
+            transformer_type = _get_transformer_type(source_field.name)
+            transformer: Optional[Transformer] = None
+            if transformer_type and rng.random() < shape.transformer_mix:
+                transformer = transformers.get(transformer_type)
+                if transformer is None:
+                    transformer = Transformer.objects.create(type=transformer_type)
+                    transformers[transformer_type] = transformer
+            field_maps.append(
+                FieldMap(
+                    source_field=source_field,
+                    target_field=target_field,
+                    mapper=mapper,
+                    transformer=transformer,
+                )
+            )
+            if source_field.object_model_id:
+                pending.append((source_field.object_model, target_field.object_model))
+    FieldMap.objects.bulk_create(field_maps)
+
+    return BenchmarkMapping(shape=shape, source_model=source_model, mapper=mapper)
+
+
+def _get_transformer_type(field_name: str) -> Optional[TransformerTypeChoices]:
+    kind = field_name.rsplit("_", 1)[0]
+    return dict(FIELD_KINDS).get(kind)
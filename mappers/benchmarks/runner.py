@@ -0,0 +1,174 @@
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, List
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from mappers.benchmarks.generators import (
+    PayloadShape,
+    generate_mapping,
+    generate_source_dtos,
+)
+from mappers.constants import MappingEngine
+from mappers.services.json_mapper_factory import JSONMapperFactory
+from mappers.services.json_mapper_service import JSONMapperService
+from mappers.services.map_service import MapService
+from mappers.services.model_field_service import ModelFieldService
+from mappers.services.transformer_factory import TransformerFactory
+from mappers.services.transformer_service import TransformerService
+
+BENCHMARKS = (
+    "map_to_target_dto",
+    "map_to_json_types",
+    "create_models_and_fields_from_type_map",
+)
+
+
+class BenchmarkResult:
+    """Measurements of one benchmark. `timings` holds the wall time of each
+    round, every round processing `records` records."""
+
+    def __init__(
+        self,
+        name: str,
+        shape: PayloadShape,
+        records: int,
+        timings: List[float],
+        queries: int,
+        peak_memory: int,
+    ):
+        self.name = name
+        self.shape = shape
+        self.records = records
+        self.timings = timings
+        self.queries = queries
+        self.peak_memory = peak_memory
+
+    @property
+    def wall_time(self) -> float:
+        return statistics.median(self.timings)
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.wall_time if self.wall_time else float("inf")
+
+    def as_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "shape": self.shape.as_dict(),
+            "records": self.records,
+            "timings": self.timings,
+            "wall_time": self.wall_time,
+            "records_per_second": self.records_per_second,
+            "queries": self.queries,
+            "peak_memory": self.peak_memory,
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}"
+            f"(name: {self.name}, records/s: {self.records_per_second:.0f})"
+        )
+
+
+def build_json_mapper_service(engine: MappingEngine = None) -> JSONMapperService:
+    transformer_service = TransformerService(transformer_factory=TransformerFactory())
+    return JSONMapperService(
+        json_mapper_factory=JSONMapperFactory(
+            map_service=MapService(transformer_service=transformer_service)
+        ),
+        model_field_service=ModelFieldService(),
+        engine=engine,
+    )
+
+
+def measure(
+    name: str,
+    function: Callable[[], object],
+    shape: PayloadShape,
+    records: int,
+    repeat: int = 5,
+) -> BenchmarkResult:
+    """Measures `function`, which processes `records` records per call
+
+    A warm up call runs first, then one call counting queries and one tracing
+    memory, so that neither instrumentation skews the `repeat` timed rounds.
+    """
+    function()
+
+    with CaptureQueriesContext(connection) as context:
+        function()
+    queries = len(context.captured_queries)
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    function()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    if not tracing:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    return BenchmarkResult(
+        name=name,
+        shape=shape,
+        records=records,
+        timings=timings,
+        queries=queries,
+        peak_memory=peak_memory,
+    )
+
+
+def run_benchmarks(
+    shape: PayloadShape,
+    records: int = 100,
+    repeat: int = 5,
+    engine: MappingEngine = None,
+    names: Iterable[str] = BENCHMARKS,
+) -> List[BenchmarkResult]:
+    """Runs the `names` benchmarks against a generated mapping of `shape`
+
+    Everything written to the database, the generated mapping included, is
+    rolled back once the benchmarks are done.
+    """
+    json_mapper_service = build_json_mapper_service(engine)
+    results = []
+    with transaction.atomic():
+        mapping = generate_mapping(json_mapper_service, shape)
+        source_dtos = generate_source_dtos(shape, records)
+        type_map = json_mapper_service.map_to_json_types(source_dtos[0])
+
+        functions = {
+            "map_to_target_dto": lambda: [
+                json_mapper_service.map_to_target_dto(
+                    source_dto=dto,
+                    source_model_id=mapping.source_model_id,
+                    map_id=mapping.map_id,
+                )
+                for dto in source_dtos
+            ],
+            "map_to_json_types": lambda: [
+                json_mapper_service.map_to_json_types(json_dto=dto)
+                for dto in source_dtos
+            ],
+            "create_models_and_fields_from_type_map": lambda: [
+                json_mapper_service.create_models_and_fields_from_type_map(
+                    type_map=type_map
+                )
+                for _ in range(records)
+            ],
+        }
+        for name in names:
+            results.append(
+                measure(name, functions[name], shape, records=records, repeat=repeat)
+            )
+        transaction.set_rollback(True)
+    return results
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from mappers.benchmarks.runner import BenchmarkResult
+
+
+def get_git_commit(rev: str = "HEAD") -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def is_git_dirty() -> bool:
+    try:
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    return bool(status.strip())
+
+
+def get_machine() -> Dict:
+    return {
+        "system": platform.system(),
+        "release": platform.release(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+    }
+
+
+def get_machine_fingerprint(machine: Dict = None) -> str:
+    """Short hash of the hardware and interpreter, runs are only comparable
+    when their fingerprints match"""
+    encoded = json.dumps(machine or get_machine(), sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()[:12]
+
+
+class BenchmarkStore:
+    """JSON file of benchmark runs, keyed by `<git commit>@<machine fingerprint>`
+
+    Saving a run for a key that already exists replaces it, so re-running the
+    benchmarks on a commit refreshes its numbers.
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+
+    def load(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as file:
+            return json.load(file).get("runs", {})
+
+    def save_run(self, results: Iterable[BenchmarkResult], commit: str = None) -> str:
+        commit = commit or get_git_commit() or "unknown"
+        if is_git_dirty():
+            commit += "-dirty"
+        machine = get_machine()
+        fingerprint = get_machine_fingerprint(machine)
+        key = f"{commit}@{fingerprint}"
+
+        runs = self.load()
+        runs[key] = {
+            "commit": commit,
+            "fingerprint": fingerprint,
+            "machine": machine,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "results": [result.as_dict() for result in results],
+        }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "w") as file:
+            json.dump({"runs": runs}, file, indent=2)
+        return key
+
+    def get_run(self, selector: str) -> Dict:
+        """Finds a run by key, or by commit (any git rev works) preferring \
+            runs made on this machine
+
+        Runs saved on a dirty tree only match a selector ending in `-dirty`.
+
+        Raises:
+            KeyError: If no run, or more than one, matches `selector`
+        """
+        runs = self.load()
+        if selector in runs:
+            return runs[selector]
+
+        rev, dirty, _ = selector.partition("-dirty")
+        commit = (get_git_commit(rev) or rev) + dirty
+        matches = [run for _, run in sorted(runs.items()) if run["commit"] == commit]
+        local = [
+            run for run in matches if run["fingerprint"] == get_machine_fingerprint()
+        ]
+        matches = local or matches
+        if len(matches) != 1:
+            raise KeyError(f"{len(matches)} benchmark runs match: {selector}")
+        return matches[0]
+
+    def list_runs(self) -> List[Dict]:
+        return sorted(self.load().values(), key=lambda run: run["created_at"])
@@ -26,3 +26,10 @@ JSON_TYPE_TO_FIELD_TYPE = {
     JSONType.NUMBER: FieldTypeChoices.NUMBER,
     JSONType.BOOLEAN: FieldTypeChoices.BOOLEAN,
 }
+
+
+class MappingEngine(Enum):
+    # Walks the plan with the JSONMapper classes
+    INTERPRETED = "interpreted"
+    # Runs Python source generated from the plan, see `PlanCompiler`
+    COMPILED = "compiled"
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, List, Optional, Set
+
+from django.db import close_old_connections
+
+from mappers.events.event_handlers import get_json_mapper_service
+from mappers.events.queues import QueueBackend, QueueMessage
+from mappers.events.worker import MappingWorker
+from mappers.services.mapping_plan import MappingPlan
+
+logger = logging.getLogger(__name__)
+
+
+def _run_with_connection(function: Callable, *args):
+    close_old_connections()
+    try:
+        return function(*args)
+    finally:
+        close_old_connections()
+
+
+class AsyncMappingWorker:
+    """Asyncio runtime for the mapping worker
+
+    Up to `concurrency` events are in flight at once, bounded by a semaphore.
+    Events go through the same handlers as `MappingWorker`, so plans come
+    from the plan cache and batches use the process pool and tracing. Only
+    the plan lookup may touch the database, so an event whose plan is not
+    cached fetches it on a dedicated pool of `db_threads` threads, each with
+    its own connection, then every event is mapped on the loop. Blocking
+    queue calls go to the loop's default executor. Acks and outputs are
+    flushed in batches of up to `prefetch`.
+
+    A dedicated pool is used rather than `sync_to_async`, whose thread
+    sensitive mode would funnel every ORM call through a single thread.
+    """
+
+    def __init__(
+        self,
+        queue: QueueBackend,
+        output_queue: Optional[QueueBackend] = None,
+        concurrency: int = 100,
+        prefetch: int = 10,
+        wait_time_seconds: float = 1,
+        db_threads: int = 4,
+    ):
+        self.queue = queue
+        self.output_queue = output_queue
+        self.concurrency = concurrency
+        self.prefetch = prefetch
+        self.wait_time_seconds = wait_time_seconds
+        self.db_threads = db_threads
+        self.processed = 0
+        self.failed = 0
+        self._stopping: Optional[asyncio.Event] = None
+        self._acks: List[str] = []
+        self._outputs: List[dict] = []
+
+    def stop(self) -> None:
+        """Stops receiving, then drains the events in flight"""
+        logger.info("Async mapping worker stopping")
+        if self._stopping:
+            self._stopping.set()
+
+    def run(self, max_batches: Optional[int] = None) -> None:
+        asyncio.run(self.serve(max_batches=max_batches, install_signals=True))
+
+    async def serve(
+        self, max_batches: Optional[int] = None, install_signals: bool = False
+    ) -> None:
+        # Warm the service graph before the first event arrives
+        get_json_mapper_service()
+        loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        if install_signals:
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(signum, self.stop)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks: Set[asyncio.Task] = set()
+        batches = 0
+        with ThreadPoolExecutor(
+            max_workers=self.db_threads, thread_name_prefix="mapping-db"
+        ) as db_executor:
+            while not self._stopping.is_set():
+                if max_batches is not None and batches >= max_batches:
+                    break
+                messages = await loop.run_in_executor(
+                    None,
+                    partial(
+                        self.queue.receive_messages,
+                        max_messages=self.prefetch,
+                        wait_time_seconds=self.wait_time_seconds,
+                    ),
+                )
+                batches += 1
+                for message in messages:
+                    await semaphore.acquire()
+                    task = asyncio.create_task(
+                        self._process_message(message, db_executor)
+                    )
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    task.add_done_callback(lambda _: semaphore.release())
+                if len(self._acks) >= self.prefetch or not messages:
+                    await self._flush()
+
+            if tasks:
+                await asyncio.gather(*tasks)
+            await self._flush()
+
+    async def _process_message(
+        self, message: QueueMessage, db_executor: ThreadPoolExecutor
+    ) -> None:
+        try:
+            plan = await self._get_plan(message, db_executor)
+            output = MappingWorker.process_message(message, plan=plan)
+        except Exception:
+            logger.exception("Failed to process message %s", message.id)
+            self.failed += 1
+            return
+
+        self._outputs.append(output)
+        self._acks.append(message.receipt_handle)
+        self.processed += 1
+
+    async def _get_plan(
+        self, message: QueueMessage, db_executor: ThreadPoolExecutor
+    ) -> Optional[MappingPlan]:
+        body = message.body
+        if "map_id" not in body:
+            return None
+        service = get_json_mapper_service()
+        plan = service.get_cached_mapping_plan(
+            source_model_id=body["source_model_id"], map_id=body["map_id"]
+        )
+        if plan is not None:
+            return plan
+        return await asyncio.get_running_loop().run_in_executor(
+            db_executor,
+            partial(
+                _run_with_connection,
+                service.get_mapping_plan,
+                body["source_model_id"],
+                body["map_id"],
+            ),
+        )
+
+    async def _flush(self) -> None:
+        acks, self._acks = self._acks, []
+        outputs, self._outputs = self._outputs, []
+        loop = asyncio.get_running_loop()
+        if outputs and self.output_queue is not None:
+            await loop.run_in_executor(None, self.output_queue.send_messages, outputs)
+        if acks:
+            await loop.run_in_executor(None, self.queue.delete_messages, acks)
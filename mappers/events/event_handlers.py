@@ -1,48 +1,83 @@
 import json
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
 
 from mappers.services.json_mapper_factory import JSONMapperFactory
 from mappers.services.json_mapper_service import JSONMapperService
 from mappers.services.map_service import MapService
+from mappers.services.mapping_plan import MappingPlan
 from mappers.services.model_field_service import ModelFieldService
 from mappers.services.transformer_factory import TransformerFactory
 from mappers.services.transformer_service import TransformerService
 
 
+@lru_cache(maxsize=None)
+def get_json_mapper_service() -> JSONMapperService:
+    """Builds the mapper service graph once per process. The services hold no
+    per-event state, so handlers can share them."""
+    transformer_service = TransformerService(transformer_factory=TransformerFactory())
+    json_mapper_factory = JSONMapperFactory(
+        map_service=MapService(transformer_service=transformer_service)
+    )
+    return JSONMapperService(
+        json_mapper_factory=json_mapper_factory,
+        model_field_service=ModelFieldService(),
+    )
+
+
+MAP_TO_TARGET = "map_to_target"
+
+
+def get_event_plan(event: dict) -> MappingPlan:
+    return get_json_mapper_service().get_mapping_plan(
+        source_model_id=event["source_model_id"], map_id=event["map_id"]
+    )
+
+
+def map_to_target(event: dict, plan: Optional[MappingPlan] = None) -> dict:
+    return get_json_mapper_service().map_to_target_dto_with_plan(
+        source_dto=event["data"], plan=plan or get_event_plan(event)
+    )
+
+
+def map_many_to_target(event: dict, plan: Optional[MappingPlan] = None) -> List[dict]:
+    return get_json_mapper_service().map_many_to_target_dtos_with_plan(
+        source_dtos=event["data"], plan=plan or get_event_plan(event)
+    )
+
+
+def map_to_json_types(event: dict, plan: Optional[MappingPlan] = None) -> dict:
+    return get_json_mapper_service().map_to_json_types(json_dto=event["data"])
+
+
+# Handlers by event type, used by `MapperEventHandlers` and the mapping workers.
+# Events with a `map_id` are mapped with the plan passed in, or else the plan
+# is looked up, which may read the database.
+EVENT_HANDLERS: Dict[str, Callable[[dict, Optional[MappingPlan]], object]] = {
+    MAP_TO_TARGET: map_to_target,
+    "map_many_to_target": map_many_to_target,
+    "map_to_json_types": map_to_json_types,
+}
+
+
 class MapperEventHandlers:
     @staticmethod
     def map_to_target_handler(event: dict):
-        transformer_service = TransformerService(
-            transformer_factory=TransformerFactory()
-        )
-        json_mapper_factory = JSONMapperFactory(
-            map_service=MapService(transformer_service=transformer_service)
-        )
-        json_mapper_service = JSONMapperService(
-            json_mapper_factory=json_mapper_factory,
-            model_field_service=ModelFieldService(),
-        )
-        dto = json_mapper_service.map_to_target_dto(
-            source_dto=event["data"],
-            source_model_id=event["source_model_id"],
-            map_id=event["map_id"],
-        )
+        dto = map_to_target(event)
 
         print(f"Pushed MappedEvent to SQS:\n{json.dumps(dto, indent=4)}")
         return dto
 
+    @staticmethod
+    def map_many_to_target_handler(event: dict):
+        dtos = map_many_to_target(event)
+
+        print(f"Pushed {len(dtos)} MappedEvents to SQS")
+        return dtos
+
     @staticmethod
     def map_to_json_types_handler(event: dict):
-        transformer_service = TransformerService(
-            transformer_factory=TransformerFactory()
-        )
-        json_mapper_factory = JSONMapperFactory(
-            map_service=MapService(transformer_service=transformer_service)
-        )
-        json_mapper_service = JSONMapperService(
-            json_mapper_factory=json_mapper_factory,
-            model_field_service=ModelFieldService(),
-        )
-        dto = json_mapper_service.map_to_json_types(json_dto=event["data"])
+        dto = map_to_json_types(event)
 
         print(f"Generated Types:\n{json.dumps(dto, indent=4)}")
         return dto
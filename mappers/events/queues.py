@@ -0,0 +1,324 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class QueueMessage:
+    """A received message. `receipt_handle` identifies this delivery and is
+    what gets acked, mirroring SQS. `receive_count` counts the deliveries of
+    the message, this one included."""
+
+    __slots__ = ("id", "receipt_handle", "body", "receive_count")
+
+    def __init__(
+        self, id: str, receipt_handle: str, body: dict, receive_count: int = 1
+    ):
+        self.id = id
+        self.receipt_handle = receipt_handle
+        self.body = body
+        self.receive_count = receive_count
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(id: {self.id})"
+
+
+class QueueBackend(ABC):
+    """SQS shaped queue interface used by the mapping worker
+
+    Received messages stay invisible for `visibility_timeout` seconds and are
+    redelivered unless they are deleted (acked) before it expires. Like an SQS
+    redrive policy, with `max_receive_count` a message delivered that many
+    times without being acked is moved to `dead_letter_queue` instead of
+    being delivered again, so a message that always fails is not retried
+    forever.
+    """
+
+    def __init__(
+        self,
+        queue_name: str,
+        visibility_timeout: float = 30,
+        max_receive_count: Optional[int] = None,
+        dead_letter_queue: Optional[str] = None,
+    ):
+        self.queue_name = queue_name
+        self.visibility_timeout = visibility_timeout
+        self.max_receive_count = max_receive_count
+        self.dead_letter_queue = dead_letter_queue or f"{queue_name}-dead-letter"
+
+    def _is_dead_letter(self, receive_count: int) -> bool:
+        """Whether a message already delivered `receive_count` times is moved \
+            to the dead-letter queue rather than delivered again
+        """
+        return bool(self.max_receive_count) and receive_count >= self.max_receive_count
+
+    def _log_dead_letter(self, id) -> None:
+        logger.warning(
+            "Message %s of %s moved to %s after %s deliveries",
+            id,
+            self.queue_name,
+            self.dead_letter_queue,
+            self.max_receive_count,
+        )
+
+    @abstractmethod
+    def send_messages(self, bodies: Iterable[dict]) -> None:
+        pass
+
+    @abstractmethod
+    def receive_messages(
+        self, max_messages: int = 10, wait_time_seconds: float = 0
+    ) -> List[QueueMessage]:
+        pass
+
+    @abstractmethod
+    def delete_messages(self, receipt_handles: Iterable[str]) -> None:
+        pass
+
+    def send_message(self, body: dict) -> None:
+        self.send_messages([body])
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryQueueBackend(QueueBackend):
+    """Process local queue, for tests and running the worker in-process.
+    Queues are shared by name within the process."""
+
+    _queues: Dict[str, "OrderedDict[str, list]"] = {}
+    _lock = threading.Condition()
+
+    def __init__(self, queue_name: str, visibility_timeout: float = 30, **options):
+        super().__init__(queue_name, visibility_timeout, **options)
+        with self._lock:
+            # message id -> [body, visible_at, receipt_handle, receive_count]
+            self._messages = self._queues.setdefault(queue_name, OrderedDict())
+
+    def send_messages(self, bodies: Iterable[dict]) -> None:
+        with self._lock:
+            for body in bodies:
+                self._messages[uuid.uuid4().hex] = [json.dumps(body), 0, None, 0]
+            self._lock.notify_all()
+
+    def receive_messages(
+        self, max_messages: int = 10, wait_time_seconds: float = 0
+    ) -> List[QueueMessage]:
+        deadline = time.monotonic() + wait_time_seconds
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                result = []
+                for id, message in list(self._messages.items()):
+                    if len(result) >= max_messages:
+                        break
+                    if message[1] > now:
+                        continue
+                    if self._is_dead_letter(message[3]):
+                        del self._messages[id]
+                        dead_letters = self._queues.setdefault(
+                            self.dead_letter_queue, OrderedDict()
+                        )
+                        dead_letters[id] = [message[0], 0, None, 0]
+                        self._log_dead_letter(id)
+                        continue
+                    message[1] = now + self.visibility_timeout
+                    message[2] = uuid.uuid4().hex
+                    message[3] += 1
+                    result.append(
+                        QueueMessage(
+                            id,
+                            f"{id}:{message[2]}",
+                            json.loads(message[0]),
+                            message[3],
+                        )
+                    )
+                if result or now >= deadline:
+                    return result
+                self._lock.wait(timeout=min(deadline - now, 0.1))
+
+    def delete_messages(self, receipt_handles: Iterable[str]) -> None:
+        with self._lock:
+            for receipt_handle in receipt_handles:
+                id, token = receipt_handle.split(":", 1)
+                message = self._messages.get(id)
+                if message and message[2] == token:
+                    del self._messages[id]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._messages)
+
+    @classmethod
+    def purge_all(cls) -> None:
+        with cls._lock:
+            cls._queues.clear()
+
+
+class SQLiteQueueBackend(QueueBackend):
+    """Durable local queue stored in a SQLite file, safe to share between
+    worker processes on one host."""
+
+    POLL_INTERVAL = 0.2
+
+    def __init__(
+        self,
+        queue_name: str,
+        path: str = "queue.sqlite3",
+        visibility_timeout=30,
+        **options,
+    ):
+        super().__init__(queue_name, visibility_timeout, **options)
+        self.path = str(path)
+        self._local = threading.local()
+        # Every thread's connection, so that `close` closes them all
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS queue_message (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    queue_name TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    visible_at REAL NOT NULL DEFAULT 0,
+                    receipt_token TEXT,
+                    receive_count INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            columns = [
+                row[1] for row in conn.execute("PRAGMA table_info(queue_message)")
+            ]
+            if "receive_count" not in columns:
+                # Queue files created before receive counts were tracked
+                conn.execute(
+                    "ALTER TABLE queue_message "
+                    "ADD COLUMN receive_count INTEGER NOT NULL DEFAULT 0"
+                )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS queue_message_visible
+                ON queue_message (queue_name, visible_at)
+                """
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Only used by this thread, but closed by whichever calls `close`
+            conn = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def send_messages(self, bodies: Iterable[dict]) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO queue_message (queue_name, body) VALUES (?, ?)",
+                [(self.queue_name, json.dumps(body)) for body in bodies],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def receive_messages(
+        self, max_messages: int = 10, wait_time_seconds: float = 0
+    ) -> List[QueueMessage]:
+        deadline = time.monotonic() + wait_time_seconds
+        while True:
+            result = self._receive(max_messages)
+            if result or time.monotonic() >= deadline:
+                return result
+            time.sleep(self.POLL_INTERVAL)
+
+    def _receive(self, max_messages: int) -> List[QueueMessage]:
+        conn = self._connection()
+        now = time.time()
+        token = uuid.uuid4().hex
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                """
+                SELECT id, body, receive_count FROM queue_message
+                WHERE queue_name = ? AND visible_at <= ?
+                ORDER BY id LIMIT ?
+                """,
+                (self.queue_name, now, max_messages),
+            ).fetchall()
+            dead_letter_ids = [
+                id for id, _, count in rows if self._is_dead_letter(count)
+            ]
+            if dead_letter_ids:
+                conn.executemany(
+                    """
+                    UPDATE queue_message SET queue_name = ?, visible_at = 0,
+                    receipt_token = NULL, receive_count = 0
+                    WHERE id = ?
+                    """,
+                    [(self.dead_letter_queue, id) for id in dead_letter_ids],
+                )
+                rows = [row for row in rows if row[0] not in dead_letter_ids]
+            conn.executemany(
+                """
+                UPDATE queue_message SET visible_at = ?, receipt_token = ?,
+                receive_count = receive_count + 1
+                WHERE id = ?
+                """,
+                [(now + self.visibility_timeout, token, id) for id, _, _ in rows],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        for id in dead_letter_ids:
+            self._log_dead_letter(id)
+        return [
+            QueueMessage(str(id), f"{id}:{token}", json.loads(body), count + 1)
+            for id, body, count in rows
+        ]
+
+    def delete_messages(self, receipt_handles: Iterable[str]) -> None:
+        params = [
+            tuple(receipt_handle.split(":", 1)) for receipt_handle in receipt_handles
+        ]
+        if not params:
+            return
+        conn = self._connection()
+        conn.executemany(
+            "DELETE FROM queue_message WHERE id = ? AND receipt_token = ?", params
+        )
+
+    def close(self) -> None:
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            # Threads that keep using the backend open new connections
+            self._local = threading.local()
+        for conn in connections:
+            conn.close()
+
+
+def get_queue_backend(queue_name: str, backend: str = None, **options) -> QueueBackend:
+    """Builds the queue backend configured in `settings.MAPPING_WORKER`"""
+    config = getattr(settings, "MAPPING_WORKER", {})
+    backend_class = import_string(backend or config["QUEUE_BACKEND"])
+    return backend_class(
+        queue_name=queue_name, **{**config.get("QUEUE_OPTIONS", {}), **options}
+    )
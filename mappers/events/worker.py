@@ -0,0 +1,192 @@
+import logging
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.db import close_old_connections
+
+from mappers.events.event_handlers import (
+    EVENT_HANDLERS,
+    MAP_TO_TARGET,
+    get_json_mapper_service,
+)
+from mappers.events.queues import QueueBackend, QueueMessage
+from mappers.services.mapping_plan import MappingPlan
+
+logger = logging.getLogger(__name__)
+
+
+class MappingWorker:
+    """Long-lived consumer of mapping events
+
+    Messages are pulled from `queue` in batches of up to `prefetch`. Within a
+    batch, `map_to_target` events sharing a mapper and source model look their
+    plan up once, then each event is mapped on its own, so a bad event fails
+    alone and no event is mapped twice. Results go to `output_queue` and
+    successfully processed messages are acked in one batch. Failed messages
+    are left unacked and get redelivered by the queue, until it moves them
+    to its dead-letter queue, see `QueueBackend`.
+    This replaces the print based SQS push of `MapperEventHandlers`.
+
+    Event bodies look like `{"type": "map_to_target", "data": {...}, \
+    "map_id": 1, "source_model_id": 2}`, see `EVENT_HANDLERS` for the types.
+    """
+
+    HANDLERS: Dict[
+        str, Callable[[dict, Optional[MappingPlan]], object]
+    ] = EVENT_HANDLERS
+
+    def __init__(
+        self,
+        queue: QueueBackend,
+        output_queue: Optional[QueueBackend] = None,
+        concurrency: int = 1,
+        prefetch: int = 10,
+        wait_time_seconds: float = 1,
+    ):
+        self.queue = queue
+        self.output_queue = output_queue
+        self.concurrency = concurrency
+        self.prefetch = prefetch
+        self.wait_time_seconds = wait_time_seconds
+        self.processed = 0
+        self.failed = 0
+        self._stopping = threading.Event()
+
+    def stop(self, *args) -> None:
+        """Finishes the batch in progress, then stops"""
+        logger.info("Mapping worker stopping")
+        self._stopping.set()
+
+    def install_signal_handlers(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+    def run(self, max_batches: Optional[int] = None) -> None:
+        # Warm the service graph before the first event arrives
+        get_json_mapper_service()
+
+        batches = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while not self._stopping.is_set():
+                if max_batches is not None and batches >= max_batches:
+                    break
+                messages = self.queue.receive_messages(
+                    max_messages=self.prefetch,
+                    wait_time_seconds=self.wait_time_seconds,
+                )
+                if messages:
+                    self.process_batch(messages, executor)
+                    batches += 1
+
+    def process_batch(
+        self,
+        messages: List[QueueMessage],
+        executor: Optional[ThreadPoolExecutor] = None,
+    ) -> None:
+        """Processes, pushes and acks one batch of messages, in the calling \
+            thread unless an executor is given
+        """
+        groups = self._group_messages(messages)
+        results = (
+            executor.map(self._process_group_in_thread, groups)
+            if executor
+            else map(self._process_group, groups)
+        )
+        acked, outputs = [], []
+        for group_acked, group_outputs in results:
+            acked.extend(group_acked)
+            outputs.extend(group_outputs)
+
+        if outputs and self.output_queue is not None:
+            self.output_queue.send_messages(outputs)
+        if acked:
+            self.queue.delete_messages(acked)
+
+        self.processed += len(acked)
+        self.failed += len(messages) - len(acked)
+
+    def _group_messages(self, messages: List[QueueMessage]) -> List[List[QueueMessage]]:
+        groups: Dict[Tuple, List[QueueMessage]] = {}
+        for message in messages:
+            body = message.body
+            if body.get("type") == MAP_TO_TARGET:
+                key = (MAP_TO_TARGET, body.get("map_id"), body.get("source_model_id"))
+            else:
+                key = (message.id,)
+            groups.setdefault(key, []).append(message)
+        return list(groups.values())
+
+    def _process_group_in_thread(
+        self, messages: List[QueueMessage]
+    ) -> Tuple[List[str], List[dict]]:
+        # Pool threads keep their DB connection between batches
+        close_old_connections()
+        try:
+            return self._process_group(messages)
+        finally:
+            close_old_connections()
+
+    def _process_group(
+        self, messages: List[QueueMessage]
+    ) -> Tuple[List[str], List[dict]]:
+        if len(messages) > 1:
+            return self._process_map_to_target_group(messages)
+
+        acked, outputs = [], []
+        for message in messages:
+            try:
+                outputs.append(self.process_message(message))
+                acked.append(message.receipt_handle)
+            except Exception:
+                logger.exception("Failed to process message %s", message.id)
+        return acked, outputs
+
+    def _process_map_to_target_group(
+        self, messages: List[QueueMessage]
+    ) -> Tuple[List[str], List[dict]]:
+        service = get_json_mapper_service()
+        first = messages[0].body
+        try:
+            plan = service.get_mapping_plan(
+                source_model_id=first["source_model_id"], map_id=first["map_id"]
+            )
+        except Exception:
+            logger.exception("Failed to get the plan of map %s", first["map_id"])
+            return [], []
+
+        acked, outputs = [], []
+        for message in messages:
+            try:
+                dto = service.map_to_target_dto_with_plan(
+                    source_dto=message.body["data"], plan=plan
+                )
+            except Exception:
+                logger.exception("Failed to process message %s", message.id)
+                continue
+            outputs.append(self._get_output(message, dto))
+            acked.append(message.receipt_handle)
+        return acked, outputs
+
+    @classmethod
+    def process_message(
+        cls, message: QueueMessage, plan: Optional[MappingPlan] = None
+    ) -> dict:
+        """Runs the handler of the message's event type and returns the body \
+            of its output message. Mapping events use `plan` when given, and \
+            look it up otherwise.
+        """
+        handler = cls.HANDLERS.get(message.body.get("type"))
+        if handler is None:
+            raise ValueError(f"Unknown event type: {message.body.get('type')}")
+        return cls._get_output(message, handler(message.body, plan))
+
+    @staticmethod
+    def _get_output(message: QueueMessage, data) -> dict:
+        body = message.body
+        output = {"type": body["type"], "data": data}
+        for key in ("sync_id", "map_id", "source_model_id"):
+            if key in body:
+                output[key] = body[key]
+        return output
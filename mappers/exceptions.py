@@ -5,3 +5,8 @@ class InvalidType(Exception):
 
 class NotFoundError(Exception):
     pass
+
+
+class InvalidPatch(Exception):
+    def __init__(self, msg="Invalid JSON Patch", *args, **kwargs):
+        super().__init__(msg, *args, **kwargs)
@@ -0,0 +1,68 @@
+from typing import Dict, Optional
+
+from mappers.constants import MappingEngine
+from mappers.models import Mapper, Model, Transformer
+from mappers.services.json_mapper_factory import JSONMapperFactory
+from mappers.services.json_mapper_service import JSONMapperService
+from mappers.services.map_service import MapService
+from mappers.services.model_field_service import ModelFieldService
+from mappers.services.transformer_factory import TransformerFactory
+from mappers.services.transformer_service import TransformerService
+
+
+def build_map_service() -> MapService:
+    """Creates a MapService wired the way the app wires it"""
+    return MapService(
+        transformer_service=TransformerService(transformer_factory=TransformerFactory())
+    )
+
+
+def build_json_mapper_service(
+    map_service: MapService, engine: Optional[MappingEngine] = None
+) -> JSONMapperService:
+    """Creates a JSONMapperService on top of `map_service`"""
+    return JSONMapperService(
+        json_mapper_factory=JSONMapperFactory(map_service=map_service),
+        model_field_service=ModelFieldService(),
+        engine=engine,
+    )
+
+
+def create_model_from_dto(json_mapper_service: JSONMapperService, dto: dict) -> Model:
+    """Creates the model, fields and nested models inferred from `dto`"""
+    type_map = json_mapper_service.map_to_json_types(json_dto=dto)
+    return json_mapper_service.create_models_and_fields_from_type_map(type_map=type_map)
+
+
+def create_field_maps(
+    map_service: MapService,
+    mapper: Mapper,
+    source_model: Model,
+    target_model: Model,
+    transformers: Optional[Dict[str, Transformer]] = None,
+    prefix: str = "target_",
+) -> None:
+    """Maps every field of `source_model` to the `target_model` field named \
+        `prefix` + its name, recursing into nested models
+
+    Args:
+        transformers (dict): Transformer of each source field name, if any
+    """
+    transformers = transformers or {}
+    for source_field in source_model.fields.all():
+        target_field = target_model.fields.get(name=prefix + source_field.name)
+        map_service.create_field_map(
+            source_field=source_field,
+            target_field=target_field,
+            map=mapper,
+            transformer=transformers.get(source_field.name),
+        )
+        if source_field.object_model_id:
+            create_field_maps(
+                map_service,
+                mapper,
+                source_field.object_model,
+                target_field.object_model,
+                transformers=transformers,
+                prefix=prefix,
+            )
@@ -0,0 +1,95 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from mappers.benchmarks.generators import PayloadShape
+from mappers.benchmarks.runner import BENCHMARKS, run_benchmarks
+from mappers.benchmarks.store import BenchmarkStore
+from mappers.constants import MappingEngine
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the mapping engine against generated payloads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--width", type=int, default=10, help="Fields per model")
+        parser.add_argument(
+            "--depth", type=int, default=2, help="Levels of nesting, 1 is flat"
+        )
+        parser.add_argument(
+            "--list-length", type=int, default=5, help="Items in every list value"
+        )
+        parser.add_argument(
+            "--transformer-mix",
+            type=float,
+            default=0.5,
+            help="Share of transformable fields that get a transformer, 0 to 1",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--records", type=int, default=100, help="Records per timed round"
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Timed rounds")
+        parser.add_argument(
+            "--engine",
+            choices=[engine.value for engine in MappingEngine],
+            default=None,
+            help="Mapping engine, defaults to settings.MAPPING_ENGINE",
+        )
+        parser.add_argument(
+            "--benchmark",
+            action="append",
+            choices=BENCHMARKS,
+            dest="benchmarks",
+            help="Benchmark to run, may be repeated. Defaults to all",
+        )
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+        parser.add_argument(
+            "--save",
+            action="store_true",
+            help="Store the run under the current commit, see bench_compare",
+        )
+        parser.add_argument(
+            "--store",
+            default=getattr(settings, "MAPPING_BENCHMARK_RESULTS", None),
+            help="JSON file runs are saved to",
+        )
+
+    def handle(self, *args, **options):
+        shape = PayloadShape(
+            width=options["width"],
+            depth=options["depth"],
+            list_length=options["list_length"],
+            transformer_mix=options["transformer_mix"],
+            seed=options["seed"],
+        )
+        results = run_benchmarks(
+            shape,
+            records=options["records"],
+            repeat=options["repeat"],
+            engine=options["engine"] and MappingEngine(options["engine"]),
+            names=options["benchmarks"] or BENCHMARKS,
+        )
+
+        if options["save"]:
+            key = BenchmarkStore(options["store"]).save_run(results)
+            self.stderr.write(f"Saved run {key} to {options['store']}")
+
+        if options["json"]:
+            self.stdout.write(
+                json.dumps([result.as_dict() for result in results], indent=4)
+            )
+            return
+
+        self.stdout.write(f"{shape}, {options['records']} records")
+        self.stdout.write(
+            f"{'benchmark':<40} {'wall s':>10} {'records/s':>12} "
+            f"{'queries':>8} {'peak KiB':>10}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result.name:<40} {result.wall_time:>10.4f} "
+                f"{result.records_per_second:>12.0f} {result.queries:>8} "
+                f"{result.peak_memory / 1024:>10.1f}"
+            )
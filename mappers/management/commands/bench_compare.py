@@ -0,0 +1,99 @@
+import math
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from mappers.benchmarks.compare import compare_runs
+from mappers.benchmarks.store import BenchmarkStore
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares two benchmark runs saved with `bench --save`, failing when a "
+        "metric regressed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "baseline", nargs="?", help="Run key, or git rev of the baseline run"
+        )
+        parser.add_argument(
+            "candidate",
+            nargs="?",
+            default="HEAD",
+            help="Run key, or git rev of the candidate run. Defaults to HEAD",
+        )
+        parser.add_argument(
+            "--store",
+            default=getattr(settings, "MAPPING_BENCHMARK_RESULTS", None),
+            help="JSON file runs were saved to",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.1,
+            help="Relative increase counted as a regression, 0.1 is 10%%",
+        )
+        parser.add_argument(
+            "--alpha",
+            type=float,
+            default=0.05,
+            help="Significance level of the timing comparison",
+        )
+        parser.add_argument("--list", action="store_true", help="List saved runs")
+
+    def handle(self, *args, **options):
+        store = BenchmarkStore(options["store"])
+        if options["list"]:
+            for run in store.list_runs():
+                self.stdout.write(
+                    f"{run['commit']}@{run['fingerprint']}  {run['created_at']}"
+                )
+            return
+        if not options["baseline"]:
+            raise CommandError("A baseline run is required")
+
+        try:
+            baseline = store.get_run(options["baseline"])
+            candidate = store.get_run(options["candidate"])
+        except KeyError as e:
+            raise CommandError(e.args[0])
+        if baseline["fingerprint"] != candidate["fingerprint"]:
+            self.stderr.write(
+                self.style.WARNING("Runs were made on different machines")
+            )
+
+        comparisons = compare_runs(
+            baseline,
+            candidate,
+            threshold=options["threshold"],
+            alpha=options["alpha"],
+        )
+        if not comparisons:
+            raise CommandError("The runs have no benchmark in common")
+
+        self.stdout.write(f"{baseline['commit']} -> {candidate['commit']}")
+        benchmark = None
+        for comparison in comparisons:
+            if comparison.benchmark != benchmark:
+                benchmark = comparison.benchmark
+                self.stdout.write(benchmark)
+            change = (
+                "new" if math.isinf(comparison.change) else f"{comparison.change:+.1%}"
+            )
+            line = (
+                f"    {comparison.metric:<16} {comparison.baseline:>12.6g} "
+                f"-> {comparison.candidate:>12.6g} {change:>8}"
+            )
+            if comparison.metric == "time_per_record":
+                line += (
+                    f"  IQR {comparison.baseline_iqr:.3g} / "
+                    f"{comparison.candidate_iqr:.3g}  p={comparison.p_value:.3f}"
+                )
+            if comparison.regressed:
+                line = self.style.ERROR(line + "  REGRESSED")
+            self.stdout.write(line)
+
+        regressions = [c for c in comparisons if c.regressed]
+        if regressions:
+            raise CommandError(f"{len(regressions)} metrics regressed")
@@ -0,0 +1,122 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from mappers.events.async_worker import AsyncMappingWorker
+from mappers.events.queues import get_queue_backend
+from mappers.events.worker import MappingWorker
+
+
+class Command(BaseCommand):
+    help = "Consumes mapping events from the configured queue until stopped"
+
+    def add_arguments(self, parser):
+        config = getattr(settings, "MAPPING_WORKER", {})
+        parser.add_argument(
+            "--backend",
+            default=config.get("QUEUE_BACKEND"),
+            help="Dotted path of the QueueBackend class",
+        )
+        parser.add_argument(
+            "--queue", default=config.get("INPUT_QUEUE"), help="Queue to consume"
+        )
+        parser.add_argument(
+            "--output-queue",
+            default=config.get("OUTPUT_QUEUE"),
+            help="Queue mapped events are pushed to",
+        )
+        parser.add_argument(
+            "--max-receive-count",
+            type=int,
+            default=config.get("MAX_RECEIVE_COUNT"),
+            help="Deliveries of a failing message before it is dead-lettered",
+        )
+        parser.add_argument(
+            "--dead-letter-queue",
+            default=config.get("DEAD_LETTER_QUEUE"),
+            help="Queue failing messages are moved to",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Number of event groups mapped in parallel, or of events in "
+            "flight with --async. Defaults to CONCURRENCY, or ASYNC_CONCURRENCY "
+            "with --async, of settings.MAPPING_WORKER",
+        )
+        parser.add_argument(
+            "--prefetch",
+            type=int,
+            default=config.get("PREFETCH", 10),
+            help="Max number of messages received per batch",
+        )
+        parser.add_argument(
+            "--wait-time",
+            type=float,
+            default=config.get("WAIT_TIME_SECONDS", 1),
+            help="Seconds to long poll for messages",
+        )
+        parser.add_argument(
+            "--async",
+            action="store_true",
+            dest="use_async",
+            help="Run on an asyncio loop, --concurrency events in flight at once",
+        )
+        parser.add_argument(
+            "--db-threads",
+            type=int,
+            default=config.get("DB_THREADS", 4),
+            help="Threads fetching uncached plans from the database in --async mode",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=None,
+            help="Stop after this many batches, mostly for local runs",
+        )
+
+    def handle(self, *args, **options):
+        queue = get_queue_backend(
+            options["queue"],
+            backend=options["backend"],
+            max_receive_count=options["max_receive_count"],
+            dead_letter_queue=options["dead_letter_queue"],
+        )
+        output_queue = (
+            get_queue_backend(options["output_queue"], backend=options["backend"])
+            if options["output_queue"]
+            else None
+        )
+        config = getattr(settings, "MAPPING_WORKER", {})
+        concurrency = options["concurrency"]
+        if concurrency is None:
+            concurrency = (
+                config.get("ASYNC_CONCURRENCY", 100)
+                if options["use_async"]
+                else config.get("CONCURRENCY", 1)
+            )
+        worker_options = dict(
+            queue=queue,
+            output_queue=output_queue,
+            concurrency=concurrency,
+            prefetch=options["prefetch"],
+            wait_time_seconds=options["wait_time"],
+        )
+        if options["use_async"]:
+            worker = AsyncMappingWorker(
+                db_threads=options["db_threads"], **worker_options
+            )
+        else:
+            worker = MappingWorker(**worker_options)
+            worker.install_signal_handlers()
+
+        self.stdout.write(f"Consuming mapping events from {queue.queue_name}")
+        try:
+            worker.run(max_batches=options["max_batches"])
+        finally:
+            queue.close()
+            if output_queue is not None:
+                output_queue.close()
+
+        self.stdout.write(
+            f"Stopped after {worker.processed} processed, {worker.failed} failed"
+        )
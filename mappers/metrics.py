@@ -0,0 +1,102 @@
+from typing import Dict, Iterable, List, Tuple
+
+from core.metrics import Counter, Gauge, Metric, registry
+from mappers.services.mapping_plan_cache import plan_cache
+from mappers.services.memoization import get_memos
+
+MAPPED_RECORDS = registry.counter(
+    "mapping_records_total", "Source records mapped", labelnames=("map_id",)
+)
+MAPPING_LATENCY = registry.histogram(
+    "mapping_duration_seconds", "Time to map one record", labelnames=("map_id",)
+)
+MAPPING_BATCH_LATENCY = registry.histogram(
+    "mapping_batch_duration_seconds",
+    "Time to map one batch of records",
+    labelnames=("map_id",),
+)
+MODEL_INFERENCES = registry.counter(
+    "mapping_model_inferences_total", "Payloads whose type map was inferred"
+)
+MODEL_INFERENCE_LATENCY = registry.histogram(
+    "mapping_model_inference_duration_seconds", "Time to infer a payload's type map"
+)
+TRANSFORMER_ERRORS = registry.counter(
+    "mapping_transformer_errors_total",
+    "Values a transformer failed on",
+    labelnames=("transformer",),
+)
+
+ENUM_UNKNOWNS = registry.counter(
+    "mapping_enum_unknown_values_total",
+    "Values missing from an enum mapping",
+    labelnames=("map_id", "field_id"),
+)
+
+# Counted by transformers as they run, so mapping pool workers send them back
+WORKER_COUNTERS = (TRANSFORMER_ERRORS, ENUM_UNKNOWNS)
+
+
+def record_mapping(map_id: int, elapsed: float) -> None:
+    MAPPED_RECORDS.inc(map_id=map_id)
+    MAPPING_LATENCY.observe(elapsed, map_id=map_id)
+
+
+def record_batch_mapping(map_id: int, records: int, elapsed: float) -> None:
+    MAPPED_RECORDS.inc(records, map_id=map_id)
+    MAPPING_BATCH_LATENCY.observe(elapsed, map_id=map_id)
+
+
+def drain_worker_counters() -> List[Dict[Tuple[str, ...], float]]:
+    return [counter.drain() for counter in WORKER_COUNTERS]
+
+
+def merge_worker_counters(values: List[Dict[Tuple[str, ...], float]]) -> None:
+    for counter, counter_values in zip(WORKER_COUNTERS, values):
+        counter.merge(counter_values)
+
+
+def collect_plan_cache() -> Iterable[Metric]:
+    stats = plan_cache.stats()
+    for name in ("hits", "misses", "evictions"):
+        counter = Counter(
+            f"mapping_plan_cache_{name}_total", f"Mapping plan cache {name}"
+        )
+        counter.inc(stats[name])
+        yield counter
+    size = Gauge("mapping_plan_cache_size", "Mapping plans cached")
+    size.set(stats["size"])
+    yield size
+
+
+def collect_transformer_memos() -> Iterable[Metric]:
+    gauges = {
+        name: Gauge(
+            f"mapping_transformer_memo_{name}",
+            documentation,
+            labelnames=("transformer",),
+        )
+        for name, documentation in (
+            ("hits", "Memoized transformer cache hits of the live plans"),
+            ("misses", "Memoized transformer cache misses of the live plans"),
+            ("size", "Results held by memoized transformers"),
+            ("bypassed", "Fields whose memoization was dropped for a low hit rate"),
+        )
+    }
+    totals = {}
+    for memo in get_memos():
+        stats = memo.stats()
+        stats["bypassed"] = int(stats["bypassed"])
+        transformer_totals = totals.setdefault(
+            memo.transformer_type, dict.fromkeys(gauges, 0)
+        )
+        for name in gauges:
+            transformer_totals[name] += stats[name]
+    for transformer, transformer_totals in totals.items():
+        for name, gauge in gauges.items():
+            gauge.set(transformer_totals[name], transformer=transformer)
+    return gauges.values()
+
+
+registry.register_collector(collect_plan_cache)
+registry.register_collector(collect_transformer_memos)
@@ -0,0 +1,29 @@
+# Generated by Django 4.1.4 on 2026-10-18 13:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mappers", "0006_model_category"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mapper",
+            name="spec",
+            field=models.JSONField(
+                blank=True,
+                help_text="Materialized field tree of the mapper, null when stale",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="mapper",
+            name="spec_version",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Incremented every time the spec goes stale"
+            ),
+        ),
+    ]
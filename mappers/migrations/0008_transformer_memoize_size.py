@@ -0,0 +1,39 @@
+# Generated by Django 4.1.4 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+def invalidate_specs(apps, schema_editor):
+    # Stored specs predate the memoize_size entry of their fields
+    Mapper = apps.get_model("mappers", "Mapper")
+    Mapper.objects.filter(spec__isnull=False).update(
+        spec=None, spec_version=models.F("spec_version") + 1
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mappers", "0007_mapper_spec"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transformer",
+            name="memoize_size",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Results cached per mapped field, 0 disables memoization",
+            ),
+        ),
+        migrations.AddField(
+            model_name="fieldmap",
+            name="memoize_size",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Overrides the transformer's memoize_size for this field",
+                null=True,
+            ),
+        ),
+        migrations.RunPython(invalidate_specs, migrations.RunPython.noop),
+    ]
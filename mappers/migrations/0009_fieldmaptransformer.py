@@ -0,0 +1,72 @@
+# Generated by Django 4.1.4 on 2026-10-18 15:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def invalidate_specs(apps, schema_editor):
+    # Stored specs list a single transformer per field rather than a chain
+    Mapper = apps.get_model("mappers", "Mapper")
+    Mapper.objects.filter(spec__isnull=False).update(
+        spec=None, spec_version=models.F("spec_version") + 1
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mappers", "0008_transformer_memoize_size"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FieldMapTransformer",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created", models.DateTimeField(default=django.utils.timezone.now)),
+                ("modified", models.DateTimeField(auto_now=True)),
+                (
+                    "position",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Order of the transformer within the chain"
+                    ),
+                ),
+                (
+                    "field_map",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chained_transformers",
+                        to="mappers.fieldmap",
+                    ),
+                ),
+                (
+                    "transformer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="mappers.transformer",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["position"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="fieldmaptransformer",
+            constraint=models.UniqueConstraint(
+                fields=("field_map", "position"),
+                name="mappers_fieldmaptransformer_unique_field_map_position",
+            ),
+        ),
+        migrations.RunPython(invalidate_specs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.1.4 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mappers", "0009_fieldmaptransformer"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transformer",
+            name="options",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Settings of the transformer type, e.g. date formats",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transformer",
+            name="type",
+            field=models.CharField(
+                choices=[
+                    ("UPPERCASE", "Uppercase"),
+                    ("LOWERCASE", "Lowercase"),
+                    ("CAPITALIZE", "Captalize"),
+                    ("STRING_TO_FLOAT", "String to Float"),
+                    ("STRING_TO_INTEGER", "String to Integer"),
+                    ("STRING_TO_BOOLEAN", "String to Boolean"),
+                    ("NUMBER_TO_STRING", "Number to String"),
+                    ("DATETIME_TO_EPOCH", "Date/time to Epoch"),
+                    ("EPOCH_TO_DATETIME", "Epoch to Date/time"),
+                    ("FORMAT_DATETIME", "Format Date/time"),
+                ],
+                help_text="Name of the transformer type",
+                max_length=64,
+            ),
+        ),
+    ]
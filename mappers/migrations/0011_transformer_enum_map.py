@@ -0,0 +1,34 @@
+# Generated by Django 4.1.4 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mappers", "0010_transformer_options"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="transformer",
+            name="type",
+            field=models.CharField(
+                choices=[
+                    ("UPPERCASE", "Uppercase"),
+                    ("LOWERCASE", "Lowercase"),
+                    ("CAPITALIZE", "Captalize"),
+                    ("STRING_TO_FLOAT", "String to Float"),
+                    ("STRING_TO_INTEGER", "String to Integer"),
+                    ("STRING_TO_BOOLEAN", "String to Boolean"),
+                    ("NUMBER_TO_STRING", "Number to String"),
+                    ("DATETIME_TO_EPOCH", "Date/time to Epoch"),
+                    ("EPOCH_TO_DATETIME", "Epoch to Date/time"),
+                    ("FORMAT_DATETIME", "Format Date/time"),
+                    ("ENUM_MAP", "Enum Map"),
+                ],
+                help_text="Name of the transformer type",
+                max_length=64,
+            ),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -25,6 +26,14 @@ class Mapper(TimestampedModel):
     target_model = models.ForeignKey(
         "Model", on_delete=models.CASCADE, related_name="+", null=False
     )
+    spec = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Materialized field tree of the mapper, null when stale",
+    )
+    spec_version = models.PositiveIntegerField(
+        default=0, help_text="Incremented every time the spec goes stale"
+    )
 
     class Meta:
         constraints = [
@@ -42,6 +51,10 @@ class TransformerTypeChoices(models.TextChoices):
     STRING_TO_INTEGER = "STRING_TO_INTEGER", _("String to Integer")
     STRING_TO_BOOLEAN = "STRING_TO_BOOLEAN", _("String to Boolean")
     NUMBER_TO_STRING = "NUMBER_TO_STRING", _("Number to String")
+    DATETIME_TO_EPOCH = "DATETIME_TO_EPOCH", _("Date/time to Epoch")
+    EPOCH_TO_DATETIME = "EPOCH_TO_DATETIME", _("Epoch to Date/time")
+    FORMAT_DATETIME = "FORMAT_DATETIME", _("Format Date/time")
+    ENUM_MAP = "ENUM_MAP", _("Enum Map")
 
 
 class Transformer(TimestampedModel):
@@ -51,10 +64,33 @@ class Transformer(TimestampedModel):
         null=False,
         help_text="Name of the transformer type",
     )
+    memoize_size = models.PositiveIntegerField(
+        default=0,
+        help_text="Results cached per mapped field, 0 disables memoization",
+    )
+    options = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Settings of the transformer type, e.g. date formats",
+    )
 
     def __str__(self) -> str:
         return f"{self.__class__.__name__}(type: {self.type})"
 
+    def clean(self):
+        """Rejects options the transformer type can't be configured with,
+        which would otherwise only fail when a mapping plan is built"""
+        from mappers.services.transformer_factory import TransformerFactory
+
+        if self.type not in TransformerTypeChoices.values:
+            return
+        if not isinstance(self.options, dict):
+            raise ValidationError({"options": "Options must be a JSON object"})
+        try:
+            TransformerFactory().get_transformer_by_type(self.type, self.options)
+        except ValueError as e:
+            raise ValidationError({"options": str(e)})
+
 
 class FieldTypeChoices(models.TextChoices):
     OBJECT = "OBJECT", _("Object")
@@ -157,6 +193,11 @@ class FieldMap(TimestampedModel):
     transformer = models.ForeignKey(
         "Transformer", on_delete=models.CASCADE, related_name="+", null=True, blank=True
     )
+    memoize_size = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Overrides the transformer's memoize_size for this field",
+    )
 
     class Meta:
         constraints = [
@@ -165,3 +206,33 @@ class FieldMap(TimestampedModel):
                 name="%(app_label)s_%(class)s_unique_source_mapper_target",
             )
         ]
+
+
+class FieldMapTransformer(TimestampedModel):
+    """Transformer applied after the FieldMap's own `transformer`, chained
+    in `position` order"""
+
+    field_map = models.ForeignKey(
+        "FieldMap", on_delete=models.CASCADE, related_name="chained_transformers"
+    )
+    transformer = models.ForeignKey(
+        "Transformer", on_delete=models.CASCADE, related_name="+"
+    )
+    position = models.PositiveIntegerField(
+        default=0, help_text="Order of the transformer within the chain"
+    )
+
+    class Meta:
+        ordering = ["position"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["field_map", "position"],
+                name="%(app_label)s_%(class)s_unique_field_map_position",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(field_map: {self.field_map_id}, "
+            f"position: {self.position}, transformer: {self.transformer_id})"
+        )
@@ -32,3 +32,35 @@ class CreateModelFromPayload(serializers.Serializer):
 
     class Meta:
         fields = ("json", "model_name", "endpoint_id")
+
+
+class CreateModelFromStream(serializers.Serializer):
+    model_name = serializers.CharField()
+    endpoint_id = serializers.IntegerField()
+
+    class Meta:
+        fields = ("model_name", "endpoint_id")
+
+
+class MapNDJSONSerializer(serializers.Serializer):
+    map_id = serializers.IntegerField()
+    source_model_id = serializers.IntegerField()
+
+    class Meta:
+        fields = ("map_id", "source_model_id")
+
+
+class TraceQuerySerializer(serializers.Serializer):
+    map_id = serializers.IntegerField(required=False)
+
+    class Meta:
+        fields = ("map_id",)
+
+
+class TraceMappingSerializer(serializers.Serializer):
+    json = serializers.DictField()
+    map_id = serializers.IntegerField()
+    source_model_id = serializers.IntegerField()
+
+    class Meta:
+        fields = ("json", "map_id", "source_model_id")
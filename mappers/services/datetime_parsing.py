@@ -0,0 +1,125 @@
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Callable, Optional
+
+# Directives the compiled parser handles itself, anything else goes through
+# `datetime.strptime`. The patterns are the bounded alternations strptime uses,
+# so a value splits into the same fields, e.g. "930" for "%H%M" is 09:30.
+_DIRECTIVE_PATTERNS = {
+    "Y": r"(?P<Y>\d\d\d\d)",
+    "m": r"(?P<m>1[0-2]|0[1-9]|[1-9])",
+    "d": r"(?P<d>3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9])",
+    "H": r"(?P<H>2[0-3]|[0-1]\d|\d)",
+    "M": r"(?P<M>[0-5]\d|\d)",
+    "S": r"(?P<S>6[0-1]|[0-5]\d|\d)",
+    "f": r"(?P<f>[0-9]{1,6})",
+    "z": r"(?P<z>[Zz]|[+-]\d\d:?[0-5]\d)",
+    "%": "%",
+}
+_DIRECTIVE = re.compile(r"%(.)")
+
+
+def parse_iso(value: str) -> datetime:
+    """ISO 8601 parser, `fromisoformat` only accepts a "Z" suffix from 3.11"""
+    if value[-1:] in ("Z", "z"):
+        value = value[:-1] + "+00:00"
+    return datetime.fromisoformat(value)
+
+
+def format_iso(value: datetime) -> str:
+    """ISO 8601 formatter writing UTC as "Z", the way payloads usually do"""
+    if value.utcoffset() == timedelta(0):
+        return value.replace(tzinfo=None).isoformat() + "Z"
+    return value.isoformat()
+
+
+def _parse_offset(offset: str) -> timezone:
+    if offset in ("Z", "z"):
+        return timezone.utc
+    sign = -1 if offset[0] == "-" else 1
+    offset = offset[1:].replace(":", "")
+    return timezone(sign * timedelta(hours=int(offset[:2]), minutes=int(offset[2:])))
+
+
+def _compile_pattern(format: str) -> Optional["re.Pattern"]:
+    parts = []
+    position = 0
+    for match in _DIRECTIVE.finditer(format):
+        pattern = _DIRECTIVE_PATTERNS.get(match.group(1))
+        if pattern is None:
+            return None
+        start = match.start()
+        parts.append(re.escape(format[position:start]))
+        parts.append(pattern)
+        position = match.end()
+    parts.append(re.escape(format[position:]))
+    try:
+        return re.compile("".join(parts))
+    except re.error:
+        # A repeated directive, leave it to strptime
+        return None
+
+
+@lru_cache(maxsize=128)
+def get_datetime_parser(format: Optional[str] = None) -> Callable[[str], datetime]:
+    """Returns a parser for `format`, ISO 8601 when None
+
+    Formats made of numeric directives (`%Y %m %d %H %M %S %f %z`) are
+    compiled once into a regular expression whose groups build the datetime
+    directly. That skips the locale handling, global lock and per call format
+    cache lookup `datetime.strptime` goes through, which other formats still
+    use. Values the expression rejects are handed to `datetime.strptime`, so
+    results and errors always match it. Parsers are cached per format.
+    """
+    if format is None:
+        return parse_iso
+
+    pattern = _compile_pattern(format)
+    if pattern is None:
+
+        def parse_with_strptime(value: str) -> datetime:
+            return datetime.strptime(value, format)
+
+        return parse_with_strptime
+
+    match_pattern = pattern.match
+
+    def parse(value: str) -> datetime:
+        # Like strptime, take the first match rather than backtracking into
+        # another split of the value
+        match = match_pattern(value)
+        if match is None or match.end() != len(value):
+            return datetime.strptime(value, format)
+        groups = match.groupdict()
+        fraction = groups.get("f")
+        offset = groups.get("z")
+        try:
+            return datetime(
+                int(groups.get("Y") or 1900),
+                int(groups.get("m") or 1),
+                int(groups.get("d") or 1),
+                int(groups.get("H") or 0),
+                int(groups.get("M") or 0),
+                int(groups.get("S") or 0),
+                int(fraction.ljust(6, "0")) if fraction else 0,
+                _parse_offset(offset) if offset else None,
+            )
+        except ValueError:
+            return datetime.strptime(value, format)
+
+    return parse
+
+
+@lru_cache(maxsize=128)
+def get_datetime_formatter(
+    format: Optional[str] = None,
+) -> Callable[[datetime], str]:
+    """Returns a formatter for `format`, ISO 8601 when None"""
+    if format is None:
+        return format_iso
+
+    def format_datetime(value: datetime) -> str:
+        return value.strftime(format)
+
+    return format_datetime
@@ -1,26 +1,34 @@
 import logging
+import time
 from abc import ABC, abstractmethod
-from typing import Any, TypeVar
+from typing import Any, Union
 
 from mappers.constants import FIELD_TYPE_TO_JSON_TYPE
 from mappers.exceptions import InvalidType
-from mappers.models import Field, FieldTypeChoices
+from mappers.metrics import TRANSFORMER_ERRORS
+from mappers.models import FieldTypeChoices
 from mappers.services.map_service import MapService
-from mappers.services.model_field_service import ModelFieldService
-
-T = TypeVar("T", bound="JSONMapper")
+from mappers.services.mapping_plan import FieldPlan, MappingPlan
+from mappers.services.type_inference import (
+    get_sample_size,
+    merge_json_type_definitions,
+    sample_list_items,
+)
+from mappers.tracing import MODEL, TRANSFORMER, Tracer, get_tracer
+
+PRIMITIVE_TYPES = (
+    FieldTypeChoices.STRING,
+    FieldTypeChoices.NUMBER,
+    FieldTypeChoices.BOOLEAN,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class JSONMapper(ABC):
-    def __init__(self, model_field_service: ModelFieldService, map_service: MapService):
-        self.model_field_service = model_field_service
-        self.map_service = map_service
-        self._source_field_id = None
-        self._source_model_id = None
-        self._source_field = None
-        self._map_id = None
+    """Maps values of one field type. Mappers hold no state: everything they
+    need is passed in, so a single shared instance per type is used, see
+    `JSONMapperFactory.MAPPER_MAP`."""
 
     @property
     @abstractmethod
@@ -28,96 +36,82 @@ class JSONMapper(ABC):
         pass
 
     @abstractmethod
-    def map_to_target(self, source_value):
+    def map_to_target(self, source_value, plan: Union[MappingPlan, FieldPlan]):
         pass
 
     @abstractmethod
     def map_to_json_type_definition(self, dto):
         pass
 
-    @property
-    def source_field_id(self) -> int:
-        return self._source_field_id
-
-    @property
-    def source_model_id(self) -> int:
-        return self._source_model_id
-
-    @property
-    def source_field(self) -> Field:
-        result = self._source_field
-        if not result:
-            result = self.model_field_service.get_field_by_id(self.source_field_id)
-        return result
-
-    @property
-    def map_id(self) -> int:
-        return self._map_id
-
-    def set_source_model_id(self: T, id: int) -> T:
-        self._source_model_id = id
-        return self
-
-    def set_source_field_id(self: T, id: int) -> T:
-        self._source_field_id = id
-        return self
-
-    def set_map_id(self: T, id: int) -> T:
-        self._map_id = id
-        return self
+    def map_field(self, source_value, field_plan: FieldPlan):
+        """Maps the value of a source field described by `field_plan`"""
+        return self.map_to_target(source_value, field_plan)
 
-    def get_json_type(self: T) -> str:
+    def get_json_type(self) -> str:
         return FIELD_TYPE_TO_JSON_TYPE[self.type].value
 
 
 class ObjectMapper(JSONMapper):
     type = FieldTypeChoices.OBJECT
 
-    def map_to_target(self, source_value: dict) -> dict:
+    def map_to_target(self, source_value: dict, plan: MappingPlan) -> dict:
         """Maps a source data dict into the target model dict \
             This will be the usual entry point to recursively build \
             a complete target dto as we get a new mapper and call \
-            `map_to_target` on each property of `source_value`
+            `map_field` on each property of `source_value`
 
         Args:
             source_value (dict): Source dict to be mapped into target dto
+            plan (MappingPlan): Compiled plan of the source model
 
         Returns:
             dict: target model dto
         """
 
+        tracer = get_tracer()
+        if tracer.enabled:
+            return self._map_to_target_traced(source_value, plan, tracer)
+
+        mappers = JSONMapperFactory.MAPPER_MAP
         result = {}
-        source_fields = self.model_field_service.get_fields_by_model_id(
-            self.source_model_id
-        )
-
-        for source_field in source_fields:
-            field_mapper = JSONMapperFactory(
-                model_field_service=self.model_field_service,
-                map_service=self.map_service,
-            ).get_mapper_by_type(source_field.get_type())
-
-            field_mapper.set_source_field_id(source_field.id).set_source_model_id(
-                source_field.object_model_id
-            ).set_map_id(self.map_id)
-
-            target_field = self.map_service.get_target_field(
-                source_field=source_field, map_id=self.map_id
-            )
-            result[target_field.name] = field_mapper.map_to_target(
-                source_value[source_field.name]
+        for field_plan in plan.fields:
+            result[field_plan.target_name] = mappers[field_plan.type].map_field(
+                source_value[field_plan.source_name], field_plan
             )
 
         return result
 
+    def _map_to_target_traced(
+        self, source_value: dict, plan: MappingPlan, tracer: Tracer
+    ) -> dict:
+        mappers = JSONMapperFactory.MAPPER_MAP
+        start = time.perf_counter()
+        result = {}
+        for field_plan in plan.fields:
+            field_start = tracer.enter_field(field_plan.source_name)
+            try:
+                result[field_plan.target_name] = mappers[field_plan.type].map_field(
+                    source_value[field_plan.source_name], field_plan
+                )
+            finally:
+                elapsed = tracer.exit_field(plan.map_id, field_start)
+            if field_plan.transformer_type and not field_plan.object_plan:
+                # Primitive fields and lists are all transformer time
+                tracer.add(
+                    plan.map_id, TRANSFORMER, field_plan.transformer_type, elapsed
+                )
+
+        tracer.add(plan.map_id, MODEL, str(plan.model_id), time.perf_counter() - start)
+        return result
+
+    def map_field(self, source_value: dict, field_plan: FieldPlan) -> dict:
+        return self.map_to_target(source_value, field_plan.object_plan)
+
     def map_to_json_type_definition(self, dto):
         result = {"type": self.get_json_type(), "properties": {}}
 
         for k, v in dto.items():
-            field_mapper = JSONMapperFactory(
-                model_field_service=self.model_field_service,
-                map_service=self.map_service,
-            ).get_mapper_by_value(v)
+            field_mapper = JSONMapperFactory.get_mapper_by_value(v)
             result["properties"][k] = field_mapper.map_to_json_type_definition(v)
 
         return result
@@ -126,44 +120,53 @@ class ObjectMapper(JSONMapper):
 class ListMapper(JSONMapper):
     type = FieldTypeChoices.LIST
 
-    def map_to_target(self, source_value):
-        result = []
-        source_field = self.model_field_service.get_field_by_id(self.source_field_id)
-
-        field_mapper = JSONMapperFactory(
-            model_field_service=self.model_field_service, map_service=self.map_service
-        ).get_mapper_by_type(source_field.get_list_item_type())
+    def map_to_target(self, source_value, plan: FieldPlan):
+        if plan.list_item_type in PRIMITIVE_TYPES:
+            # Lists of primitives are transformed as a single column
+            if plan.transform_batch:
+                try:
+                    return plan.transform_batch(source_value)
+                except Exception:
+                    TRANSFORMER_ERRORS.inc(transformer=plan.transformer_type)
+                    raise
+            return list(source_value)
 
-        field_mapper.set_source_model_id(
-            source_field.object_model_id
-        ).set_source_field_id(source_field.id).set_map_id(self.map_id)
-
-        for value in source_value:
-            result.append(field_mapper.map_to_target(value))
-
-        return result
+        item_mapper = JSONMapperFactory.get_mapper_by_type(plan.list_item_type)
+        return [item_mapper.map_field(value, plan) for value in source_value]
 
     def map_to_json_type_definition(self, dto):
         result = {
             "type": self.get_json_type(),
         }
 
-        item = next(iter(dto), None)
-        field_mapper = JSONMapperFactory(
-            model_field_service=self.model_field_service, map_service=self.map_service
-        ).get_mapper_by_value(item)
-        result["items"] = field_mapper.map_to_json_type_definition(item)
+        # The items' types are merged from a bounded sample, so optional keys
+        # of later items are found in constant time, whatever the list size
+        items = sample_list_items(dto, get_sample_size())
+        item = next(iter(items), None)
+        field_mapper = JSONMapperFactory.get_mapper_by_value(item)
+        definitions = [field_mapper.map_to_json_type_definition(item)]
+        for item in items[1:]:
+            try:
+                field_mapper = JSONMapperFactory.get_mapper_by_value(item)
+                definitions.append(field_mapper.map_to_json_type_definition(item))
+            except InvalidType:
+                # Values that cannot be typed only drop the sample they are in
+                continue
+        result["items"] = merge_json_type_definitions(definitions)
 
         return result
 
 
 class PrimitiveMapper(JSONMapper):
-    def map_to_target(self, source_value):
-        return self.map_service.transform(
-            source_field=self.source_field,
-            map_id=self.map_id,
-            source_value=source_value,
-        )
+    def map_to_target(self, source_value, plan: FieldPlan):
+        transform = plan.transform
+        if transform is None:
+            return source_value
+        try:
+            return transform(source_value)
+        except Exception:
+            TRANSFORMER_ERRORS.inc(transformer=plan.transformer_type)
+            raise
 
     def map_to_json_type_definition(self, dto):
         return {"type": self.get_json_type()}
@@ -182,63 +185,45 @@ class BooleanMapper(PrimitiveMapper):
 
 
 class JSONMapperFactory:
-    def __init__(
-        self,
-        map_service: MapService,
-        model_field_service: ModelFieldService = None,
-    ):
-        self.field_types = FieldTypeChoices
-        self._model_field_service = model_field_service
+
+    MAPPER_MAP = {
+        FieldTypeChoices.OBJECT: ObjectMapper(),
+        FieldTypeChoices.LIST: ListMapper(),
+        FieldTypeChoices.NUMBER: NumberMapper(),
+        FieldTypeChoices.STRING: StringMapper(),
+        FieldTypeChoices.BOOLEAN: BooleanMapper(),
+    }
+
+    # Exact value types only, so that `bool` is not mistaken for a number
+    VALUE_TYPE_MAP = {
+        str: FieldTypeChoices.STRING,
+        int: FieldTypeChoices.NUMBER,
+        float: FieldTypeChoices.NUMBER,
+        list: FieldTypeChoices.LIST,
+        dict: FieldTypeChoices.OBJECT,
+        bool: FieldTypeChoices.BOOLEAN,
+    }
+
+    def __init__(self, map_service: MapService):
         self.map_service = map_service
 
-    @property
-    def model_field_service(self):
-        return self._model_field_service
-
-    def set_model_field_service(self, model_field_service: ModelFieldService):
-        self._model_field_service = model_field_service
-
-    def _get_type(self, value):
-        if type(value) is str:
-            return self.field_types.STRING
-        elif type(value) in [int, float]:
-            return self.field_types.NUMBER
-        elif type(value) is list:
-            return self.field_types.LIST
-        elif type(value) is dict:
-            return self.field_types.OBJECT
-        elif type(value) is bool:
-            return self.field_types.BOOLEAN
-        else:
-            return self.field_types.UNKNOWN
-
-    def get_mapper_by_type(self, type: FieldTypeChoices):
-        if type is self.field_types.OBJECT:
-            return ObjectMapper(self.model_field_service, self.map_service)
-        elif type is self.field_types.LIST:
-            return ListMapper(self.model_field_service, self.map_service)
-        elif type is self.field_types.NUMBER:
-            return NumberMapper(self.model_field_service, self.map_service)
-        elif type is self.field_types.STRING:
-            return StringMapper(self.model_field_service, self.map_service)
-        elif type is self.field_types.BOOLEAN:
-            return BooleanMapper(self.model_field_service, self.map_service)
-        else:
+    @classmethod
+    def _get_type(cls, value) -> FieldTypeChoices:
+        return cls.VALUE_TYPE_MAP.get(type(value), FieldTypeChoices.UNKNOWN)
+
+    @classmethod
+    def get_mapper_by_type(cls, type: FieldTypeChoices) -> JSONMapper:
+        mapper = cls.MAPPER_MAP.get(type)
+        if mapper is None:
             raise InvalidType(msg=f"Unprocessable field type: {type}")
+        return mapper
 
-    def get_mapper_by_value(self, value: Any):
-        type = self._get_type(value)
-        if type is self.field_types.OBJECT:
-            return ObjectMapper(self.model_field_service, self.map_service)
-        elif type is self.field_types.LIST:
-            return ListMapper(self.model_field_service, self.map_service)
-        elif type is self.field_types.NUMBER:
-            return NumberMapper(self.model_field_service, self.map_service)
-        elif type is self.field_types.STRING:
-            return StringMapper(self.model_field_service, self.map_service)
-        elif type is self.field_types.BOOLEAN:
-            return BooleanMapper(self.model_field_service, self.map_service)
-        else:
+    @classmethod
+    def get_mapper_by_value(cls, value: Any) -> JSONMapper:
+        type = cls._get_type(value)
+        mapper = cls.MAPPER_MAP.get(type)
+        if mapper is None:
             raise InvalidType(
                 msg=f"Unprocessable value of type: {type}, value: {value}"
             )
+        return mapper
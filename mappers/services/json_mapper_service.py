@@ -1,9 +1,67 @@
+import logging
+import time
+from functools import partial
+from typing import IO, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
 from django.db import transaction
 
-from mappers.constants import JSON_TYPE_TO_FIELD_TYPE, JSONType
+from mappers import metrics
+from mappers.constants import JSON_TYPE_TO_FIELD_TYPE, JSONType, MappingEngine
+from mappers.exceptions import InvalidPatch, InvalidType
 from mappers.models import Field, FieldTypeChoices, Model
+from mappers.services import json_patch
 from mappers.services.json_mapper_factory import JSONMapperFactory
+from mappers.services.json_stream import JSONTokenizer
+from mappers.services.mapping_plan import FieldPlan, MappingPlan
+from mappers.services.mapping_plan_service import MappingPlanService
+from mappers.services.mapping_pool import MappingProcessPool, get_process_pool
 from mappers.services.model_field_service import ModelFieldService
+from mappers.services.plan_compiler import PlanCompiler
+from mappers.services.type_inference import build_json_type_definition
+from mappers.tracing import get_tracer, should_trace, tracing
+
+logger = logging.getLogger(__name__)
+
+
+def get_mapping_function(
+    plan: MappingPlan, engine: MappingEngine, plan_compiler: PlanCompiler
+) -> Callable[[dict], dict]:
+    """Returns a function mapping a source dto with `plan` using `engine` \
+        Only the interpreted engine is instrumented, so it is used whenever \
+        the mapping is traced: inside a `tracing` context, or for the \
+        `MAPPING_TRACE_SAMPLE_RATE` share of calls that get sampled.
+
+    Args:
+        plan (MappingPlan): Compiled plan for the dtos' source model
+        engine (MappingEngine): Engine to map with
+        plan_compiler (PlanCompiler): Compiler used by the compiled engine
+
+    Returns:
+        Callable[[dict], dict]: Maps a source dto to its target dto
+    """
+    field_mapper = JSONMapperFactory.get_mapper_by_type(FieldTypeChoices.OBJECT)
+    interpreted = partial(field_mapper.map_to_target, plan=plan)
+    if get_tracer().enabled:
+        return interpreted
+    if should_trace():
+
+        def map_dto_traced(source_dto: dict) -> dict:
+            with tracing():
+                return interpreted(source_dto)
+
+        return map_dto_traced
+    if engine is not MappingEngine.COMPILED:
+        return interpreted
+
+    try:
+        return plan_compiler.get_function(plan)
+    except Exception:
+        # Errors of a mapped dto are raised as they are, since replaying it
+        # would run its transformers twice, but a plan that does not compile
+        # is still mapped by the reference implementation
+        logger.exception("Could not compile the plan of map %s", plan.map_id)
+        return interpreted
 
 
 class JSONMapperService:
@@ -11,10 +69,24 @@ class JSONMapperService:
         self,
         json_mapper_factory: JSONMapperFactory,
         model_field_service: ModelFieldService,
+        mapping_plan_service: MappingPlanService = None,
+        engine: MappingEngine = None,
+        plan_compiler: PlanCompiler = None,
+        process_pool: MappingProcessPool = None,
     ):
         self.json_mapper_factory = json_mapper_factory
-        self.json_mapper_factory.set_model_field_service(model_field_service)
         self.model_field_service = model_field_service
+        self.mapping_plan_service = mapping_plan_service or MappingPlanService(
+            map_service=json_mapper_factory.map_service,
+            model_field_service=model_field_service,
+        )
+        self.engine = engine or MappingEngine(
+            getattr(settings, "MAPPING_ENGINE", MappingEngine.INTERPRETED.value)
+        )
+        self.plan_compiler = plan_compiler or PlanCompiler()
+        pool_config = getattr(settings, "MAPPING_PROCESS_POOL", {})
+        self.process_pool = process_pool or get_process_pool(pool_config)
+        self.process_pool_min_batch_size = pool_config.get("MIN_BATCH_SIZE", 2000)
 
     def map_to_target_dto(
         self, source_dto: dict, source_model_id: int, map_id: int
@@ -24,14 +96,223 @@ class JSONMapperService:
         Args:
             source_dto (dict): Source dto payload
             source_model_id (str): Known model_id for this dto
+            map_id (int): Mapper to map the dto with
 
         Returns:
             dict: Target dto representation
         """
-        field_mapper = self.json_mapper_factory.get_mapper_by_value(source_dto)
-        field_mapper.set_map_id(map_id)
-        field_mapper.set_source_model_id(source_model_id)
-        return field_mapper.map_to_target(source_value=source_dto)
+        plan = self.get_mapping_plan(source_model_id=source_model_id, map_id=map_id)
+        return self.map_to_target_dto_with_plan(source_dto=source_dto, plan=plan)
+
+    def map_many_to_target_dtos(
+        self, source_dtos: Iterable[dict], source_model_id: int, map_id: int
+    ) -> List[dict]:
+        """Maps a batch of known remote dtos of the same source model \
+            The plan lookup and mapper construction are paid once per batch, \
+            see `map_many_to_target_dtos_with_plan`.
+
+        Args:
+            source_dtos (Iterable[dict]): Source dto payloads
+            source_model_id (int): Known model_id for these dtos
+            map_id (int): Mapper to map the dtos with
+
+        Returns:
+            List[dict]: Target dto representations, in input order
+        """
+        plan = self.get_mapping_plan(source_model_id=source_model_id, map_id=map_id)
+        return self.map_many_to_target_dtos_with_plan(
+            source_dtos=source_dtos, plan=plan
+        )
+
+    def map_many_to_target_dtos_with_plan(
+        self, source_dtos: Iterable[dict], plan: MappingPlan
+    ) -> List[dict]:
+        """Maps a batch of dtos against an already compiled plan, without any \
+            DB access. Batches of at least `MIN_BATCH_SIZE` dtos are spread \
+            over the process pool when one is configured.
+
+        Args:
+            source_dtos (Iterable[dict]): Source dto payloads
+            plan (MappingPlan): Compiled plan for the dtos' source model
+
+        Returns:
+            List[dict]: Target dto representations, in input order
+        """
+        source_dtos = list(source_dtos)
+        start = time.perf_counter()
+        if (
+            self.process_pool is not None
+            and len(source_dtos) >= self.process_pool_min_batch_size
+        ):
+            target_dtos = self.process_pool.map(plan, source_dtos, engine=self.engine)
+        else:
+            map_dto = self.get_mapping_function(plan)
+            target_dtos = [map_dto(dto) for dto in source_dtos]
+        metrics.record_batch_mapping(
+            plan.map_id, len(target_dtos), time.perf_counter() - start
+        )
+        return target_dtos
+
+    def map_patch_to_target(
+        self,
+        previous_source_dto: dict,
+        previous_target_dto: dict,
+        patch: List[dict],
+        source_model_id: int,
+        map_id: int,
+    ) -> Tuple[dict, List[dict]]:
+        """Applies a JSON Patch to a source dto and remaps only the fields it \
+            touched, instead of the whole dto
+
+        Args:
+            previous_source_dto (dict): Source dto the patch applies to
+            previous_target_dto (dict): Target dto mapped from \
+                `previous_source_dto` with this mapper
+            patch (List[dict]): RFC 6902 operations on the source dto
+            source_model_id (int): Known model_id for the dto
+            map_id (int): Mapper to map the dto with
+
+        Raises:
+            InvalidPatch: If the patch does not apply to `previous_source_dto`
+
+        Returns:
+            Tuple[dict, List[dict]]: New target dto, and the patch turning \
+                `previous_target_dto` into it
+        """
+        plan = self.get_mapping_plan(source_model_id=source_model_id, map_id=map_id)
+        source_dto = json_patch.apply_patch(previous_source_dto, patch)
+        start = time.perf_counter()
+
+        paths = []
+        for operation in patch:
+            if operation["op"] == "test":
+                continue
+            paths.append(json_patch.parse_pointer(operation["path"]))
+            if operation["op"] == "move":
+                paths.append(json_patch.parse_pointer(operation["from"]))
+
+        units: Dict[tuple, Tuple[List[str], Optional[FieldPlan]]] = {}
+        for path in paths:
+            unit = self._get_remap_unit(plan, path)
+            if unit is not None:
+                units[tuple(unit[0])] = unit[1:]
+
+        if () in units:
+            target_dto = self.map_to_target_dto_with_plan(source_dto, plan)
+            return target_dto, [{"op": "replace", "path": "", "value": target_dto}]
+
+        target_patch = []
+        remapped: List[tuple] = []
+        for source_path in sorted(units, key=len):
+            if any(source_path[: len(parent)] == parent for parent in remapped):
+                continue
+            remapped.append(source_path)
+            target_path, field_plan = units[source_path]
+            try:
+                source_value = json_patch.resolve(source_dto, source_path)
+            except InvalidPatch:
+                # The full mapping would fail on the same missing field
+                raise KeyError(source_path[-1])
+            value = self.json_mapper_factory.get_mapper_by_type(
+                field_plan.type
+            ).map_field(source_value, field_plan)
+            pointer = json_patch.format_pointer(target_path)
+            try:
+                unchanged = (
+                    json_patch.resolve(previous_target_dto, target_path) == value
+                )
+            except InvalidPatch:
+                unchanged = False
+            if not unchanged:
+                target_patch.append({"op": "replace", "path": pointer, "value": value})
+
+        target_dto = json_patch.apply_patch(previous_target_dto, target_patch)
+        metrics.record_mapping(map_id, time.perf_counter() - start)
+        return target_dto, target_patch
+
+    def _get_remap_unit(
+        self, plan: MappingPlan, path: List[str]
+    ) -> Optional[Tuple[List[str], List[str], Optional[FieldPlan]]]:
+        """Finds the smallest source subtree to remap for a change at `path` \
+            Returns its source path, target path and field plan, an empty \
+            source path when the whole dto must be remapped, or None when the \
+            path is not mapped at all.
+        """
+        source_path: List[str] = []
+        target_path: List[str] = []
+        index = 0
+        while index < len(path):
+            token = path[index]
+            field_plan = next(
+                (field for field in plan.fields if field.source_name == token), None
+            )
+            if field_plan is None:
+                # Unmapped source keys never reach the target
+                return None
+            source_path.append(token)
+            target_path.append(field_plan.target_name)
+
+            remaining = len(path) - index - 1
+            if field_plan.type is FieldTypeChoices.OBJECT and remaining:
+                plan = field_plan.object_plan
+                index += 1
+            elif (
+                field_plan.type is FieldTypeChoices.LIST
+                and field_plan.list_item_type is FieldTypeChoices.OBJECT
+                and remaining > 1
+            ):
+                # Changes inside one item only remap that item. Adding or
+                # removing items remaps the whole list.
+                item = path[index + 1]
+                if not item.isdigit():
+                    return source_path, target_path, field_plan
+                source_path.append(item)
+                target_path.append(item)
+                plan = field_plan.object_plan
+                index += 2
+            else:
+                return source_path, target_path, field_plan
+        return [], [], None
+
+    def get_mapping_plan(self, source_model_id: int, map_id: int) -> MappingPlan:
+        return self.mapping_plan_service.get_plan(
+            map_id=map_id, source_model_id=source_model_id
+        )
+
+    def get_cached_mapping_plan(
+        self, source_model_id: int, map_id: int
+    ) -> Optional[MappingPlan]:
+        """Returns the plan if it is cached and can be served without any DB \
+            access, see `MappingPlanCache.peek`
+        """
+        return self.mapping_plan_service.cache.peek(map_id, source_model_id)
+
+    def map_to_target_dto_with_plan(self, source_dto: dict, plan: MappingPlan) -> dict:
+        """Maps a dto against an already compiled plan, without any DB access
+
+        Args:
+            source_dto (dict): Source dto payload
+            plan (MappingPlan): Compiled plan for the dto's source model
+
+        Returns:
+            dict: Target dto representation
+        """
+        start = time.perf_counter()
+        target_dto = self.get_mapping_function(plan)(source_dto)
+        metrics.record_mapping(plan.map_id, time.perf_counter() - start)
+        return target_dto
+
+    def get_mapping_function(self, plan: MappingPlan) -> Callable[[dict], dict]:
+        """Returns a function mapping a source dto with `plan` using the \
+            configured engine
+
+        Args:
+            plan (MappingPlan): Compiled plan for the dtos' source model
+
+        Returns:
+            Callable[[dict], dict]: Maps a source dto to its target dto
+        """
+        return get_mapping_function(plan, self.engine, self.plan_compiler)
 
     def map_to_json_types(self, json_dto: dict) -> dict:
         """Maps an example model to its type structure, similar to JSON Schema
@@ -42,14 +323,44 @@ class JSONMapperService:
         Returns:
             dict: Dictionary with field names and type data
         """
+        start = time.perf_counter()
         field_mapper = self.json_mapper_factory.get_mapper_by_value(json_dto)
-        return field_mapper.map_to_json_type_definition(dto=json_dto)
+        type_map = field_mapper.map_to_json_type_definition(dto=json_dto)
+        metrics.MODEL_INFERENCES.inc()
+        metrics.MODEL_INFERENCE_LATENCY.observe(time.perf_counter() - start)
+        return type_map
+
+    def map_stream_to_json_types(self, stream: IO) -> dict:
+        """Maps an example model read from a file-like object to its type \
+            structure, like `map_to_json_types` but without parsing the \
+            document into memory, see `build_json_type_definition`
+
+        Args:
+            stream (IO): JSON object, as bytes or text
+
+        Raises:
+            json.JSONDecodeError: The stream is not valid JSON
+            InvalidType: The document is not an object or holds a null or \
+                an empty list
+
+        Returns:
+            dict: Dictionary with field names and type data
+        """
+        start = time.perf_counter()
+        type_map = build_json_type_definition(JSONTokenizer(stream))
+        if type_map["type"] != JSONType.OBJECT.value:
+            raise InvalidType(msg="Expected a JSON object")
+        metrics.MODEL_INFERENCES.inc()
+        metrics.MODEL_INFERENCE_LATENCY.observe(time.perf_counter() - start)
+        return type_map
 
-    @transaction.atomic
     def create_models_and_fields_from_type_map(
         self, type_map: dict, model_name: str = "Root"
     ) -> Model:
-        """Creates models and fields from a type_map dictionary
+        """Creates models and fields from a type_map dictionary \
+            The whole type map is built and validated in memory first, then \
+            models and fields are bulk inserted level by level in a single \
+            transaction.
 
         Args:
             type_map (dict): Dictionary with field names and type data
@@ -59,77 +370,56 @@ class JSONMapperService:
         Returns:
             Model: Instance of a Model
         """
-        model = self.model_field_service.create_model(name=model_name)
-        for field_name, field_type_map in type_map["properties"].items():
-            field = self._create_field_from_type_map(
-                model.id,
-                field_name,
-                field_type_map,
-            )
-            field.model = model
-            field.save()
+        model, levels = self._build_models_and_fields(type_map, model_name)
+        with transaction.atomic(savepoint=False):
+            for models, _ in levels:
+                self.model_field_service.bulk_create_models(models)
+            for _, fields in levels:
+                self.model_field_service.bulk_create_fields(fields)
         return model
 
-    def _create_field_from_type_map(
-        self,
-        model_id,
-        field_name,
-        type_map,
-    ) -> Field:
+    def _build_models_and_fields(
+        self, type_map: dict, model_name: str
+    ) -> Tuple[Model, List[Tuple[List[Model], List[Field]]]]:
+        root = Model(name=model_name)
+        levels = []
+        pending = [(root, type_map)]
+        while pending:
+            models, fields, nested = [], [], []
+            for model, model_type_map in pending:
+                model.clean_fields(exclude=["category"])
+                models.append(model)
+                for field_name, field_type_map in model_type_map["properties"].items():
+                    field, object_model = self._build_field_from_type_map(
+                        model, field_name, field_type_map
+                    )
+                    fields.append(field)
+                    if object_model:
+                        nested.append(object_model)
+            levels.append((models, fields))
+            pending = nested
+        return root, levels
+
+    def _build_field_from_type_map(
+        self, model: Model, field_name: str, type_map: dict
+    ) -> Tuple[Field, Optional[Tuple[Model, dict]]]:
         type = self._get_field_type_from_json_type(JSONType(type_map["type"]))
-        field = self.model_field_service.create_field(
-            name=field_name, type=type, model_id=model_id
-        )
+        field = Field(model=model, name=field_name, type=type)
 
+        object_model = None
         if type is FieldTypeChoices.LIST:
-            field = self._update_array_field(
-                field_name,
-                type_map,
-                field.id,
+            field.list_item_type = self._get_field_type_from_json_type(
+                JSONType(type_map["items"]["type"])
             )
+            if field.list_item_type is FieldTypeChoices.OBJECT:
+                object_model = (Model(name=field_name + "_item"), type_map["items"])
         elif type is FieldTypeChoices.OBJECT:
-            field = self._update_object_field(
-                field_name,
-                type_map,
-                field.id,
-            )
+            object_model = (Model(name=field_name), type_map)
 
-        return field
-
-    def _update_object_field(
-        self,
-        model_name,
-        type_map,
-        field_id,
-    ) -> Field:
-        object_model = self.create_models_and_fields_from_type_map(
-            model_name=model_name, type_map=type_map
-        )
-        return self.model_field_service.update_field(
-            field_id=field_id, object_model_id=object_model.id
-        )
-
-    def _update_array_field(
-        self,
-        field_name,
-        type_map,
-        field_id,
-    ) -> Field:
-        item_type = self._get_field_type_from_json_type(
-            JSONType(type_map["items"]["type"])
-        )
-        field = self.model_field_service.update_field(
-            field_id=field_id, list_item_type=item_type
-        )
-
-        if item_type is FieldTypeChoices.OBJECT:
-            object_model_name = field_name + "_item"
-            field = self._update_object_field(
-                model_name=object_model_name,
-                type_map=type_map["items"],
-                field_id=field.id,
-            )
-        return field
+        if object_model:
+            field.object_model = object_model[0]
+        field.clean_fields(exclude=["model", "object_model"])
+        return field, object_model
 
     def _get_field_type_from_json_type(self, type: JSONType) -> FieldTypeChoices:
         return JSON_TYPE_TO_FIELD_TYPE[type]
@@ -0,0 +1,138 @@
+"""RFC 6902 JSON Patch with path copying
+
+Applying a patch never mutates the input document. Only the containers on
+the path of each operation are copied, every other subtree is shared with
+the input, so patching a small part of a large document is cheap.
+"""
+from typing import Any, List, Sequence, Union
+
+from mappers.exceptions import InvalidPatch
+
+Token = Union[str, int]
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """Splits an RFC 6901 JSON Pointer into its unescaped reference tokens"""
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise InvalidPatch(f"Invalid JSON Pointer: {pointer}")
+    return [
+        token.replace("~1", "/").replace("~0", "~") for token in pointer.split("/")[1:]
+    ]
+
+
+def format_pointer(tokens: Sequence[Token]) -> str:
+    return "".join(
+        "/" + str(token).replace("~", "~0").replace("/", "~1") for token in tokens
+    )
+
+
+def _get_index(container: list, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise InvalidPatch(f"Invalid array index: {token}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise InvalidPatch(f"Array index out of range: {token}")
+    return index
+
+
+def resolve(document: Any, tokens: Sequence[str]) -> Any:
+    value = document
+    for token in tokens:
+        if isinstance(value, dict):
+            if token not in value:
+                raise InvalidPatch(f"Path not found: {format_pointer(tokens)}")
+            value = value[token]
+        elif isinstance(value, list):
+            value = value[_get_index(value, token)]
+        else:
+            raise InvalidPatch(f"Path not found: {format_pointer(tokens)}")
+    return value
+
+
+def _copy_container(value: Any) -> Any:
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return list(value)
+    raise InvalidPatch("Cannot descend into a scalar value")
+
+
+def _update(document: Any, tokens: Sequence[str], op: str, value: Any = None) -> Any:
+    """Returns a copy of `document` with `op` ("add", "remove" or "replace")
+    applied at `tokens`, copying only the containers along the path"""
+    if not tokens:
+        if op == "remove":
+            raise InvalidPatch("Cannot remove the whole document")
+        return value
+
+    root = _copy_container(document)
+    parent = root
+    for token in tokens[:-1]:
+        if isinstance(parent, dict):
+            if token not in parent:
+                raise InvalidPatch(f"Path not found: {format_pointer(tokens)}")
+            child = _copy_container(parent[token])
+            parent[token] = child
+        else:
+            index = _get_index(parent, token)
+            child = _copy_container(parent[index])
+            parent[index] = child
+        parent = child
+
+    token = tokens[-1]
+    if isinstance(parent, dict):
+        if op != "add" and token not in parent:
+            raise InvalidPatch(f"Path not found: {format_pointer(tokens)}")
+        if op == "remove":
+            del parent[token]
+        else:
+            parent[token] = value
+    elif isinstance(parent, list):
+        index = _get_index(parent, token, allow_end=op == "add")
+        if op == "add":
+            parent.insert(index, value)
+        elif op == "remove":
+            del parent[index]
+        else:
+            parent[index] = value
+    else:
+        raise InvalidPatch(f"Path not found: {format_pointer(tokens)}")
+    return root
+
+
+def apply_patch(document: Any, patch: List[dict]) -> Any:
+    """Applies a JSON Patch, returning the new document
+
+    Raises:
+        InvalidPatch: If an operation is malformed, points at a missing path \
+            or a `test` operation fails
+    """
+    for operation in patch:
+        try:
+            op = operation["op"]
+            tokens = parse_pointer(operation["path"])
+            if op in ("add", "replace"):
+                document = _update(document, tokens, op, operation["value"])
+            elif op == "remove":
+                document = _update(document, tokens, op)
+            elif op in ("move", "copy"):
+                from_tokens = parse_pointer(operation["from"])
+                if op == "move" and tokens[: len(from_tokens)] == from_tokens:
+                    if tokens != from_tokens:
+                        raise InvalidPatch("Cannot move a value into itself")
+                value = resolve(document, from_tokens)
+                if op == "move":
+                    document = _update(document, from_tokens, "remove")
+                document = _update(document, tokens, "add", value)
+            elif op == "test":
+                if resolve(document, tokens) != operation["value"]:
+                    raise InvalidPatch(f"Test failed: {operation['path']}")
+            else:
+                raise InvalidPatch(f"Unknown operation: {op}")
+        except KeyError as e:
+            raise InvalidPatch(f"Operation is missing {e}")
+    return document
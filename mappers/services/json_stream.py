@@ -0,0 +1,232 @@
+import codecs
+import re
+from json import JSONDecodeError, JSONDecoder
+from json.decoder import scanstring
+from typing import IO, Any, Iterator, List, Tuple, Union
+
+NUMBER_RE = re.compile(r"-?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?")
+# Characters a number token may continue with
+NUMBER_CHARS_RE = re.compile(r"[-+.eE\d]*")
+_raw_decode = JSONDecoder().raw_decode
+WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+LITERALS = {
+    "true": ("boolean", True),
+    "false": ("boolean", False),
+    "null": ("null", None),
+}
+
+# What the tokenizer expects next
+VALUE, FIRST_VALUE, KEY, FIRST_KEY, COLON, COMMA = range(6)
+
+Event = Tuple[str, Any]
+
+
+class JSONTokenizer:
+    """Incremental JSON tokenizer over a file-like object
+
+    Reads `chunk_size` bytes (or characters) at a time and yields parse events
+    as soon as their tokens are complete, so memory is bounded by the nesting
+    depth and the largest single token rather than by the document. Events
+    are `(name, value)` pairs: `start_map`, `map_key`, `end_map`,
+    `start_array`, `end_array`, and `string`, `number`, `boolean` or `null`
+    for scalars. Malformed input raises `json.JSONDecodeError`, whose
+    position is relative to the buffered window.
+
+    Calling `skip` right after a `start_map` or `start_array` event jumps to
+    the end of that container without producing its events, including its
+    end event.
+    """
+
+    def __init__(self, stream: IO[Union[bytes, str]], chunk_size: int = 65536):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._skip = False
+
+    def skip(self) -> None:
+        """Skips the rest of the container whose start was just yielded"""
+        self._skip = True
+
+    def __iter__(self) -> Iterator[Event]:
+        containers: List[str] = []
+        expect = VALUE
+        while True:
+            char = self._next_char()
+            if char is None:
+                if containers or expect == VALUE:
+                    self._error(
+                        "Expecting value" if expect == VALUE else "Unexpected end"
+                    )
+                return
+            if expect not in (VALUE, FIRST_VALUE) and not containers:
+                self._error("Extra data")
+
+            if expect == COLON:
+                if char != ":":
+                    self._error("Expecting ':' delimiter")
+                self._pos += 1
+                expect = VALUE
+                continue
+
+            if expect == COMMA:
+                self._pos += 1
+                if char == ",":
+                    expect = KEY if containers[-1] == "map" else VALUE
+                elif char == ("}" if containers[-1] == "map" else "]"):
+                    yield (
+                        "end_map" if containers.pop() == "map" else "end_array"
+                    ), None
+                    expect = COMMA
+                else:
+                    self._pos -= 1
+                    self._error("Expecting ',' delimiter")
+                continue
+
+            if expect in (KEY, FIRST_KEY):
+                if char == "}" and expect == FIRST_KEY:
+                    self._pos += 1
+                    containers.pop()
+                    yield "end_map", None
+                    expect = COMMA
+                elif char == '"':
+                    yield "map_key", self._read_string()
+                    expect = COLON
+                else:
+                    self._error("Expecting property name enclosed in double quotes")
+                continue
+
+            # VALUE or FIRST_VALUE
+            if char == "]" and expect == FIRST_VALUE:
+                self._pos += 1
+                containers.pop()
+                yield "end_array", None
+                expect = COMMA
+            elif char == "{":
+                self._pos += 1
+                containers.append("map")
+                yield "start_map", None
+                expect = FIRST_KEY
+                if self._skip:
+                    self._skip_container()
+                    containers.pop()
+                    expect = COMMA
+            elif char == "[":
+                self._pos += 1
+                containers.append("array")
+                yield "start_array", None
+                expect = FIRST_VALUE
+                if self._skip:
+                    self._skip_container()
+                    containers.pop()
+                    expect = COMMA
+            elif char == '"':
+                yield "string", self._read_string()
+                expect = COMMA
+            else:
+                yield self._read_scalar(char)
+                expect = COMMA
+
+    def _skip_container(self) -> None:
+        # The C decoder parses a skipped container far faster than it can be
+        # tokenized, and the parsed value is dropped right away, so memory
+        # is still bounded by the largest skipped container
+        self._skip = False
+        self._pos -= 1
+        while True:
+            try:
+                _, self._pos = _raw_decode(self._buffer, self._pos)
+                return
+            except JSONDecodeError as e:
+                truncated = e.pos >= len(self._buffer) - 64 or e.msg.startswith(
+                    "Unterminated string"
+                )
+                if not truncated or self._eof:
+                    raise
+                self._fill_more()
+
+    def _next_char(self):
+        """Skips whitespace and returns the next character, None at the end"""
+        while True:
+            buffer = self._buffer
+            pos = self._pos = WHITESPACE_RE.match(buffer, self._pos).end()
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self._fill():
+                return None
+
+    def _fill(self, size: int = None) -> bool:
+        """Appends at least one chunk to the buffer, False at end of stream"""
+        if self._eof:
+            return False
+        data = self.stream.read(size or self.chunk_size)
+        if isinstance(data, bytes):
+            text = self._decoder.decode(data, final=not data)
+        else:
+            text = data
+        if not data:
+            self._eof = True
+        # Drop what was consumed so the buffer holds the current token only
+        pos, self._pos = self._pos, 0
+        self._buffer = self._buffer[pos:] + text
+        return bool(text) or not self._eof
+
+    def _fill_more(self) -> bool:
+        # Grow reads with the pending token, so a long token is rescanned a
+        # logarithmic number of times rather than once per chunk
+        return self._fill(max(self.chunk_size, len(self._buffer) - self._pos))
+
+    def _read_string(self) -> str:
+        while True:
+            try:
+                value, end = scanstring(self._buffer, self._pos + 1, True)
+            except JSONDecodeError as e:
+                truncated = e.msg.startswith("Unterminated") or (
+                    e.pos >= len(self._buffer) - 6
+                )
+                if not truncated or self._eof:
+                    raise
+                # Possibly cut at the end of the buffer, e.g. mid escape
+                self._fill_more()
+                continue
+            self._pos = end
+            return value
+
+    def _read_scalar(self, char: str) -> Event:
+        while True:
+            buffer, pos = self._buffer, self._pos
+            if char == "-" or char.isdigit():
+                # The token may go on in the next chunk unless it is followed
+                # by something else already
+                complete = self._eof or (
+                    NUMBER_CHARS_RE.match(buffer, pos).end() < len(buffer)
+                )
+                match = NUMBER_RE.match(buffer, pos) if complete else None
+                if complete and not match:
+                    self._error("Expecting value")
+                if match:
+                    self._pos = match.end()
+                    number = match.group()
+                    is_float = match.group(1) or match.group(2)
+                    return "number", float(number) if is_float else int(number)
+            else:
+                for literal, event in LITERALS.items():
+                    if buffer.startswith(literal, pos):
+                        self._pos = pos + len(literal)
+                        return event
+                if len(buffer) - pos >= 5 or self._eof:
+                    self._error("Expecting value")
+            if self._eof:
+                self._error("Expecting value")
+            self._fill_more()
+
+    def _error(self, msg: str):
+        raise JSONDecodeError(msg, self._buffer, self._pos)
+
+
+def iter_json_events(
+    stream: IO[Union[bytes, str]], chunk_size: int = 65536
+) -> Iterator[Event]:
+    return iter(JSONTokenizer(stream, chunk_size=chunk_size))
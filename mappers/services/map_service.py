@@ -1,7 +1,14 @@
-from typing import Any
-
-from mappers.exceptions import NotFoundError
-from mappers.models import Field, FieldMap, Mapper, Model, ModelMap, Transformer
+from typing import Dict, List
+
+from mappers.models import (
+    Field,
+    FieldMap,
+    FieldMapTransformer,
+    Mapper,
+    Model,
+    ModelMap,
+    Transformer,
+)
 from mappers.services.transformer_service import TransformerService
 
 
@@ -43,7 +50,7 @@ class MapService:
             (ModleMap): Instance of ModelMap
         """
         return ModelMap.objects.create(
-            source_model=source_model, target_model=target_model, map=map
+            source_model=source_model, target_model=target_model, mapper=map
         )
 
     @staticmethod
@@ -69,33 +76,57 @@ class MapService:
         return FieldMap.objects.create(
             source_field=source_field,
             target_field=target_field,
-            map=map,
+            mapper=map,
             transformer=transformer,
         )
 
     @staticmethod
-    def get_target_field(source_field: Field, map_id: int) -> Field:
-        field_map = FieldMap.objects.filter(
-            source_field=source_field, map_id=map_id
-        ).first()
-        if not field_map:
-            raise NotFoundError(
-                f"FieldMap not found for source field: {source_field}, map_id: {map_id}"
-            )
-        return field_map.target_field
-
-    def transform(self, source_field: Field, map_id: int, source_value: Any):
-        field_map = FieldMap.objects.filter(
-            source_field=source_field, map_id=map_id
-        ).first()
-        if not field_map:
-            raise NotFoundError(
-                f"FieldMap not found for source field: {source_field}, map_id: {map_id}"
+    def get_field_maps_by_map_id(map_id: int) -> List[FieldMap]:
+        return list(
+            FieldMap.objects.filter(mapper_id=map_id).select_related(
+                "source_field", "target_field", "transformer"
             )
-        transformer = field_map.transformer
+        )
+
+    @staticmethod
+    def add_chained_transformer(
+        field_map: FieldMap, transformer: Transformer
+    ) -> FieldMapTransformer:
+        """
+        Appends a transformer to the end of a FieldMap's transformer chain
+
+        Args:
+            field_map (FieldMap): FieldMap whose chain to extend
+            transformer (Transformer): Transformer applied after the others
 
-        return (
-            self.transformer_service.transform(transformer, source_value)
-            if transformer
-            else source_value
+        Returns:
+            (FieldMapTransformer): Instance of FieldMapTransformer
+        """
+        last = (
+            FieldMapTransformer.objects.filter(field_map=field_map)
+            .order_by("-position")
+            .first()
+        )
+        return FieldMapTransformer.objects.create(
+            field_map=field_map,
+            transformer=transformer,
+            position=last.position + 1 if last else 0,
         )
+
+    @staticmethod
+    def get_chained_transformers_by_map_id(
+        map_id: int,
+    ) -> Dict[int, List[Transformer]]:
+        """Returns the chained transformers of a mapper's FieldMaps, keyed by \
+            FieldMap id, in the order they are applied after `transformer`
+        """
+        chained: Dict[int, List[Transformer]] = {}
+        for field_map_transformer in (
+            FieldMapTransformer.objects.filter(field_map__mapper_id=map_id)
+            .select_related("transformer")
+            .order_by("field_map_id", "position")
+        ):
+            chained.setdefault(field_map_transformer.field_map_id, []).append(
+                field_map_transformer.transformer
+            )
+        return chained
@@ -0,0 +1,110 @@
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+from mappers.models import FieldTypeChoices
+
+if TYPE_CHECKING:
+    from mappers.services.transformer_factory import TransformerChain
+
+
+class FieldPlan:
+    """Compiled mapping instructions for a single source field
+
+    When built from a `TransformerChain`, `transform`, `transform_batch` (for
+    lists) and `transformer_type` are taken from the chain.
+    """
+
+    __slots__ = (
+        "source_name",
+        "target_name",
+        "type",
+        "list_item_type",
+        "transform",
+        "transform_batch",
+        "transformer_type",
+        "transformer",
+        "object_plan",
+    )
+
+    def __init__(
+        self,
+        source_name: str,
+        target_name: str,
+        type: FieldTypeChoices,
+        list_item_type: Optional[FieldTypeChoices] = None,
+        transform: Optional[Callable] = None,
+        object_plan: Optional["MappingPlan"] = None,
+        transform_batch: Optional[Callable] = None,
+        transformer_type: Optional[str] = None,
+        transformer: Optional["TransformerChain"] = None,
+    ):
+        self.source_name = source_name
+        self.target_name = target_name
+        self.type = type
+        self.list_item_type = list_item_type
+        self.transform = transform
+        self.transform_batch = transform_batch
+        self.transformer_type = transformer_type
+        self.transformer = transformer
+        self.object_plan = object_plan
+        if transformer is not None:
+            self._set_transformer()
+
+    def _set_transformer(self) -> None:
+        self.transform = self.transformer.transform
+        self.transform_batch = (
+            self.transformer.transform_batch
+            if self.type is FieldTypeChoices.LIST
+            else None
+        )
+        self.transformer_type = self.transformer.name
+
+    def __getstate__(self):
+        state = {name: getattr(self, name) for name in self.__slots__}
+        if self.transformer is not None:
+            # Fused chains can't be pickled, they are rebuilt from the chain
+            state["transform"] = state["transform_batch"] = None
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        if self.transformer is not None:
+            self._set_transformer()
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}"
+            f"(source: {self.source_name}, target: {self.target_name})"
+        )
+
+
+class MappingPlan:
+    """Compiled mapping instructions for a source model under a given mapper
+
+    A plan is a tree: each `FieldPlan` of an object (or list of objects) field
+    points to the `MappingPlan` of its nested model, so a whole source dto can
+    be mapped by walking the plan without touching the database.
+    """
+
+    __slots__ = ("map_id", "model_id", "fields", "compiled")
+
+    def __init__(self, map_id: int, model_id: int, fields: List[FieldPlan] = None):
+        self.map_id = map_id
+        self.model_id = model_id
+        self.fields = fields if fields is not None else []
+        # Generated function for this plan, see `PlanCompiler`
+        self.compiled: Optional[Callable[[dict], dict]] = None
+
+    def __getstate__(self):
+        # Generated functions can't be pickled, workers compile their own
+        return self.map_id, self.model_id, self.fields
+
+    def __setstate__(self, state):
+        self.map_id, self.model_id, self.fields = state
+        self.compiled = None
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}"
+            f"(map_id: {self.map_id}, model_id: {self.model_id})"
+        )
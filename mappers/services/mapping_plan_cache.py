@@ -0,0 +1,179 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+
+from mappers.models import Mapper
+from mappers.services.mapping_plan import MappingPlan
+
+PlanKey = Tuple[int, int]
+
+
+def get_spec_version(map_id: int) -> Optional[int]:
+    return (
+        Mapper.objects.filter(id=map_id).values_list("spec_version", flat=True).first()
+    )
+
+
+class _Entry:
+    __slots__ = ("version", "db_version", "checked_at", "plan")
+
+    def __init__(self, version, db_version, plan: MappingPlan):
+        self.version = version
+        self.db_version = db_version
+        self.checked_at = time.monotonic()
+        self.plan = plan
+
+
+class MappingPlanCache:
+    """Bounded, thread-safe LRU cache of compiled mapping plans
+
+    Entries are keyed by `(map_id, source_model_id)` and stamped with the plan
+    version current when they were built. Invalidating a mapper bumps its
+    version, so a plan compiled concurrently with an invalidation is never
+    served afterwards even if it lands in the cache late.
+
+    Invalidation only reaches the process it runs in, so with `load_version`
+    entries are also stamped with the mapper's version in the database
+    (`Mapper.spec_version`), which is read again on lookups at most every
+    `version_ttl` seconds. Plans edited from other processes are then served
+    for `version_ttl` seconds at most.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        load_version: Optional[Callable[[int], Optional[int]]] = None,
+        version_ttl: float = 5,
+    ):
+        self.maxsize = maxsize
+        self.load_version = load_version
+        self.version_ttl = version_ttl
+        self._entries: "OrderedDict[PlanKey, _Entry]" = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._global_version = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_version(self, map_id: int) -> Tuple[int, int]:
+        with self._lock:
+            return self._global_version, self._versions.get(map_id, 0)
+
+    def get(self, map_id: int, source_model_id: int) -> Optional[MappingPlan]:
+        key = (map_id, source_model_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != self.get_version(map_id):
+                self.misses += 1
+                return None
+            if not self._is_due_for_check(entry):
+                return self._hit(key, entry)
+
+        # The database is not read under the lock
+        db_version = self.load_version(map_id)
+        with self._lock:
+            if db_version != entry.db_version:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            entry.checked_at = time.monotonic()
+            return self._hit(key, entry)
+
+    def peek(self, map_id: int, source_model_id: int) -> Optional[MappingPlan]:
+        """Returns the cached plan only if it can be served without reading \
+            the database, e.g. from an event loop. Misses are not counted, \
+            the caller is expected to fall back to `get_or_build`.
+        """
+        key = (map_id, source_model_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is None
+                or entry.version != self.get_version(map_id)
+                or self._is_due_for_check(entry)
+            ):
+                return None
+            return self._hit(key, entry)
+
+    def _is_due_for_check(self, entry: _Entry) -> bool:
+        return (
+            self.load_version is not None
+            and time.monotonic() - entry.checked_at >= self.version_ttl
+        )
+
+    def _hit(self, key: PlanKey, entry: _Entry) -> MappingPlan:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.plan
+
+    def set(
+        self,
+        map_id: int,
+        source_model_id: int,
+        plan: MappingPlan,
+        version=None,
+        db_version: Optional[int] = None,
+    ) -> None:
+        with self._lock:
+            current_version = self.get_version(map_id)
+            if version is not None and version != current_version:
+                # The mapper changed while this plan was being compiled
+                return
+            key = (map_id, source_model_id)
+            self._entries[key] = _Entry(current_version, db_version, plan)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_build(
+        self, map_id: int, source_model_id: int, build: Callable[[], MappingPlan]
+    ) -> MappingPlan:
+        """Returns the cached plan or builds, caches and returns a new one \
+            The lock is not held while building so a slow compile does not \
+            block lookups for other mappers. Both versions are read before \
+            building, so a plan built from rows changed meanwhile is dropped.
+        """
+        plan = self.get(map_id, source_model_id)
+        if plan is None:
+            version = self.get_version(map_id)
+            db_version = self.load_version(map_id) if self.load_version else None
+            plan = build()
+            self.set(
+                map_id, source_model_id, plan, version=version, db_version=db_version
+            )
+        return plan
+
+    def invalidate_map(self, map_id: int) -> None:
+        with self._lock:
+            self._versions[map_id] = self._versions.get(map_id, 0) + 1
+            for key in [key for key in self._entries if key[0] == map_id]:
+                del self._entries[key]
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            self._global_version += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+plan_cache = MappingPlanCache(
+    maxsize=getattr(settings, "MAPPING_PLAN_CACHE_SIZE", 256),
+    load_version=get_spec_version,
+    version_ttl=getattr(settings, "MAPPING_PLAN_CACHE_VERSION_TTL", 5),
+)
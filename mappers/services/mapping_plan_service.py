@@ -0,0 +1,149 @@
+import logging
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from mappers.exceptions import NotFoundError
+from mappers.models import FieldTypeChoices
+from mappers.services.map_service import MapService
+from mappers.services.mapping_plan import FieldPlan, MappingPlan
+from mappers.services.mapping_plan_cache import MappingPlanCache, plan_cache
+from mappers.services.mapping_spec_service import MappingSpecService
+from mappers.services.model_field_service import ModelFieldService
+from mappers.services.transformer_factory import TransformerChain
+
+logger = logging.getLogger(__name__)
+
+
+class MappingPlanService:
+    def __init__(
+        self,
+        map_service: MapService,
+        model_field_service: ModelFieldService,
+        cache: MappingPlanCache = plan_cache,
+        spec_service: MappingSpecService = None,
+    ):
+        self.map_service = map_service
+        self.model_field_service = model_field_service
+        self.cache = cache
+        self.spec_service = spec_service or MappingSpecService(
+            map_service=map_service, model_field_service=model_field_service
+        )
+
+    def get_plan(self, map_id: int, source_model_id: int) -> MappingPlan:
+        """Returns the compiled plan from the process-wide cache, compiling \
+            it on a miss
+
+        Args:
+            map_id (int): Mapper to compile
+            source_model_id (int): Root source model of the plan
+
+        Returns:
+            MappingPlan: Root plan for `source_model_id`
+        """
+        return self.cache.get_or_build(
+            map_id,
+            source_model_id,
+            lambda: self.build_plan(map_id=map_id, source_model_id=source_model_id),
+        )
+
+    def build_plan(self, map_id: int, source_model_id: int) -> MappingPlan:
+        """Compiles the mapping plan for a source model under a mapper \
+            The plan is built from the mapper's stored spec, a single query \
+            once the spec is fresh. Source models outside the mapper's own \
+            source model graph are built from the FieldMap and Field rows.
+
+        Args:
+            map_id (int): Mapper to compile
+            source_model_id (int): Root source model of the plan
+
+        Raises:
+            NotFoundError: A source field has no FieldMap under this mapper
+
+        Returns:
+            MappingPlan: Root plan for `source_model_id`
+        """
+        spec = self.spec_service.get_spec(map_id)
+        if spec is None or str(source_model_id) not in spec["models"]:
+            spec = self.spec_service.build_spec(map_id, source_model_id)
+
+        plans: Dict[int, MappingPlan] = {}
+        return self._build_model_plan(map_id, source_model_id, spec["models"], plans)
+
+    def _build_model_plan(
+        self,
+        map_id: int,
+        model_id: int,
+        models: Dict[str, List[Dict]],
+        plans: Dict[int, MappingPlan],
+    ) -> MappingPlan:
+        if model_id in plans:
+            return plans[model_id]
+
+        plan = MappingPlan(map_id=map_id, model_id=model_id)
+        plans[model_id] = plan
+
+        for field_spec in models[str(model_id)]:
+            if field_spec["target"] is None:
+                raise NotFoundError(
+                    f"FieldMap not found for source field: "
+                    f"Field(id: {field_spec['id']}, name: {field_spec['source']}), "
+                    f"map_id: {map_id}"
+                )
+            plan.fields.append(
+                self._build_field_plan(map_id, field_spec, models, plans)
+            )
+
+        return plan
+
+    def _build_field_plan(
+        self,
+        map_id: int,
+        field_spec: Dict,
+        models: Dict[str, List[Dict]],
+        plans: Dict[int, MappingPlan],
+    ) -> FieldPlan:
+        type = FieldTypeChoices[field_spec["type"]]
+        list_item_type = (
+            FieldTypeChoices[field_spec["list_item_type"]]
+            if type is FieldTypeChoices.LIST
+            else None
+        )
+
+        object_plan = None
+        if field_spec["object_model_id"]:
+            object_plan = self._build_model_plan(
+                map_id, field_spec["object_model_id"], models, plans
+            )
+
+        transformer = None
+        if field_spec["transformers"]:
+            transformer = self._get_transformer_chain(
+                field_spec["transformers"],
+                field_spec.get("transformer_options"),
+                field_spec["memoize_size"],
+            )
+
+        return FieldPlan(
+            source_name=field_spec["source"],
+            target_name=field_spec["target"],
+            type=type,
+            list_item_type=list_item_type,
+            object_plan=object_plan,
+            transformer=transformer,
+        )
+
+    def _get_transformer_chain(
+        self,
+        types: List[str],
+        step_options: Optional[List[Dict]],
+        memoize_size: int,
+    ) -> TransformerChain:
+        options = getattr(settings, "MAPPING_TRANSFORMER_MEMOIZATION", {})
+        return self.map_service.transformer_service.get_transformer_chain(
+            types,
+            step_options,
+            memoize_size=memoize_size,
+            sample_size=options.get("SAMPLE_SIZE", 1000),
+            min_hit_rate=options.get("MIN_HIT_RATE", 0.5),
+        )
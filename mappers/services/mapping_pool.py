@@ -0,0 +1,170 @@
+import multiprocessing
+import pickle
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Spawned workers import this module before `_init_worker` sets Django up, so
+# anything that loads models is imported lazily
+if TYPE_CHECKING:
+    from mappers.constants import MappingEngine
+    from mappers.services.mapping_plan import MappingPlan
+
+# Plans unpickled in this (worker) process, by plan key
+_worker_functions: "OrderedDict[str, Callable[[dict], dict]]" = OrderedDict()
+WORKER_PLAN_CACHE_SIZE = 64
+
+
+def _init_worker() -> None:
+    import django
+    from django.apps import apps
+
+    # Spawned workers start from a fresh interpreter
+    if not apps.ready:
+        django.setup()
+
+
+def _map_chunk(
+    plan_key: str, plan_bytes: bytes, engine: str, source_dtos: List[dict]
+) -> Tuple[List[dict], list]:
+    from mappers.metrics import drain_worker_counters
+
+    map_dto = _worker_functions.get(plan_key)
+    if map_dto is None:
+        from mappers.constants import MappingEngine
+        from mappers.services.json_mapper_service import get_mapping_function
+        from mappers.services.plan_compiler import PlanCompiler
+
+        map_dto = get_mapping_function(
+            pickle.loads(plan_bytes), MappingEngine(engine), PlanCompiler()
+        )
+        _worker_functions[plan_key] = map_dto
+        if len(_worker_functions) > WORKER_PLAN_CACHE_SIZE:
+            _worker_functions.popitem(last=False)
+    else:
+        _worker_functions.move_to_end(plan_key)
+
+    # Counters of this process are never scraped, they go back to the parent
+    try:
+        target_dtos = [map_dto(dto) for dto in source_dtos]
+    except Exception as e:
+        e.worker_counters = drain_worker_counters()
+        raise
+    return target_dtos, drain_worker_counters()
+
+
+class MappingProcessPool:
+    """Maps large batches across worker processes, one core per worker
+
+    A plan is pickled once in the parent and tagged with a key. Each chunk of
+    records carries that key, and a worker unpickles (and, for the compiled
+    engine, compiles) a given plan only the first time it sees the key, so
+    steady state traffic is just the records. Chunks are mapped with
+    `executor.map`, which returns results in input order. The transformer
+    error and unknown enum value counts of each chunk come back with it, or
+    with its error, and are added to this process's metrics.
+
+    Workers are spawned rather than forked: the pool starts lazily from
+    threaded workers and servers, and a forked child could inherit a lock
+    held by another thread. A broken pool is dropped, so the next batch
+    starts a new one.
+    """
+
+    def __init__(
+        self, max_workers: int, chunk_size: int = 500, shipped_plans_size: int = 64
+    ):
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.shipped_plans_size = shipped_plans_size
+        self._executor = None
+        self._lock = threading.Lock()
+        # id(plan) -> (plan, key, pickled plan). Holding the plan keeps its
+        # id from being reused while the entry exists.
+        self._shipped: "OrderedDict[int, Tuple[MappingPlan, str, bytes]]" = (
+            OrderedDict()
+        )
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def map(
+        self,
+        plan: "MappingPlan",
+        source_dtos: Iterable[dict],
+        engine: "MappingEngine",
+        chunk_size: int = None,
+    ) -> List[dict]:
+        """Maps `source_dtos` with `plan` in the pool, in input order"""
+        from mappers.metrics import merge_worker_counters
+
+        key, plan_bytes = self._get_shipped_plan(plan)
+        chunk_size = chunk_size or self.chunk_size
+        dtos = iter(source_dtos)
+        chunks = list(iter(lambda: list(islice(dtos, chunk_size)), []))
+        count = len(chunks)
+        executor = self.executor
+        results: List[dict] = []
+        try:
+            for target_dtos, counters in executor.map(
+                _map_chunk,
+                [key] * count,
+                [plan_bytes] * count,
+                [engine.value] * count,
+                chunks,
+            ):
+                merge_worker_counters(counters)
+                results.extend(target_dtos)
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            raise
+        except Exception as e:
+            merge_worker_counters(getattr(e, "worker_counters", []))
+            raise
+        return results
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def _get_shipped_plan(self, plan: "MappingPlan") -> Tuple[str, bytes]:
+        with self._lock:
+            shipped = self._shipped.get(id(plan))
+            if shipped is None:
+                key = f"{plan.map_id}:{plan.model_id}:{uuid.uuid4().hex}"
+                shipped = (plan, key, pickle.dumps(plan, pickle.HIGHEST_PROTOCOL))
+                self._shipped[id(plan)] = shipped
+                if len(self._shipped) > self.shipped_plans_size:
+                    self._shipped.popitem(last=False)
+            else:
+                self._shipped.move_to_end(id(plan))
+            return shipped[1], shipped[2]
+
+
+def get_process_pool(config: Dict) -> Optional[MappingProcessPool]:
+    """Builds the pool described by `settings.MAPPING_PROCESS_POOL`, if any"""
+    max_workers = config.get("MAX_WORKERS", 0)
+    if not max_workers:
+        return None
+    return MappingProcessPool(
+        max_workers=max_workers, chunk_size=config.get("CHUNK_SIZE", 500)
+    )
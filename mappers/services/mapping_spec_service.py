@@ -0,0 +1,153 @@
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import F
+
+from mappers.exceptions import NotFoundError
+from mappers.models import Field, FieldMap, Mapper, Transformer, TransformerTypeChoices
+from mappers.services.map_service import MapService
+from mappers.services.model_field_service import ModelFieldService
+
+
+class MappingSpecService:
+    """Maintains `Mapper.spec`, the mapper's field tree as plain JSON
+
+    A spec looks like `{"version": 3, "source_model_id": 1, "models": {"1": \
+    [{"id": 10, "source": "name", "target": "target_name", "type": "STRING", \
+    "list_item_type": null, "transformers": ["UPPERCASE"], \
+    "transformer_options": [{}], "memoize_size": 0, "object_model_id": \
+    null}, ...], ...}}`, with one entry per source model reachable from the
+    root. Unmapped fields have a null target. `transformers` is the field's
+    chain in the order it is applied, and `transformer_options` the options
+    of each of its transformers. Changes to the mapper's rows mark the spec
+    stale (see `mappers.signals`) and the next reader rebuilds it, so warm
+    lookups are a single primary key read.
+    """
+
+    def __init__(self, map_service: MapService, model_field_service: ModelFieldService):
+        self.map_service = map_service
+        self.model_field_service = model_field_service
+
+    def get_spec(self, map_id: int) -> Optional[Dict]:
+        """Returns the spec of a mapper, rebuilding it first when stale
+
+        Args:
+            map_id (int): Mapper whose spec to return
+
+        Returns:
+            Optional[Dict]: Spec of the mapper, None if there is no such mapper
+        """
+        mapper = Mapper.objects.only("spec").filter(id=map_id).first()
+        if mapper is None:
+            return None
+        if mapper.spec is not None:
+            return mapper.spec
+        return self.rebuild_spec(map_id)
+
+    def rebuild_spec(self, map_id: int) -> Optional[Dict]:
+        """Rebuilds and stores the spec of a mapper, holding the mapper's row \
+            lock so concurrent rebuilds of one mapper are serialized
+        """
+        with transaction.atomic():
+            mapper = (
+                Mapper.objects.select_for_update()
+                .only("source_model_id", "spec", "spec_version")
+                .filter(id=map_id)
+                .first()
+            )
+            if mapper is None:
+                return None
+            if mapper.spec is not None:
+                # Rebuilt while we waited for the lock
+                return mapper.spec
+
+            spec = self.build_spec(map_id, mapper.source_model_id)
+            spec["version"] = mapper.spec_version
+            # An invalidation that landed during the build means the spec
+            # may come from rows older than that version, so it is returned
+            # but left for the next reader to rebuild
+            Mapper.objects.filter(id=map_id, spec_version=mapper.spec_version).update(
+                spec=spec
+            )
+            return spec
+
+    def build_spec(self, map_id: int, source_model_id: int) -> Dict:
+        """Builds the spec of `source_model_id` under a mapper from its rows, \
+            without storing it
+
+        Raises:
+            NotFoundError: If the source model does not exist
+        """
+        field_maps = self.map_service.get_field_maps_by_map_id(map_id)
+        field_maps_by_source_id = {fm.source_field_id: fm for fm in field_maps}
+        chained = self.map_service.get_chained_transformers_by_map_id(map_id)
+
+        graph = self.model_field_service.get_model_graph(source_model_id)
+        if graph.root is None:
+            raise NotFoundError("Model could not be found")
+
+        models = {}
+        for model_id in graph.model_ids:
+            fields = []
+            for source_field in graph.get_fields(model_id):
+                field_map = field_maps_by_source_id.get(source_field.id)
+                chain = []
+                if field_map:
+                    if field_map.transformer:
+                        chain.append(field_map.transformer)
+                    chain.extend(chained.get(field_map.id, []))
+                fields.append(
+                    {
+                        "id": source_field.id,
+                        "source": source_field.name,
+                        "target": field_map.target_field.name if field_map else None,
+                        "type": source_field.type,
+                        "list_item_type": source_field.list_item_type,
+                        "transformers": [transformer.type for transformer in chain],
+                        "transformer_options": [
+                            self._get_transformer_options(
+                                transformer, map_id, source_field, field_map
+                            )
+                            for transformer in chain
+                        ],
+                        "memoize_size": self._get_memoize_size(field_map, chain),
+                        "object_model_id": source_field.object_model_id,
+                    }
+                )
+            models[str(model_id)] = fields
+
+        return {"version": None, "source_model_id": source_model_id, "models": models}
+
+    @staticmethod
+    def _get_transformer_options(
+        transformer: Transformer, map_id: int, source_field: Field, field_map: FieldMap
+    ) -> Dict:
+        if transformer.type != TransformerTypeChoices.ENUM_MAP:
+            return transformer.options
+        # The enum lookup is built from the choices of the mapped fields
+        return {
+            **transformer.options,
+            "source_choices": source_field.choices,
+            "target_choices": field_map.target_field.choices,
+            "map_id": map_id,
+            "field_id": source_field.id,
+        }
+
+    @staticmethod
+    def _get_memoize_size(field_map, chain: List[Transformer]) -> int:
+        if not chain:
+            return 0
+        if field_map.memoize_size is not None:
+            return field_map.memoize_size
+        return max(transformer.memoize_size for transformer in chain)
+
+    @staticmethod
+    def invalidate_specs(map_ids: Iterable[int] = None) -> None:
+        """Marks the specs of `map_ids`, or of every mapper, stale \
+            The version is bumped even when the spec already is, so that a \
+            rebuild in flight does not store a spec of the older rows
+        """
+        mappers = Mapper.objects.all()
+        if map_ids is not None:
+            mappers = mappers.filter(id__in=map_ids)
+        mappers.update(spec=None, spec_version=F("spec_version") + 1)
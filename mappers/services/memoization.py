@@ -0,0 +1,131 @@
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_MISSING = object()
+
+# Every live memoized transform, read by the metrics collector
+_memos: "weakref.WeakSet[MemoizedTransform]" = weakref.WeakSet()
+_memos_lock = threading.Lock()
+
+
+def _register(memo: "MemoizedTransform") -> None:
+    with _memos_lock:
+        _memos.add(memo)
+
+
+def get_memos() -> List["MemoizedTransform"]:
+    with _memos_lock:
+        return list(_memos)
+
+
+class MemoizedTransform:
+    """Bounded LRU cache in front of a field's transform function
+
+    Results are keyed by value and type, so `1`, `1.0` and `True` are cached
+    apart. Once `sample_size` values have been looked up the hit rate is
+    checked a single time: below `min_hit_rate` the field is deemed high
+    cardinality, the cache is dropped and every later call goes straight to
+    the function. Unhashable values and failing transforms are never cached.
+    """
+
+    def __init__(
+        self,
+        function: Callable[[Any], Any],
+        maxsize: int,
+        transformer_type: Optional[str] = None,
+        sample_size: int = 1000,
+        min_hit_rate: float = 0.5,
+    ):
+        self.function = function
+        self.maxsize = maxsize
+        self.transformer_type = transformer_type
+        self.sample_size = sample_size
+        self.min_hit_rate = min_hit_rate
+        self._reset()
+
+    def __call__(self, value: Any) -> Any:
+        if self.bypassed:
+            return self.function(value)
+        key = (value.__class__, value)
+        try:
+            with self._lock:
+                result = self._cache.get(key, _MISSING)
+                if result is not _MISSING:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    self._check_hit_rate()
+                    return result
+        except TypeError:
+            return self.function(value)
+
+        result = self.function(value)
+        with self._lock:
+            self.misses += 1
+            if not self.bypassed:
+                self._cache[key] = result
+                if len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+                self._check_hit_rate()
+        return result
+
+    def transform_batch(self, values: Iterable) -> List:
+        return [self(value) for value in values]
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._cache),
+                "hit_rate": self.hit_rate,
+                "bypassed": self.bypassed,
+            }
+
+    def _check_hit_rate(self) -> None:
+        if (
+            self.hits + self.misses == self.sample_size
+            and self.hit_rate < self.min_hit_rate
+        ):
+            self.bypassed = True
+            self._cache.clear()
+
+    def _reset(self) -> None:
+        self._cache: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = False
+        _register(self)
+
+    def __getstate__(self):
+        # Worker processes start with an empty cache of their own
+        return (
+            self.function,
+            self.maxsize,
+            self.transformer_type,
+            self.sample_size,
+            self.min_hit_rate,
+        )
+
+    def __setstate__(self, state):
+        (
+            self.function,
+            self.maxsize,
+            self.transformer_type,
+            self.sample_size,
+            self.min_hit_rate,
+        ) = state
+        self._reset()
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}"
+            f"(transformer: {self.transformer_type}, maxsize: {self.maxsize})"
+        )
@@ -1,11 +1,17 @@
 import logging
-from typing import List, Union
+from typing import List, Sequence, Set, Tuple, Union
+
+from django.db import connection
 
 from mappers.exceptions import NotFoundError
 from mappers.models import Field, FieldTypeChoices, Model
+from mappers.services.model_graph import ModelGraph
 
 logger = logging.getLogger(__name__)
 
+# Database vendors whose model graph is loaded with a single recursive query
+RECURSIVE_CTE_VENDORS = ("postgresql",)
+
 
 class ModelFieldService:
     @staticmethod
@@ -39,6 +45,19 @@ class ModelFieldService:
         obj.save()
         return obj
 
+    @staticmethod
+    def bulk_create_models(models: List[Model]) -> List[Model]:
+        """Inserts unsaved models, setting their primary keys"""
+        if connection.features.can_return_rows_from_bulk_insert:
+            return Model.objects.bulk_create(models)
+        for model in models:
+            model.save()
+        return models
+
+    @staticmethod
+    def bulk_create_fields(fields: List[Field]) -> List[Field]:
+        return Field.objects.bulk_create(fields)
+
     @staticmethod
     def update_field(*, field_id: int, **kwargs) -> Field:
         field = Field.objects.filter(id=field_id).first()
@@ -67,6 +86,125 @@ class ModelFieldService:
             raise NotFoundError("Model could not be found")
         return list(model.fields.all())
 
+    @staticmethod
+    def get_model_graph(model_id: int) -> ModelGraph:
+        """Loads a model and every model nested under it through \
+            `Field.object_model`, with all of their fields
+
+        Args:
+            model_id (int): Root model of the graph
+
+        Returns:
+            ModelGraph: In-memory graph, whose root is None if the model \
+                does not exist
+        """
+        if connection.vendor in RECURSIVE_CTE_VENDORS:
+            return ModelFieldService._get_model_graph_recursive(model_id)
+        return ModelFieldService._get_model_graph_iterative(model_id)
+
+    @staticmethod
+    def _get_model_graph_recursive(model_id: int) -> ModelGraph:
+        model_columns = ModelFieldService._get_columns(Model)
+        field_columns = ModelFieldService._get_columns(Field)
+        model_table = Model._meta.db_table
+        field_table = Field._meta.db_table
+        id_type = Field._meta.get_field("object_model").db_type(connection)
+        sql = f"""
+            WITH RECURSIVE graph(id) AS (
+                SELECT CAST(%s AS {id_type})
+                UNION
+                SELECT f.object_model_id
+                FROM {field_table} f
+                JOIN graph g ON f.model_id = g.id
+                WHERE f.object_model_id IS NOT NULL
+            )
+            SELECT
+                {", ".join(f"m.{column}" for _, column in model_columns)},
+                {", ".join(f"f.{column}" for _, column in field_columns)}
+            FROM graph g
+            JOIN {model_table} m ON m.id = g.id
+            LEFT JOIN {field_table} f ON f.model_id = m.id
+            ORDER BY m.id, f.id
+        """
+
+        models, fields = {}, []
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [model_id])
+            split = len(model_columns)
+            for row in cursor.fetchall():
+                model_values, field_values = row[:split], row[split:]
+                if model_values[0] not in models:
+                    models[model_values[0]] = ModelFieldService._from_db_row(
+                        Model, model_columns, model_values
+                    )
+                if field_values[0] is not None:
+                    fields.append(
+                        ModelFieldService._from_db_row(
+                            Field, field_columns, field_values
+                        )
+                    )
+
+        return ModelGraph(root_id=model_id, models=models.values(), fields=fields)
+
+    @staticmethod
+    def _get_model_graph_iterative(model_id: int) -> ModelGraph:
+        fields = []
+        seen = {model_id}
+        frontier = {model_id}
+        while frontier:
+            level = list(Field.objects.filter(model_id__in=frontier).order_by("id"))
+            fields.extend(level)
+            frontier = {
+                field.object_model_id
+                for field in level
+                if field.object_model_id and field.object_model_id not in seen
+            }
+            seen |= frontier
+
+        models = Model.objects.filter(id__in=seen)
+        return ModelGraph(root_id=model_id, models=models, fields=fields)
+
+    @staticmethod
+    def get_enclosing_model_ids(model_id: int) -> Set[int]:
+        """Returns `model_id` and every model it is nested under through \
+            `Field.object_model`, i.e. the models whose graph contains it
+        """
+        seen = {model_id}
+        frontier = {model_id}
+        while frontier:
+            frontier = (
+                set(
+                    Field.objects.filter(object_model_id__in=frontier).values_list(
+                        "model_id", flat=True
+                    )
+                )
+                - seen
+            )
+            seen |= frontier
+        return seen
+
+    @staticmethod
+    def _get_columns(model_class) -> List[Tuple[object, str]]:
+        return [
+            (field, connection.ops.quote_name(field.column))
+            for field in model_class._meta.concrete_fields
+        ]
+
+    @staticmethod
+    def _from_db_row(model_class, columns: List[Tuple[object, str]], row: Sequence):
+        values = []
+        for (field, _), value in zip(columns, row):
+            expression = field.get_col(model_class._meta.db_table)
+            converters = connection.ops.get_db_converters(
+                expression
+            ) + expression.get_db_converters(connection)
+            for converter in converters:
+                value = converter(value, expression, connection)
+            values.append(value)
+        return model_class.from_db(
+            connection.alias, [field.attname for field, _ in columns], values
+        )
+
     @staticmethod
     def get_target_field_from_remote_field_id(remote_field_id: int) -> Field:
         field = (
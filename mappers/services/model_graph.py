@@ -0,0 +1,50 @@
+from typing import Dict, Iterable, List, Optional
+
+from mappers.models import Field, Model
+
+
+class ModelGraph:
+    """In-memory graph of a model and every model nested under it
+
+    Fields are attached to their models the same way `prefetch_related` does,
+    and each field's `model` and `object_model` point at instances of the
+    graph, so walking `model.fields.all()` and `field.object_model` recursively
+    (as the mappers and `ModelSerializer` do) costs no further queries.
+    """
+
+    def __init__(self, root_id: int, models: Iterable[Model], fields: Iterable[Field]):
+        self.root_id = root_id
+        self._models: Dict[int, Model] = {model.id: model for model in models}
+        self._fields: Dict[int, List[Field]] = {id: [] for id in self._models}
+
+        for field in fields:
+            field.model = self._models[field.model_id]
+            if field.object_model_id in self._models:
+                field.object_model = self._models[field.object_model_id]
+            self._fields[field.model_id].append(field)
+
+        for model_id, model in self._models.items():
+            queryset = model.fields.all()
+            queryset._result_cache = self._fields[model_id]
+            queryset._prefetch_done = True
+            model._prefetched_objects_cache = {"fields": queryset}
+
+    @property
+    def root(self) -> Optional[Model]:
+        return self._models.get(self.root_id)
+
+    @property
+    def model_ids(self) -> List[int]:
+        return list(self._models)
+
+    def get_model(self, model_id: int) -> Optional[Model]:
+        return self._models.get(model_id)
+
+    def get_fields(self, model_id: int) -> List[Field]:
+        return self._fields.get(model_id, [])
+
+    def __contains__(self, model_id: int) -> bool:
+        return model_id in self._models
+
+    def __len__(self) -> int:
+        return len(self._models)
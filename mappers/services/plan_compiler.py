@@ -0,0 +1,194 @@
+import logging
+from typing import Callable, Dict, List, Optional
+
+from mappers.metrics import TRANSFORMER_ERRORS
+from mappers.models import FieldTypeChoices
+from mappers.services.mapping_plan import FieldPlan, MappingPlan
+
+logger = logging.getLogger(__name__)
+
+
+def _get_failed_transformer(
+    error: Exception, filename: str, line_types: Dict[int, str]
+) -> Optional[str]:
+    # The innermost generated frame is on the line of the call that raised.
+    # Source values are read on lines of their own, so a missing key is not
+    # taken for a transformer error.
+    generated = None
+    traceback = error.__traceback__
+    while traceback is not None:
+        if traceback.tb_frame.f_code.co_filename == filename:
+            generated = traceback
+        traceback = traceback.tb_next
+    if generated is None:
+        return None
+    return line_types.get(generated.tb_lineno)
+
+
+def _count_transformer_errors(
+    function: Callable[[dict], dict], filename: str, line_types: Dict[int, str]
+) -> Callable[[dict], dict]:
+    def map_dto(src: dict) -> dict:
+        try:
+            return function(src)
+        except Exception as e:
+            transformer_type = _get_failed_transformer(e, filename, line_types)
+            if transformer_type is not None:
+                TRANSFORMER_ERRORS.inc(transformer=transformer_type)
+            raise
+
+    return map_dto
+
+
+class _CompileSession:
+    """Holds the generated source and namespace while compiling one plan"""
+
+    def __init__(self):
+        self.namespace: Dict[str, object] = {}
+        self.functions: Dict[int, str] = {}
+        self.sources: List[str] = []
+        # Bound name of the outermost transformer call of a field -> its type
+        self.transformer_types: Dict[str, str] = {}
+        self._counter = 0
+
+    def next_name(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def bind(self, prefix: str, value: object) -> str:
+        name = self.next_name(prefix)
+        self.namespace[name] = value
+        return name
+
+    def transformer_call(
+        self, prefix: str, functions: List[Callable], value: str, transformer_type: str
+    ) -> str:
+        """Binds `functions` and calls them in order on `value` \
+            The calls start a line and the value is read on the next, so the \
+            line number of a traceback tells whether a transformer raised.
+        """
+        names = [self.bind(prefix, function) for function in functions]
+        self.transformer_types[names[-1]] = transformer_type
+        calls = "".join(f"{name}(" for name in reversed(names))
+        return f"\n{calls}\n{value}" + ")" * len(names)
+
+
+class PlanCompiler:
+    """Generates a straight-line Python function from a `MappingPlan`
+
+    Key renames are emitted as nested dict literals, transformers are bound as
+    globals of the generated module and lists become comprehensions, so mapping
+    a dto is a single call with no per-field dispatch. The JSONMapper classes
+    remain the reference implementation: a compiled function must return what
+    `ObjectMapper.map_to_target` returns for the same plan, and count
+    `TRANSFORMER_ERRORS` the same way. Transformer calls start lines of the
+    generated source of their own, so a failing transformer is found from the
+    line number of the traceback, with no per-field code on the happy path.
+    """
+
+    def get_function(self, plan: MappingPlan) -> Callable[[dict], dict]:
+        """Returns the compiled function for a plan, compiling it on first use \
+            The function is kept on the plan so it shares the plan's cache \
+            lifetime and is dropped when the plan is invalidated.
+        """
+        function = plan.compiled
+        if function is None:
+            function = self.compile(plan)
+            plan.compiled = function
+        return function
+
+    def compile(self, plan: MappingPlan) -> Callable[[dict], dict]:
+        session = _CompileSession()
+        name = self._compile_function(plan, session)
+        source = "\n\n".join(session.sources)
+        filename = f"<mapping-plan map_id={plan.map_id} model_id={plan.model_id}>"
+        exec(compile(source, filename, "exec"), session.namespace)
+        logger.debug("Compiled %s:\n%s", filename, source)
+        line_types = {}
+        for lineno, line in enumerate(source.splitlines(), 1):
+            transformer_type = session.transformer_types.get(line.partition("(")[0])
+            if transformer_type is not None:
+                line_types[lineno] = transformer_type
+        function = session.namespace[name]
+        if not line_types:
+            return function
+        return _count_transformer_errors(function, filename, line_types)
+
+    def _compile_function(self, plan: MappingPlan, session: _CompileSession) -> str:
+        if id(plan) in session.functions:
+            return session.functions[id(plan)]
+
+        name = session.next_name("_map_")
+        session.functions[id(plan)] = name
+
+        statements: List[str] = []
+        expression = self._object_expression(
+            plan, "src", statements, session, inlined={id(plan)}
+        )
+        body = "".join(f"    {statement}\n" for statement in statements)
+        session.sources.append(f"def {name}(src):\n{body}    return {expression}\n")
+        return name
+
+    def _object_expression(
+        self,
+        plan: MappingPlan,
+        source: str,
+        statements: List[str],
+        session: _CompileSession,
+        inlined: set,
+    ) -> str:
+        items = []
+        for field_plan in plan.fields:
+            expression = self._field_expression(
+                field_plan,
+                f"{source}[{field_plan.source_name!r}]",
+                statements,
+                session,
+                inlined,
+            )
+            items.append(f"{field_plan.target_name!r}: {expression}")
+        return "{" + ", ".join(items) + "}"
+
+    def _field_expression(
+        self,
+        field_plan: FieldPlan,
+        value: str,
+        statements: List[str],
+        session: _CompileSession,
+        inlined: set,
+    ) -> str:
+        if field_plan.type is FieldTypeChoices.OBJECT:
+            object_plan = field_plan.object_plan
+            if id(object_plan) in inlined:
+                # Recursive model, fall back to a call instead of inlining
+                return f"{self._compile_function(object_plan, session)}({value})"
+            local = session.next_name("_v")
+            statements.append(f"{local} = {value}")
+            return self._object_expression(
+                object_plan, local, statements, session, inlined | {id(object_plan)}
+            )
+
+        if field_plan.type is FieldTypeChoices.LIST:
+            if field_plan.list_item_type is FieldTypeChoices.OBJECT:
+                function = self._compile_function(field_plan.object_plan, session)
+                return f"[{function}(_i) for _i in {value}]"
+            if field_plan.transform_batch:
+                return session.transformer_call(
+                    "_tb",
+                    [field_plan.transform_batch],
+                    value,
+                    field_plan.transformer_type,
+                )
+            return f"list({value})"
+
+        transformer = field_plan.transformer
+        if transformer is not None and transformer.memo is None:
+            # Inline the chain's steps rather than calling its fused function
+            return session.transformer_call(
+                "_t", transformer.functions, value, field_plan.transformer_type
+            )
+        if field_plan.transform:
+            return session.transformer_call(
+                "_t", [field_plan.transform], value, field_plan.transformer_type
+            )
+        return value
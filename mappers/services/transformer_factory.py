@@ -1,31 +1,374 @@
 from abc import ABC, abstractmethod
-from typing import Union
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
 
+from mappers.metrics import ENUM_UNKNOWNS
 from mappers.models import TransformerTypeChoices
+from mappers.services.datetime_parsing import (
+    get_datetime_formatter,
+    get_datetime_parser,
+)
+from mappers.services.memoization import MemoizedTransform
 
 
 class FieldTransformer(ABC):
+    # Whether results may be cached, false for transformers with side effects
+    memoizable = True
+
     @abstractmethod
     def transform(self, value: Union[str, int, float]) -> Union[str, int, float]:
         pass
 
+    def transform_batch(
+        self, values: Iterable[Union[str, int, float]]
+    ) -> List[Union[str, int, float]]:
+        """Transforms a whole column of values in one call. Subclasses should
+        override this with a bulk path when one exists."""
+        return list(map(self.transform, values))
+
+    def configure(self, **options) -> "FieldTransformer":
+        """Returns this transformer set up with a Transformer's `options`"""
+        if options:
+            raise ValueError(
+                f"{self.__class__.__name__} takes no options, got {sorted(options)}"
+            )
+        return self
+
+
+# Transformers that are a single builtin expose it as `transform` directly,
+# so applying them (or a fused chain of them) adds no Python frame per value
+
 
 class UppercaseTransformer(FieldTransformer):
-    def transform(self, value: Union[str, int, float]):
-        return value.upper()
+    transform = staticmethod(str.upper)
+
+
+class LowercaseTransformer(FieldTransformer):
+    transform = staticmethod(str.lower)
+
+
+class CapitalizeTransformer(FieldTransformer):
+    transform = staticmethod(str.capitalize)
 
 
 class StringToFloatTransformer(FieldTransformer):
-    def transform(self, value: Union[str, int, float]):
-        return float(value)
+    transform = staticmethod(float)
+
+
+class StringToIntegerTransformer(FieldTransformer):
+    transform = staticmethod(int)
+
+
+class NumberToStringTransformer(FieldTransformer):
+    transform = staticmethod(str)
+
+
+class StringToBooleanTransformer(FieldTransformer):
+    VALUES = {
+        "true": True,
+        "t": True,
+        "yes": True,
+        "y": True,
+        "on": True,
+        "1": True,
+        "false": False,
+        "f": False,
+        "no": False,
+        "n": False,
+        "off": False,
+        "0": False,
+    }
+
+    def transform(self, value: Union[str, int, float]) -> bool:
+        if value is True or value is False:
+            return value
+        try:
+            return self.VALUES[str(value).strip().lower()]
+        except KeyError:
+            raise ValueError(f"Invalid boolean: {value!r}") from None
+
+
+class DateTimeTransformer(FieldTransformer):
+    """Base of the date/time transformers
+
+    Options are `input_format` and `output_format`, `strftime` formats that
+    default to ISO 8601, and `unit`, "s" or "ms", for epoch values. Naive
+    datetimes are taken as UTC. Parsers and formatters are compiled once per
+    format, see `get_datetime_parser`.
+    """
+
+    def __init__(
+        self,
+        input_format: Optional[str] = None,
+        output_format: Optional[str] = None,
+        unit: str = "s",
+    ):
+        if unit not in ("s", "ms"):
+            raise ValueError(f"Invalid epoch unit: {unit!r}")
+        self.input_format = input_format
+        self.output_format = output_format
+        self.unit = unit
+        self._parse = get_datetime_parser(input_format)
+        self._format = get_datetime_formatter(output_format)
+        self._scale = 1000 if unit == "ms" else 1
+
+    def configure(self, **options) -> "DateTimeTransformer":
+        try:
+            return self.__class__(**options)
+        except TypeError:
+            raise ValueError(
+                f"Invalid {self.__class__.__name__} options: {sorted(options)}"
+            ) from None
+
+    def __reduce__(self):
+        # Compiled parsers are closures, rebuild them from the formats
+        return self.__class__, (self.input_format, self.output_format, self.unit)
+
+
+class DateTimeToEpochTransformer(DateTimeTransformer):
+    def transform(self, value: str) -> Union[int, float]:
+        return self._to_epoch(self._parse(value))
+
+    def transform_batch(self, values: Iterable[str]) -> List[Union[int, float]]:
+        parse, to_epoch = self._parse, self._to_epoch
+        return [to_epoch(parse(value)) for value in values]
+
+    def _to_epoch(self, value: datetime) -> Union[int, float]:
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        timestamp = value.timestamp() * self._scale
+        return int(timestamp) if timestamp.is_integer() else timestamp
+
+
+class EpochToDateTimeTransformer(DateTimeTransformer):
+    def transform(self, value: Union[str, int, float]) -> str:
+        return self._format(
+            datetime.fromtimestamp(float(value) / self._scale, tz=timezone.utc)
+        )
+
+    def transform_batch(self, values: Iterable[Union[str, int, float]]) -> List[str]:
+        format, scale, utc = self._format, self._scale, timezone.utc
+        return [
+            format(datetime.fromtimestamp(float(value) / scale, tz=utc))
+            for value in values
+        ]
+
+
+class FormatDateTimeTransformer(DateTimeTransformer):
+    def transform(self, value: str) -> str:
+        return self._format(self._parse(value))
+
+    def transform_batch(self, values: Iterable[str]) -> List[str]:
+        parse, format = self._parse, self._format
+        return [format(parse(value)) for value in values]
+
+
+def _normalize_choice(choice: Any) -> str:
+    return str(choice).strip().casefold()
+
+
+class EnumMapTransformer(FieldTransformer):
+    """Maps source choice values to target choice values
+
+    A source choice is paired with the target choice equal to it, or else
+    with the only one that differs from it by case or surrounding spaces.
+    Choices are never paired by position, which would silently swap
+    reordered ones: anything else goes through the `mapping` option, whose
+    entries take precedence. Values missing from the lookup are counted and
+    replaced with the `default` option when there is one, or kept as they
+    are. Counting needs every value to reach `transform`, so ENUM_MAP is not
+    memoized.
+
+    `MappingSpecService` adds each field's choices, `map_id` and `field_id`
+    to the options, so the lookup is built once per plan.
+    """
+
+    memoizable = False
+
+    def __init__(
+        self,
+        mapping: Optional[Dict[str, Any]] = None,
+        source_choices: Optional[List] = None,
+        target_choices: Optional[List] = None,
+        map_id: Optional[int] = None,
+        field_id: Optional[int] = None,
+        **options,
+    ):
+        if set(options) - {"default"}:
+            raise ValueError(f"Invalid EnumMapTransformer options: {sorted(options)}")
+        self.has_default = "default" in options
+        self.default = options.get("default")
+        self.map_id = map_id
+        self.field_id = field_id
+        self.lookup = self._build_lookup(
+            mapping or {}, source_choices or [], target_choices or []
+        )
+
+    @staticmethod
+    def _build_lookup(mapping: Dict, source_choices: List, target_choices: List):
+        targets_by_key: Dict[str, List] = {}
+        for choice in target_choices:
+            targets_by_key.setdefault(_normalize_choice(choice), []).append(choice)
+        lookup = {}
+        for choice in source_choices:
+            if choice in target_choices:
+                lookup[choice] = choice
+                continue
+            targets = targets_by_key.get(_normalize_choice(choice), [])
+            if len(targets) == 1:
+                lookup[choice] = targets[0]
+
+        # JSON object keys are strings, match them to non string choices
+        source_by_text = {str(choice): choice for choice in source_choices}
+        for key, value in mapping.items():
+            if target_choices and value not in target_choices:
+                raise ValueError(f"{value!r} is not a choice of the target field")
+            lookup[source_by_text.get(key, key)] = value
+        return lookup
+
+    def configure(self, **options) -> "EnumMapTransformer":
+        return self.__class__(**options)
+
+    def transform(self, value: Union[str, int, float]) -> Any:
+        try:
+            return self.lookup[value]
+        except (KeyError, TypeError):
+            return self._get_unknown(value)
+
+    def _get_unknown(self, value):
+        ENUM_UNKNOWNS.inc(map_id=self.map_id, field_id=self.field_id)
+        return self.default if self.has_default else value
+
+
+class TransformerChain:
+    """Ordered transformers of a field fused into a single callable
+
+    A chain of several steps is compiled into one generated function that
+    nests the steps' `transform` callables, and a matching list
+    comprehension for columns, so applying the chain costs one call per
+    value. A single step is used as is. With `memoize_size` the fused
+    function is wrapped in a `MemoizedTransform`, unless a step is not
+    `memoizable`.
+
+    Generated functions can't be pickled, so a chain pickles as its steps
+    and recompiles when loaded, e.g. in a mapping pool worker.
+    """
+
+    def __init__(
+        self,
+        steps: Sequence[FieldTransformer],
+        name: str,
+        memoize_size: int = 0,
+        sample_size: int = 1000,
+        min_hit_rate: float = 0.5,
+    ):
+        self.steps = tuple(steps)
+        self.name = name
+        self.memoize_size = memoize_size
+        self.sample_size = sample_size
+        self.min_hit_rate = min_hit_rate
+        self._build()
+
+    @property
+    def functions(self) -> List[Callable]:
+        return [step.transform for step in self.steps]
+
+    def _build(self) -> None:
+        if len(self.steps) == 1:
+            transform = self.steps[0].transform
+            transform_batch = self.steps[0].transform_batch
+        else:
+            transform, transform_batch = self._fuse()
+
+        self.memo: Optional[MemoizedTransform] = None
+        if self.memoize_size and all(step.memoizable for step in self.steps):
+            self.memo = MemoizedTransform(
+                transform,
+                maxsize=self.memoize_size,
+                transformer_type=self.name,
+                sample_size=self.sample_size,
+                min_hit_rate=self.min_hit_rate,
+            )
+            transform = self.memo
+            transform_batch = self.memo.transform_batch
+
+        self.transform: Callable = transform
+        self.transform_batch: Callable[[Iterable], List] = transform_batch
+
+    def _fuse(self):
+        namespace = {f"_t{i}": function for i, function in enumerate(self.functions)}
+        expression = "value"
+        for name in namespace:
+            expression = f"{name}({expression})"
+        source = (
+            f"def transform(value):\n    return {expression}\n\n\n"
+            f"def transform_batch(values):\n"
+            f"    return [{expression} for value in values]\n"
+        )
+        exec(compile(source, f"<transformer-chain {self.name}>", "exec"), namespace)
+        return namespace["transform"], namespace["transform_batch"]
+
+    def __getstate__(self):
+        return (
+            self.steps,
+            self.name,
+            self.memoize_size,
+            self.sample_size,
+            self.min_hit_rate,
+        )
+
+    def __setstate__(self, state):
+        (
+            self.steps,
+            self.name,
+            self.memoize_size,
+            self.sample_size,
+            self.min_hit_rate,
+        ) = state
+        self._build()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.name})"
 
 
 class TransformerFactory:
 
     TRANSFORMER_MAP = {
         TransformerTypeChoices.UPPERCASE: UppercaseTransformer(),
+        TransformerTypeChoices.LOWERCASE: LowercaseTransformer(),
+        TransformerTypeChoices.CAPITALIZE: CapitalizeTransformer(),
         TransformerTypeChoices.STRING_TO_FLOAT: StringToFloatTransformer(),
+        TransformerTypeChoices.STRING_TO_INTEGER: StringToIntegerTransformer(),
+        TransformerTypeChoices.STRING_TO_BOOLEAN: StringToBooleanTransformer(),
+        TransformerTypeChoices.NUMBER_TO_STRING: NumberToStringTransformer(),
+        TransformerTypeChoices.DATETIME_TO_EPOCH: DateTimeToEpochTransformer(),
+        TransformerTypeChoices.EPOCH_TO_DATETIME: EpochToDateTimeTransformer(),
+        TransformerTypeChoices.FORMAT_DATETIME: FormatDateTimeTransformer(),
+        TransformerTypeChoices.ENUM_MAP: EnumMapTransformer(),
     }
 
-    def get_transformer_by_type(self, type: TransformerTypeChoices) -> FieldTransformer:
-        return self.TRANSFORMER_MAP[type]
+    def get_transformer_by_type(
+        self, type: TransformerTypeChoices, options: Optional[Dict] = None
+    ) -> FieldTransformer:
+        transformer = self.TRANSFORMER_MAP[type]
+        return transformer.configure(**options) if options else transformer
+
+    def get_chain(
+        self,
+        types: Sequence[TransformerTypeChoices],
+        step_options: Optional[Sequence[Optional[Dict]]] = None,
+        **options,
+    ) -> TransformerChain:
+        """Fuses the transformers of `types`, applied in order, each set up \
+            with its entry of `step_options`. See `TransformerChain` for \
+            `options`
+        """
+        step_options = step_options or [None] * len(types)
+        return TransformerChain(
+            [
+                self.get_transformer_by_type(type, type_options)
+                for type, type_options in zip(types, step_options)
+            ],
+            name=">".join(types),
+            **options,
+        )
@@ -1,7 +1,7 @@
-from typing import Any
+from typing import Dict, Optional, Sequence
 
-from mappers.models import Transformer
-from mappers.services.transformer_factory import TransformerFactory
+from mappers.models import Transformer, TransformerTypeChoices
+from mappers.services.transformer_factory import TransformerChain, TransformerFactory
 
 
 class TransformerService:
@@ -11,8 +11,10 @@ class TransformerService:
     def get_transformer_by_id(self, id: int) -> Transformer:
         return Transformer.objects.filter(id=id).first()
 
-    def transform(self, transformer: Transformer, value: Any) -> Any:
-        field_transformer = self._transformer_factory.get_transformer_by_type(
-            transformer.type
-        )
-        return field_transformer.transform(value)
+    def get_transformer_chain(
+        self,
+        types: Sequence[TransformerTypeChoices],
+        step_options: Optional[Sequence[Optional[Dict]]] = None,
+        **options,
+    ) -> TransformerChain:
+        return self._transformer_factory.get_chain(types, step_options, **options)
@@ -0,0 +1,193 @@
+import random
+from typing import Dict, List, Optional, Sequence
+
+from django.conf import settings
+
+from mappers.constants import JSONType
+from mappers.exceptions import InvalidType
+from mappers.models import FieldTypeChoices
+from mappers.services.json_stream import JSONTokenizer
+
+SCALAR_TYPES = {
+    "string": JSONType.STRING.value,
+    "number": JSONType.NUMBER.value,
+    "boolean": JSONType.BOOLEAN.value,
+}
+STARTS = ("start_map", "start_array")
+ENDS = ("end_map", "end_array")
+
+
+# Sampling is seeded so that the same payload always infers the same types
+SAMPLE_SEED = 0
+
+
+def get_sample_size() -> int:
+    return max(1, settings.MAPPING_LIST_INFERENCE_SAMPLE_SIZE)
+
+
+def sample_list_items(items: Sequence, size: int) -> List:
+    """Returns the first item and a uniform random sample of up to `size - 1`
+    of the others, in list order"""
+    if len(items) <= size:
+        return list(items)
+    rest = random.Random(SAMPLE_SEED).sample(range(1, len(items)), size - 1)
+    return [items[0]] + [items[index] for index in sorted(rest)]
+
+
+class ListReservoir:
+    """Reservoir sampling of list items whose count is not known upfront
+
+    Keeps the first item and a uniform sample of up to `size - 1` of the
+    others in `samples`, like `sample_list_items`, with a single pass.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.count = 0
+        self.samples: List[Optional[Dict]] = []
+        self._random = random.Random(SAMPLE_SEED)
+
+    def offer(self) -> Optional[int]:
+        """Returns the slot in `samples` of the next item, None if the item
+        is not sampled"""
+        count = self.count
+        self.count += 1
+        if count < self.size:
+            self.samples.append(None)
+            return count
+        # Algorithm R over the items after the first
+        index = self._random.randrange(count)
+        return index + 1 if index < self.size - 1 else None
+
+
+def merge_json_type_definitions(definitions: List[Dict]) -> Dict:
+    """Merges the type maps of sampled list items into the first one
+
+    Object properties are united, so keys missing from some items are kept,
+    and a value whose type differs between items keeps its first type.
+    """
+    result = definitions[0]
+    for definition in definitions[1:]:
+        _merge(result, definition)
+    return result
+
+
+def _merge(into: Dict, other: Dict) -> None:
+    if into["type"] != other["type"]:
+        return
+    if into["type"] == JSONType.OBJECT.value:
+        properties = into["properties"]
+        for key, definition in other["properties"].items():
+            if key in properties:
+                _merge(properties[key], definition)
+            else:
+                properties[key] = definition
+    elif into["type"] == JSONType.ARRAY.value:
+        _merge(into["items"], other["items"])
+
+
+class _Container:
+    __slots__ = ("definition", "key", "reservoir", "slot", "discard")
+
+    def __init__(self, definition: Dict, sample_size: int):
+        self.definition = definition
+        self.key = None
+        self.reservoir = None
+        if definition["type"] == JSONType.ARRAY.value:
+            self.reservoir = ListReservoir(sample_size)
+        # Slot of the list item being built, dropped when `discard` is set
+        self.slot = None
+        self.discard = False
+
+    def add(self, definition: Optional[Dict]) -> None:
+        if self.reservoir is None:
+            self.definition["properties"][self.key] = definition
+        elif self.discard:
+            self.discard = False
+        elif definition is not None:
+            self.reservoir.samples[self.slot] = definition
+
+
+def _invalid_value() -> InvalidType:
+    # Same error as `JSONMapperFactory.get_mapper_by_value(None)`
+    return InvalidType(
+        msg=f"Unprocessable value of type: {FieldTypeChoices.UNKNOWN}, value: None"
+    )
+
+
+def _discard_sample(stack: List[_Container]) -> bool:
+    """Drops the innermost list item being built that is not its list's first
+    one, False if there is none"""
+    for container in reversed(stack):
+        if container.reservoir is not None and container.slot:
+            container.discard = True
+            return True
+    return False
+
+
+def build_json_type_definition(
+    tokenizer: JSONTokenizer, sample_size: int = None
+) -> Dict:
+    """Builds a type map from the parse events of a `JSONTokenizer`
+
+    The result is the one `map_to_json_type_definition` gives for the parsed
+    document, but only the type map is ever held in memory: values are
+    dropped as soon as their type is known, and list items left out of the
+    sample, see `ListReservoir`, are skipped by the tokenizer without being
+    tokenized.
+
+    Raises:
+        InvalidType: A value is null, or a list is empty, in the first item
+            of every list around it
+    """
+    sample_size = sample_size or get_sample_size()
+    stack: List[_Container] = []
+    root = None
+    for event, value in tokenizer:
+        if event == "map_key":
+            stack[-1].key = value
+            continue
+
+        if event in ENDS:
+            container = stack.pop()
+            definition = container.definition
+            if container.reservoir is not None:
+                samples = [d for d in container.reservoir.samples if d is not None]
+                if samples:
+                    definition["items"] = merge_json_type_definitions(samples)
+                elif not _discard_sample(stack):
+                    raise _invalid_value()
+            if stack:
+                stack[-1].add(definition)
+            continue
+
+        parent = stack[-1] if stack else None
+        if parent is not None and parent.reservoir is not None:
+            parent.slot = parent.reservoir.offer()
+            if parent.slot is None:
+                if event in STARTS:
+                    tokenizer.skip()
+                continue
+
+        if event == "start_map":
+            definition = {"type": JSONType.OBJECT.value, "properties": {}}
+        elif event == "start_array":
+            definition = {"type": JSONType.ARRAY.value}
+        elif event in SCALAR_TYPES:
+            definition = {"type": SCALAR_TYPES[event]}
+        elif _discard_sample(stack):
+            # Values that cannot be typed only drop the sample they are in
+            if parent is not None and parent.reservoir is not None:
+                parent.add(None)
+            continue
+        else:
+            raise _invalid_value()
+
+        if parent is None:
+            root = definition
+        if event in STARTS:
+            stack.append(_Container(definition, sample_size))
+        elif parent is not None:
+            parent.add(definition)
+
+    return root
@@ -0,0 +1,101 @@
+from functools import partial
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from mappers.models import (
+    Field,
+    FieldMap,
+    FieldMapTransformer,
+    Mapper,
+    ModelMap,
+    Transformer,
+)
+from mappers.services.mapping_plan_cache import plan_cache
+from mappers.services.mapping_spec_service import MappingSpecService
+from mappers.services.model_field_service import ModelFieldService
+
+# Invalidation runs right away, so the writing transaction reads its own
+# changes, and again once they are committed, so that specs and plans built
+# meanwhile from the rows as they were before the commit are dropped too
+
+
+def _invalidate_specs(map_ids: Iterable[int] = None) -> None:
+    MappingSpecService.invalidate_specs(map_ids)
+    transaction.on_commit(partial(MappingSpecService.invalidate_specs, map_ids))
+
+
+def _invalidate_plans(map_id: int = None) -> None:
+    if map_id is None:
+        plan_cache.invalidate_all()
+        transaction.on_commit(plan_cache.invalidate_all)
+    else:
+        plan_cache.invalidate_map(map_id)
+        transaction.on_commit(partial(plan_cache.invalidate_map, map_id))
+
+
+@receiver(post_save, sender=Mapper)
+@receiver(post_delete, sender=Mapper)
+def invalidate_mapper_plans(sender, instance: Mapper, **kwargs):
+    _invalidate_plans(instance.id)
+
+
+@receiver(post_save, sender=Mapper)
+def invalidate_mapper_spec(sender, instance: Mapper, created: bool, **kwargs):
+    if not created:
+        _invalidate_specs([instance.id])
+
+
+@receiver(post_save, sender=FieldMap)
+@receiver(post_delete, sender=FieldMap)
+@receiver(post_save, sender=ModelMap)
+@receiver(post_delete, sender=ModelMap)
+def invalidate_map_plans(sender, instance, **kwargs):
+    _invalidate_specs([instance.mapper_id])
+    _invalidate_plans(instance.mapper_id)
+
+
+@receiver(post_save, sender=FieldMapTransformer)
+@receiver(post_delete, sender=FieldMapTransformer)
+def invalidate_chain_plans(sender, instance: FieldMapTransformer, **kwargs):
+    mapper_id = (
+        FieldMap.objects.filter(id=instance.field_map_id)
+        .values_list("mapper_id", flat=True)
+        .first()
+    )
+    if mapper_id is not None:
+        _invalidate_specs([mapper_id])
+        _invalidate_plans(mapper_id)
+
+
+@receiver(post_save, sender=Transformer)
+@receiver(post_delete, sender=Transformer)
+def invalidate_transformer_plans(sender, instance: Transformer, **kwargs):
+    _invalidate_specs(
+        FieldMap.objects.filter(
+            Q(transformer_id=instance.id)
+            | Q(chained_transformers__transformer_id=instance.id)
+        ).values("mapper_id")
+    )
+    _invalidate_plans()
+
+
+@receiver(post_save, sender=Field)
+@receiver(post_delete, sender=Field)
+def invalidate_field_plans(sender, instance: Field, **kwargs):
+    # Fields are shared by every mapper whose source or target graph nests
+    # the field's model, which is the only place the field can be mapped
+    model_ids = ModelFieldService.get_enclosing_model_ids(instance.model_id)
+    map_ids = list(
+        Mapper.objects.filter(
+            Q(source_model_id__in=model_ids) | Q(target_model_id__in=model_ids)
+        ).values_list("id", flat=True)
+    )
+    if not map_ids:
+        return
+    _invalidate_specs(map_ids)
+    for map_id in map_ids:
+        _invalidate_plans(map_id)
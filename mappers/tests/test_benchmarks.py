@@ -0,0 +1,147 @@
+import os
+import tempfile
+from unittest import mock
+
+import pytest
+from django.test import SimpleTestCase, TestCase
+
+from mappers.benchmarks.compare import compare_runs, mann_whitney_u
+from mappers.benchmarks.generators import (
+    TARGET_PREFIX,
+    PayloadShape,
+    generate_mapping,
+    generate_source_dto,
+)
+from mappers.benchmarks.runner import (
+    BENCHMARKS,
+    BenchmarkResult,
+    build_json_mapper_service,
+    run_benchmarks,
+)
+from mappers.benchmarks.store import BenchmarkStore
+from mappers.models import Mapper
+
+
+@pytest.mark.django_db
+class TestBenchmarks(TestCase):
+    """
+    Test suite for the mapping engine benchmarks
+    """
+
+    def setUp(self):
+        self.shape = PayloadShape(width=8, depth=3, list_length=2, transformer_mix=1)
+
+    def test_generated_mapping_maps_every_field(self):
+        json_mapper_service = build_json_mapper_service()
+        mapping = generate_mapping(json_mapper_service, self.shape)
+        source_dto = generate_source_dto(self.shape, record=1)
+
+        target_dto = json_mapper_service.map_to_target_dto(
+            source_dto=source_dto,
+            source_model_id=mapping.source_model_id,
+            map_id=mapping.map_id,
+        )
+
+        assert list(target_dto) == [TARGET_PREFIX + key for key in source_dto]
+        assert target_dto["t_string_0"] == "VALUE 8"
+        assert target_dto["t_numeric_string_2"] == 10.5
+        assert target_dto["t_object_5"]["t_string_list_4"] == ["ITEM 0", "ITEM 1"]
+
+    def test_run_benchmarks_measures_and_rolls_back(self):
+        results = run_benchmarks(self.shape, records=3, repeat=2)
+
+        assert [result.name for result in results] == list(BENCHMARKS)
+        for result in results:
+            assert result.records == 3
+            assert len(result.timings) == 2
+            assert result.records_per_second > 0
+            assert result.peak_memory > 0
+        # Plans are cached after the warm up, mapping costs no queries
+        assert results[0].queries == 0
+        assert results[2].queries > 0
+        assert not Mapper.objects.exists()
+
+
+class TestBenchmarkComparison(SimpleTestCase):
+    """
+    Test suite for storing and comparing benchmark runs
+    """
+
+    def test_mann_whitney_u(self):
+        assert mann_whitney_u([1, 2, 3, 4, 5], [6, 7, 8, 9, 10]) == (0, 2 / 252)
+        _, p_value = mann_whitney_u([1, 3, 5, 7, 9], [2, 4, 6, 8, 10])
+        assert p_value > 0.5
+        # Ties fall back to the normal approximation
+        assert mann_whitney_u([1, 1, 1], [1, 1, 1])[1] == 1.0
+
+    def test_compare_runs_flags_significant_regressions(self):
+        baseline = self._run([1.0, 1.1, 0.9, 1.0, 1.05], queries=0)
+        noisy = self._run([1.0, 1.3, 0.8, 1.05, 1.15], queries=0)
+        slower = self._run([3.0, 3.1, 2.9, 3.2, 3.05], queries=2)
+
+        assert not any(c.regressed for c in compare_runs(baseline, noisy))
+
+        comparisons = {c.metric: c for c in compare_runs(baseline, slower)}
+        assert comparisons["time_per_record"].regressed
+        assert round(comparisons["time_per_record"].change, 2) == 2.05
+        assert comparisons["queries"].regressed
+        assert not comparisons["peak_memory"].regressed
+
+    def test_store_keys_runs_by_commit_and_machine(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = BenchmarkStore(os.path.join(tmp_dir, "results.json"))
+            result = BenchmarkResult(
+                name="map_to_target_dto",
+                shape=PayloadShape(),
+                records=10,
+                timings=[0.1, 0.2],
+                queries=0,
+                peak_memory=1024,
+            )
+
+            with mock.patch(
+                "mappers.benchmarks.store.is_git_dirty", return_value=False
+            ):
+                key = store.save_run([result], commit="abc123")
+
+            commit, fingerprint = key.split("@")
+            assert commit.startswith("abc123")
+            assert store.get_run(key)["fingerprint"] == fingerprint
+            assert store.get_run("abc123")["results"][0]["records"] == 10
+
+    def test_store_matches_dirty_runs_only_when_asked(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = BenchmarkStore(os.path.join(tmp_dir, "results.json"))
+            result = BenchmarkResult(
+                name="map_to_target_dto",
+                shape=PayloadShape(),
+                records=10,
+                timings=[0.1],
+                queries=0,
+                peak_memory=1024,
+            )
+            for dirty, records in ((True, 1), (False, 2)):
+                result.records = records
+                with mock.patch(
+                    "mappers.benchmarks.store.is_git_dirty", return_value=dirty
+                ):
+                    store.save_run([result], commit="abc123")
+
+            assert store.get_run("abc123")["results"][0]["records"] == 2
+            assert store.get_run("abc123-dirty")["results"][0]["records"] == 1
+            with pytest.raises(KeyError):
+                store.get_run("abc")
+
+    def _run(self, timings, queries):
+        return {
+            "results": [
+                {
+                    "name": "map_to_target_dto",
+                    "shape": PayloadShape().as_dict(),
+                    "records": 100,
+                    "timings": timings,
+                    "queries": queries,
+                    "peak_memory": 1000,
+                }
+            ]
+        }
@@ -1,11 +1,14 @@
 import pytest
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from mappers.events.event_handlers import MapperEventHandlers
 from mappers.models import Mapper, Model, Transformer, TransformerTypeChoices
 from mappers.services.json_mapper_factory import JSONMapperFactory
 from mappers.services.json_mapper_service import JSONMapperService
 from mappers.services.map_service import MapService
+from mappers.services.mapping_plan_cache import plan_cache
 from mappers.services.model_field_service import ModelFieldService
 from mappers.services.transformer_factory import TransformerFactory
 from mappers.services.transformer_service import TransformerService
@@ -73,6 +76,43 @@ class TestMapperEventHandlers(TestCase):
 
         assert response == expected_response
 
+    def test_map_many_to_target_event(self):
+        second_record = dict(self.event["data"], id=654321, first_name="Jane")
+        event = dict(self.event, data=[self.event["data"], second_record])
+
+        response = MapperEventHandlers.map_many_to_target_handler(event)
+
+        assert len(response) == 2
+        assert response[0]["target_first_name"] == "MIKE"
+        assert response[1]["target_id"] == 654321
+        assert response[1]["target_first_name"] == "JANE"
+        assert response[1]["target_skills"] == response[0]["target_skills"]
+
+    def test_map_many_to_target_dtos_queries_once_per_batch(self):
+        records = [dict(self.event["data"], id=i) for i in range(50)]
+        # Store the mapper's spec, so both runs below read it the same way
+        self.json_mapper_service.get_mapping_plan(
+            source_model_id=self.source_model.id, map_id=self.map.id
+        )
+        plan_cache.invalidate_all()
+
+        with CaptureQueriesContext(connection) as single_queries:
+            self.json_mapper_service.map_many_to_target_dtos(
+                source_dtos=records[:1],
+                source_model_id=self.source_model.id,
+                map_id=self.map.id,
+            )
+        plan_cache.invalidate_all()
+        with CaptureQueriesContext(connection) as batch_queries:
+            response = self.json_mapper_service.map_many_to_target_dtos(
+                source_dtos=records,
+                source_model_id=self.source_model.id,
+                map_id=self.map.id,
+            )
+
+        assert len(batch_queries) == len(single_queries)
+        assert [dto["target_id"] for dto in response] == list(range(50))
+
     def test_map_to_types_event(self):
         response = MapperEventHandlers.map_to_json_types_handler(self.event)
         expected_response = {
@@ -0,0 +1,52 @@
+from django.test import SimpleTestCase, override_settings
+
+from mappers.exceptions import InvalidType
+from mappers.models import FieldTypeChoices
+from mappers.services.json_mapper_factory import (
+    BooleanMapper,
+    JSONMapperFactory,
+    NumberMapper,
+    ObjectMapper,
+)
+
+
+class TestJSONMapperFactory(SimpleTestCase):
+    """
+    Test suite for JSON mapper dispatch
+    """
+
+    def test_mappers_are_shared_per_type(self):
+        first = JSONMapperFactory.get_mapper_by_type(FieldTypeChoices.OBJECT)
+        second = JSONMapperFactory.get_mapper_by_value({"id": 1})
+
+        assert isinstance(first, ObjectMapper)
+        assert first is second
+
+    def test_get_mapper_by_value_distinguishes_bool_from_number(self):
+        assert isinstance(JSONMapperFactory.get_mapper_by_value(True), BooleanMapper)
+        assert isinstance(JSONMapperFactory.get_mapper_by_value(1), NumberMapper)
+        assert isinstance(JSONMapperFactory.get_mapper_by_value(1.5), NumberMapper)
+
+    def test_get_mapper_by_value_raises_on_unknown_type(self):
+        with self.assertRaises(InvalidType):
+            JSONMapperFactory.get_mapper_by_value(None)
+
+        with self.assertRaises(InvalidType):
+            JSONMapperFactory.get_mapper_by_type(FieldTypeChoices.UNKNOWN)
+
+    @override_settings(MAPPING_LIST_INFERENCE_SAMPLE_SIZE=3)
+    def test_list_item_types_are_merged_from_a_sample(self):
+        dto = [{"id": 1}] + [{"id": 2, "name": "b"}] * 1000
+        mapper = JSONMapperFactory.get_mapper_by_value(dto)
+
+        assert mapper.map_to_json_type_definition(dto)["items"] == {
+            "type": "object",
+            "properties": {"id": {"type": "number"}, "name": {"type": "string"}},
+        }
+
+        # A different type keeps the first item's one
+        assert mapper.map_to_json_type_definition([1, "a", None])["items"] == {
+            "type": "number"
+        }
+        with self.assertRaises(InvalidType):
+            mapper.map_to_json_type_definition([None, 1])
@@ -0,0 +1,74 @@
+import pytest
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from mappers.models import Field, FieldTypeChoices, Model
+from mappers.services.json_mapper_factory import JSONMapperFactory
+from mappers.services.json_mapper_service import JSONMapperService
+from mappers.services.map_service import MapService
+from mappers.services.model_field_service import ModelFieldService
+from mappers.services.transformer_factory import TransformerFactory
+from mappers.services.transformer_service import TransformerService
+
+
+@pytest.mark.django_db
+class TestJSONMapperService(TestCase):
+    """
+    Test suite for JSON Mapper Service
+    """
+
+    def setUp(self):
+        transformer_service = TransformerService(
+            transformer_factory=TransformerFactory()
+        )
+        self.json_mapper_service = JSONMapperService(
+            json_mapper_factory=JSONMapperFactory(
+                map_service=MapService(transformer_service=transformer_service)
+            ),
+            model_field_service=ModelFieldService(),
+        )
+
+    def test_create_models_and_fields_from_type_map(self):
+        type_map = self.json_mapper_service.map_to_json_types(
+            json_dto={
+                "id": 1,
+                "tags": ["a"],
+                "address": {"street": "123 Road", "geo": {"lat": 1.5}},
+                "skills": [{"name": "Typing"}],
+            }
+        )
+
+        # One insert for models and one for fields per nesting level
+        with self.assertNumQueries(6):
+            model = self.json_mapper_service.create_models_and_fields_from_type_map(
+                type_map=type_map, model_name="Person"
+            )
+
+        fields = {field.name: field for field in model.fields.all()}
+        assert model.name == "Person"
+        assert fields["tags"].list_item_type == FieldTypeChoices.STRING
+        assert fields["address"].object_model.name == "address"
+        assert fields["skills"].list_item_type == FieldTypeChoices.OBJECT
+        assert fields["skills"].object_model.name == "skills_item"
+        geo = fields["address"].object_model.fields.get(name="geo")
+        assert geo.object_model.fields.get().name == "lat"
+
+    def test_create_models_and_fields_validates_before_writing(self):
+        type_map = {
+            "type": "object",
+            "properties": {
+                "id": {"type": "number"},
+                "nested": {
+                    "type": "object",
+                    "properties": {"x" * 65: {"type": "string"}},
+                },
+            },
+        }
+
+        with self.assertRaises(ValidationError):
+            self.json_mapper_service.create_models_and_fields_from_type_map(
+                type_map=type_map
+            )
+
+        assert not Model.objects.exists()
+        assert not Field.objects.exists()
@@ -0,0 +1,169 @@
+import pytest
+from django.test import SimpleTestCase, TestCase
+
+from mappers.exceptions import InvalidPatch
+from mappers.factories import (
+    build_json_mapper_service,
+    build_map_service,
+    create_field_maps,
+    create_model_from_dto,
+)
+from mappers.models import Transformer, TransformerTypeChoices
+from mappers.services.json_patch import apply_patch
+
+
+class TestJSONPatch(SimpleTestCase):
+    """
+    Test suite for applying JSON Patch documents
+    """
+
+    def setUp(self):
+        self.document = {"a": {"b": 1, "c": [1, 2]}, "d": {"e": "x"}, "f~/g": 1}
+
+    def test_operations(self):
+        patched = apply_patch(
+            self.document,
+            [
+                {"op": "replace", "path": "/a/b", "value": 2},
+                {"op": "add", "path": "/a/c/-", "value": 3},
+                {"op": "add", "path": "/a/c/0", "value": 0},
+                {"op": "remove", "path": "/f~0~1g"},
+                {"op": "copy", "from": "/a/b", "path": "/d/b"},
+                {"op": "move", "from": "/d/e", "path": "/e"},
+                {"op": "test", "path": "/e", "value": "x"},
+            ],
+        )
+
+        assert patched == {"a": {"b": 2, "c": [0, 1, 2, 3]}, "d": {"b": 2}, "e": "x"}
+
+    def test_untouched_subtrees_are_shared(self):
+        patched = apply_patch(
+            self.document, [{"op": "replace", "path": "/a/b", "value": 2}]
+        )
+
+        assert self.document["a"]["b"] == 1
+        assert patched["a"] is not self.document["a"]
+        assert patched["a"]["c"] is self.document["a"]["c"]
+        assert patched["d"] is self.document["d"]
+
+    def test_invalid_patches_raise(self):
+        for patch in [
+            [{"op": "replace", "path": "/missing", "value": 1}],
+            [{"op": "remove", "path": "/a/c/2"}],
+            [{"op": "test", "path": "/a/b", "value": 2}],
+            [{"op": "move", "from": "/a", "path": "/a/x"}],
+            [{"op": "add", "path": "/a"}],
+            [{"op": "unknown", "path": "/a"}],
+        ]:
+            with self.assertRaises(InvalidPatch):
+                apply_patch(self.document, patch)
+
+
+@pytest.mark.django_db
+class TestMapPatchToTarget(TestCase):
+    """
+    Test suite for remapping a source dto from a JSON Patch
+    """
+
+    def setUp(self):
+        self.map_service = build_map_service()
+        self.json_mapper_service = build_json_mapper_service(self.map_service)
+        self.source_dto = {
+            "name": "Mike",
+            "status": "active",
+            "address": {"street": "123 Road", "city": "Springfield"},
+            "skills": [{"name": "Typing"}, {"name": "Reading"}],
+        }
+        self.source_model = create_model_from_dto(
+            self.json_mapper_service, self.source_dto
+        )
+        target_model = create_model_from_dto(
+            self.json_mapper_service, self._prefix(self.source_dto)
+        )
+        self.map = self.map_service.create_map(self.source_model, target_model)
+        self.transformer = Transformer.objects.create(
+            type=TransformerTypeChoices.UPPERCASE
+        )
+        create_field_maps(
+            self.map_service,
+            self.map,
+            self.source_model,
+            target_model,
+            transformers={"name": self.transformer, "status": self.transformer},
+            prefix="t_",
+        )
+        self.target_dto = self._map(self.source_dto)
+
+    def test_remaps_only_patched_fields(self):
+        target_dto, target_patch = self._map_patch(
+            [
+                {"op": "replace", "path": "/status", "value": "inactive"},
+                {"op": "replace", "path": "/skills/1/name", "value": "Writing"},
+                {"op": "add", "path": "/unmapped", "value": 1},
+            ]
+        )
+
+        assert target_patch == [
+            {"op": "replace", "path": "/t_status", "value": "INACTIVE"},
+            {"op": "replace", "path": "/t_skills/1/t_name", "value": "WRITING"},
+        ]
+        assert target_dto == self._map(
+            dict(
+                self.source_dto,
+                status="inactive",
+                skills=[{"name": "Typing"}, {"name": "Writing"}],
+            )
+        )
+        assert target_dto["t_address"] is self.target_dto["t_address"]
+
+    def test_list_changes_remap_the_list(self):
+        target_dto, target_patch = self._map_patch(
+            [{"op": "add", "path": "/skills/0", "value": {"name": "Coding"}}]
+        )
+
+        assert target_patch == [
+            {
+                "op": "replace",
+                "path": "/t_skills",
+                "value": [
+                    {"t_name": "CODING"},
+                    {"t_name": "TYPING"},
+                    {"t_name": "READING"},
+                ],
+            }
+        ]
+
+    def test_unchanged_values_are_not_patched(self):
+        target_dto, target_patch = self._map_patch(
+            [{"op": "replace", "path": "/name", "value": "MIKE"}]
+        )
+
+        assert target_patch == []
+        assert target_dto == self.target_dto
+
+    def test_removed_field_raises_like_a_full_mapping(self):
+        with self.assertRaises(KeyError):
+            self._map_patch([{"op": "remove", "path": "/address/city"}])
+
+    def _map_patch(self, patch):
+        return self.json_mapper_service.map_patch_to_target(
+            previous_source_dto=self.source_dto,
+            previous_target_dto=self.target_dto,
+            patch=patch,
+            source_model_id=self.source_model.id,
+            map_id=self.map.id,
+        )
+
+    def _map(self, source_dto):
+        return self.json_mapper_service.map_to_target_dto(
+            source_dto=source_dto,
+            source_model_id=self.source_model.id,
+            map_id=self.map.id,
+        )
+
+    def _prefix(self, dto):
+        if isinstance(dto, list):
+            return [self._prefix(item) for item in dto]
+        if isinstance(dto, dict):
+            return {"t_" + key: self._prefix(value) for key, value in dto.items()}
+        return dto
@@ -0,0 +1,136 @@
+import io
+import json
+
+from django.test import SimpleTestCase, override_settings
+
+from mappers.exceptions import InvalidType
+from mappers.services.json_mapper_factory import JSONMapperFactory
+from mappers.services.json_stream import JSONTokenizer, iter_json_events
+from mappers.services.type_inference import ListReservoir, build_json_type_definition
+
+
+class TestJSONStream(SimpleTestCase):
+    """
+    Test suite for the incremental JSON tokenizer and streaming type inference
+    """
+
+    def setUp(self):
+        self.document = {
+            "id": 123456,
+            "name": 'Mïke "The" Shean\n',
+            "score": -1.5e-3,
+            "active": True,
+            "address": {"street": "123 Road", "tags": []},
+            "skills": [{"id": "s1", "level": 2}, {"id": "s2", "other": None}],
+            "matrix": [[1, 2], [3]],
+        }
+
+    def test_events_at_any_chunk_size(self):
+        expected = list(iter_json_events(io.StringIO(json.dumps(self.document))))
+        for chunk_size in (1, 2, 3, 7, 64):
+            for text in (
+                json.dumps(self.document, ensure_ascii=False),
+                json.dumps(self.document, indent=2),
+            ):
+                stream = io.BytesIO(text.encode())
+                assert list(iter_json_events(stream, chunk_size)) == expected
+
+        assert expected[:6] == [
+            ("start_map", None),
+            ("map_key", "id"),
+            ("number", 123456),
+            ("map_key", "name"),
+            ("string", 'Mïke "The" Shean\n'),
+            ("map_key", "score"),
+        ]
+
+    def test_malformed_documents_raise(self):
+        for text in ['{"a": 1,}', "[1 2]", '{"a" 1}', "[1]x", "", "tru", '{"a": "x']:
+            for chunk_size in (1, 64):
+                with self.assertRaises(json.JSONDecodeError):
+                    list(iter_json_events(io.StringIO(text), chunk_size))
+
+    def test_skipped_containers_produce_no_events(self):
+        text = '{"a": [{"b": "]}\\"[{"}, [1]], "c": {"d": [true]}, "e": 1}'
+        for chunk_size in (1, 3, 64):
+            tokenizer = JSONTokenizer(io.StringIO(text), chunk_size)
+            events = []
+            for event, value in tokenizer:
+                events.append(event)
+                if event == "start_array":
+                    tokenizer.skip()
+
+            assert events == [
+                "start_map",
+                "map_key",
+                "start_array",
+                "map_key",
+                "start_map",
+                "map_key",
+                "start_array",
+                "end_map",
+                "map_key",
+                "number",
+                "end_map",
+            ]
+
+    def test_type_map_matches_in_memory_inference(self):
+        document = dict(self.document, address={"street": "123 Road"})
+        document["skills"][1].pop("other")
+        stream = io.BytesIO(json.dumps(document).encode())
+
+        type_map = build_json_type_definition(JSONTokenizer(stream, 16))
+
+        mapper = JSONMapperFactory.get_mapper_by_value(document)
+        assert type_map == mapper.map_to_json_type_definition(document)
+
+    def test_nulls_and_empty_lists_raise(self):
+        for document in ({"a": None}, {"a": {"b": []}}):
+            stream = io.StringIO(json.dumps(document))
+            with self.assertRaises(InvalidType):
+                build_json_type_definition(JSONTokenizer(stream))
+
+    def test_list_items_are_sampled_and_merged(self):
+        document = dict(self.document, address={"street": "123 Road"})
+        mapper = JSONMapperFactory.get_mapper_by_value(document)
+        for sample_size in (2, 20):
+            with override_settings(MAPPING_LIST_INFERENCE_SAMPLE_SIZE=sample_size):
+                type_map = build_json_type_definition(
+                    JSONTokenizer(io.StringIO(json.dumps(document)), 16)
+                )
+                assert type_map == mapper.map_to_json_type_definition(document)
+
+        # "other" is null, so the second skill only drops out of the sample
+        skills = type_map["properties"]["skills"]["items"]["properties"]
+        assert list(skills) == ["id", "level"]
+
+        document = {"items": [{"a": 1}] + [{"a": 2, "b": [{"c": True}]}] * 50}
+        stream = io.StringIO(json.dumps(document))
+        type_map = build_json_type_definition(JSONTokenizer(stream), sample_size=5)
+        assert type_map["properties"]["items"]["items"]["properties"] == {
+            "a": {"type": "number"},
+            "b": {
+                "type": "array",
+                "items": {"type": "object", "properties": {"c": {"type": "boolean"}}},
+            },
+        }
+
+    def test_first_list_item_must_be_typed(self):
+        for document in ([None, 1], [[], [1]], [1, None, {"a": None}, [[]]]):
+            stream = io.StringIO(json.dumps({"a": document}))
+            if document[0] is not None and document[0] != []:
+                type_map = build_json_type_definition(JSONTokenizer(stream))
+                assert type_map["properties"]["a"]["items"] == {"type": "number"}
+                continue
+            with self.assertRaises(InvalidType):
+                build_json_type_definition(JSONTokenizer(stream))
+
+    def test_reservoir_sample_size_is_bounded(self):
+        reservoir = ListReservoir(10)
+        slots = [reservoir.offer() for _ in range(100000)]
+
+        assert slots[:10] == list(range(10))
+        assert 0 not in slots[10:]
+        assert len(reservoir.samples) == 10
+        # Algorithm R takes about size * ln(count / size) items
+        assert sum(slot is not None for slot in slots) < 150
@@ -0,0 +1,175 @@
+import pytest
+from django.test import TestCase
+
+from mappers.models import Field, FieldTypeChoices, Mapper, Model, Transformer
+from mappers.services.mapping_plan import MappingPlan
+from mappers.services.mapping_plan_cache import MappingPlanCache, plan_cache
+
+
+class TestMappingPlanCache(TestCase):
+    """
+    Test suite for the mapping plan LRU cache
+    """
+
+    def setUp(self):
+        self.cache = MappingPlanCache(maxsize=2)
+
+    def test_get_or_build_counts_hits_and_misses(self):
+        calls = []
+
+        def build():
+            calls.append(1)
+            return MappingPlan(map_id=1, model_id=1)
+
+        first = self.cache.get_or_build(1, 1, build)
+        second = self.cache.get_or_build(1, 1, build)
+
+        assert first is second
+        assert len(calls) == 1
+        assert self.cache.stats()["hits"] == 1
+        assert self.cache.stats()["misses"] == 1
+
+    def test_least_recently_used_plan_is_evicted(self):
+        self.cache.set(1, 1, MappingPlan(map_id=1, model_id=1))
+        self.cache.set(2, 1, MappingPlan(map_id=2, model_id=1))
+        self.cache.get(1, 1)
+        self.cache.set(3, 1, MappingPlan(map_id=3, model_id=1))
+
+        assert self.cache.get(1, 1) is not None
+        assert self.cache.get(2, 1) is None
+        assert self.cache.stats()["evictions"] == 1
+
+    def test_invalidate_map_only_drops_that_mapper(self):
+        self.cache.set(1, 1, MappingPlan(map_id=1, model_id=1))
+        self.cache.set(2, 1, MappingPlan(map_id=2, model_id=1))
+        self.cache.invalidate_map(1)
+
+        assert self.cache.get(1, 1) is None
+        assert self.cache.get(2, 1) is not None
+
+    def test_plan_built_before_invalidation_is_not_cached(self):
+        version = self.cache.get_version(1)
+        self.cache.invalidate_map(1)
+        self.cache.set(1, 1, MappingPlan(map_id=1, model_id=1), version=version)
+
+        assert self.cache.get(1, 1) is None
+
+    def test_plan_edited_elsewhere_is_dropped_once_its_version_is_checked(self):
+        db_versions = {1: 0}
+        cache = MappingPlanCache(load_version=db_versions.get, version_ttl=60)
+        plan = cache.get_or_build(1, 1, lambda: MappingPlan(map_id=1, model_id=1))
+
+        # Another process bumps the version, which is not read again yet
+        db_versions[1] = 1
+        assert cache.get(1, 1) is plan
+
+        cache.version_ttl = 0
+        assert cache.get(1, 1) is None
+        rebuilt = cache.get_or_build(1, 1, lambda: MappingPlan(map_id=1, model_id=1))
+        assert rebuilt is not plan
+        assert cache.get(1, 1) is rebuilt
+
+    def test_peek_never_loads_the_version(self):
+        def load_version(map_id):
+            loads.append(map_id)
+            return 0
+
+        loads = []
+        cache = MappingPlanCache(load_version=load_version, version_ttl=60)
+        plan = cache.get_or_build(1, 1, lambda: MappingPlan(map_id=1, model_id=1))
+        loads.clear()
+
+        assert cache.peek(1, 1) is plan
+        assert cache.peek(2, 1) is None
+        cache.version_ttl = 0
+        assert cache.peek(1, 1) is None
+        assert loads == []
+
+
+@pytest.mark.django_db
+class TestMappingPlanCacheSignals(TestCase):
+    """
+    Test suite for signal driven plan invalidation
+    """
+
+    def setUp(self):
+        self.source_model = Model.objects.create(name="Source")
+        self.target_model = Model.objects.create(name="Target")
+        self.map = Mapper.objects.create(
+            source_model=self.source_model, target_model=self.target_model
+        )
+        plan_cache.set(self.map.id, self.source_model.id, MappingPlan(1, 1))
+
+    def test_saving_field_invalidates_plans(self):
+        Field.objects.create(
+            name="id", type=FieldTypeChoices.NUMBER, model=self.source_model
+        )
+
+        assert plan_cache.get(self.map.id, self.source_model.id) is None
+
+    def test_saving_nested_field_invalidates_plans(self):
+        nested_model = Model.objects.create(name="Address")
+        Field.objects.create(
+            name="address",
+            type=FieldTypeChoices.OBJECT,
+            model=self.target_model,
+            object_model=nested_model,
+        )
+        plan_cache.set(self.map.id, self.source_model.id, MappingPlan(1, 1))
+        spec_version = Mapper.objects.get(id=self.map.id).spec_version
+
+        Field.objects.create(
+            name="street", type=FieldTypeChoices.STRING, model=nested_model
+        )
+
+        assert plan_cache.get(self.map.id, self.source_model.id) is None
+        assert Mapper.objects.get(id=self.map.id).spec_version > spec_version
+
+    def test_saving_unmapped_field_keeps_plans(self):
+        plan = MappingPlan(1, 1)
+        plan_cache.set(self.map.id, self.source_model.id, plan)
+        spec_version = Mapper.objects.get(id=self.map.id).spec_version
+
+        Field.objects.create(
+            name="id",
+            type=FieldTypeChoices.NUMBER,
+            model=Model.objects.create(name="Unmapped"),
+        )
+
+        assert plan_cache.get(self.map.id, self.source_model.id) is plan
+        assert Mapper.objects.get(id=self.map.id).spec_version == spec_version
+
+    def test_saving_transformer_invalidates_plans(self):
+        Transformer.objects.create(type="UPPERCASE")
+
+        assert plan_cache.get(self.map.id, self.source_model.id) is None
+
+    def test_deleting_mapper_invalidates_its_plans(self):
+        map_id = self.map.id
+        self.map.delete()
+
+        assert plan_cache.get(map_id, self.source_model.id) is None
+
+    def test_plans_are_invalidated_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Field.objects.create(
+                name="id", type=FieldTypeChoices.NUMBER, model=self.source_model
+            )
+            # A concurrent reader caches a plan of the pre-commit rows
+            plan_cache.set(self.map.id, self.source_model.id, MappingPlan(1, 1))
+
+        assert plan_cache.get(self.map.id, self.source_model.id) is None
+
+    def test_plans_are_checked_against_the_spec_version(self):
+        version_ttl, plan_cache.version_ttl = plan_cache.version_ttl, 0
+        try:
+            plan = plan_cache.get_or_build(
+                self.map.id, self.source_model.id, lambda: MappingPlan(1, 1)
+            )
+            assert plan_cache.get(self.map.id, self.source_model.id) is plan
+
+            # Bumped by another process, whose signals do not reach this one
+            Mapper.objects.filter(id=self.map.id).update(spec_version=99)
+            assert plan_cache.get(self.map.id, self.source_model.id) is None
+        finally:
+            plan_cache.version_ttl = version_ttl
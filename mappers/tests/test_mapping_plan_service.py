@@ -0,0 +1,271 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test import TestCase
+
+from mappers.exceptions import NotFoundError
+from mappers.factories import (
+    build_json_mapper_service,
+    build_map_service,
+    create_field_maps,
+    create_model_from_dto,
+)
+from mappers.models import (
+    FieldMap,
+    FieldTypeChoices,
+    Transformer,
+    TransformerTypeChoices,
+)
+from mappers.services.mapping_plan_service import MappingPlanService
+from mappers.services.mapping_spec_service import MappingSpecService
+from mappers.services.memoization import MemoizedTransform
+from mappers.services.model_field_service import (
+    RECURSIVE_CTE_VENDORS,
+    ModelFieldService,
+)
+from mappers.services.plan_compiler import PlanCompiler
+
+
+@pytest.mark.django_db
+class TestMappingPlanService(TestCase):
+    """
+    Test suite for compiled mapping plans
+    """
+
+    def setUp(self):
+        self.map_service = build_map_service()
+        self.json_mapper_service = build_json_mapper_service(self.map_service)
+        self.plan_service = MappingPlanService(
+            map_service=self.map_service, model_field_service=ModelFieldService()
+        )
+
+        self.source_dto = {
+            "name": "Mike",
+            "tags": ["a", "b"],
+            "address": {"street": "123 Road"},
+            "skills": [{"name": "Typing"}],
+        }
+        self.source_model = create_model_from_dto(
+            self.json_mapper_service, self.source_dto
+        )
+        self.target_model = create_model_from_dto(
+            self.json_mapper_service,
+            {
+                "target_name": "Mike",
+                "target_tags": ["a", "b"],
+                "target_address": {"target_street": "123 Road"},
+                "target_skills": [{"target_name": "Typing"}],
+            },
+        )
+        self.map = self.map_service.create_map(self.source_model, self.target_model)
+        self.transformer = Transformer.objects.create(
+            type=TransformerTypeChoices.UPPERCASE
+        )
+        create_field_maps(
+            self.map_service,
+            self.map,
+            self.source_model,
+            self.target_model,
+            transformers={"name": self.transformer},
+        )
+
+    def test_build_plan(self):
+        plan = self.plan_service.build_plan(
+            map_id=self.map.id, source_model_id=self.source_model.id
+        )
+        fields = {field_plan.source_name: field_plan for field_plan in plan.fields}
+
+        assert plan.model_id == self.source_model.id
+        assert fields["name"].target_name == "target_name"
+        assert fields["name"].transform("mike") == "MIKE"
+        assert fields["tags"].list_item_type is FieldTypeChoices.STRING
+        assert fields["address"].object_plan.fields[0].target_name == "target_street"
+        assert fields["skills"].object_plan.fields[0].transform is not None
+
+    def test_list_of_primitives_is_transformed_as_a_batch(self):
+        field_map = FieldMap.objects.get(mapper=self.map, source_field__name="tags")
+        field_map.transformer = self.transformer
+        field_map.save()
+
+        plan = self.plan_service.build_plan(
+            map_id=self.map.id, source_model_id=self.source_model.id
+        )
+        response = self.json_mapper_service.map_to_target_dto_with_plan(
+            source_dto=self.source_dto, plan=plan
+        )
+
+        assert response["target_tags"] == ["A", "B"]
+
+    def test_build_plan_query_count_is_constant(self):
+        # A stale spec is rebuilt under the mapper's row lock from the
+        # FieldMaps, their transformer chains and the model graph, which takes
+        # one query per nesting level where recursive CTEs are not used
+        graph_queries = 1 if connection.vendor in RECURSIVE_CTE_VENDORS else 3
+        with self.assertNumQueries(7 + graph_queries):
+            self.plan_service.build_plan(
+                map_id=self.map.id, source_model_id=self.source_model.id
+            )
+
+        # A fresh spec is a single primary key read
+        with self.assertNumQueries(1):
+            self.plan_service.build_plan(
+                map_id=self.map.id, source_model_id=self.source_model.id
+            )
+
+    def test_spec_is_rebuilt_after_field_map_changes(self):
+        self.plan_service.build_plan(
+            map_id=self.map.id, source_model_id=self.source_model.id
+        )
+        self.map.refresh_from_db()
+        version = self.map.spec_version
+        assert self.map.spec["version"] == version
+
+        field_map = FieldMap.objects.get(mapper=self.map, source_field__name="tags")
+        field_map.transformer = self.transformer
+        with self.captureOnCommitCallbacks(execute=True):
+            field_map.save()
+        self.map.refresh_from_db()
+        assert self.map.spec is None
+        # Bumped again on commit, although the spec was already stale
+        assert self.map.spec_version == version + 2
+
+        plan = self.plan_service.build_plan(
+            map_id=self.map.id, source_model_id=self.source_model.id
+        )
+        self.map.refresh_from_db()
+        fields = {field_plan.source_name: field_plan for field_plan in plan.fields}
+        assert fields["tags"].transformer_type == TransformerTypeChoices.UPPERCASE
+        assert self.map.spec["version"] == self.map.spec_version == version + 2
+
+    def test_spec_of_a_rebuild_raced_by_an_invalidation_is_not_stored(self):
+        build_spec = self.plan_service.spec_service.build_spec
+
+        def build_spec_then_invalidate(*args):
+            spec = build_spec(*args)
+            MappingSpecService.invalidate_specs([self.map.id])
+            return spec
+
+        with mock.patch.object(
+            self.plan_service.spec_service, "build_spec", build_spec_then_invalidate
+        ):
+            spec = self.plan_service.spec_service.get_spec(self.map.id)
+
+        self.map.refresh_from_db()
+        assert spec["version"] == self.map.spec_version - 1
+        assert self.map.spec is None
+
+    def test_memoized_transformers(self):
+        self.transformer.memoize_size = 16
+        self.transformer.save()
+        field_map = FieldMap.objects.get(
+            mapper=self.map,
+            source_field__name="name",
+            source_field__model=self.source_model,
+        )
+        field_map.memoize_size = 0
+        field_map.save()
+
+        plan = self.plan_service.build_plan(
+            map_id=self.map.id, source_model_id=self.source_model.id
+        )
+        fields = {field_plan.source_name: field_plan for field_plan in plan.fields}
+        skill_name = fields["skills"].object_plan.fields[0]
+
+        # The FieldMap override turns memoization off for the root name only
+        assert not isinstance(fields["name"].transform, MemoizedTransform)
+        assert isinstance(skill_name.transform, MemoizedTransform)
+        assert skill_name.transform.maxsize == 16
+        assert skill_name.transform("typing") == "TYPING"
+
+    def test_transformer_chain_is_fused(self):
+        field_map = FieldMap.objects.get(mapper=self.map, source_field__name="tags")
+        field_map.transformer = Transformer.objects.create(
+            type=TransformerTypeChoices.LOWERCASE
+        )
+        field_map.save()
+        self.map_service.add_chained_transformer(
+            field_map,
+            Transformer.objects.create(type=TransformerTypeChoices.CAPITALIZE),
+        )
+
+        plan = self.plan_service.build_plan(
+            map_id=self.map.id, source_model_id=self.source_model.id
+        )
+        fields = {field_plan.source_name: field_plan for field_plan in plan.fields}
+        response = self.json_mapper_service.map_to_target_dto_with_plan(
+            source_dto=dict(self.source_dto, tags=["sALES", "hr"]), plan=plan
+        )
+
+        assert fields["tags"].transformer_type == "LOWERCASE>CAPITALIZE"
+        assert fields["tags"].transform("sALES") == "Sales"
+        assert response["target_tags"] == ["Sales", "Hr"]
+        assert PlanCompiler().compile(plan)(
+            dict(self.source_dto, name="ann", tags=["sALES", "hr"])
+        ) == dict(response, target_name="ANN")
+
+    def test_transformer_options_reach_the_plan(self):
+        field_map = FieldMap.objects.get(mapper=self.map, source_field__name="tags")
+        field_map.transformer = Transformer.objects.create(
+            type=TransformerTypeChoices.FORMAT_DATETIME,
+            options={"input_format": "%d/%m/%Y", "output_format": "%Y-%m-%d"},
+        )
+        field_map.save()
+
+        plan = self.plan_service.build_plan(
+            map_id=self.map.id, source_model_id=self.source_model.id
+        )
+        response = self.json_mapper_service.map_to_target_dto_with_plan(
+            source_dto=dict(self.source_dto, tags=["10/11/1990", "1/2/2021"]),
+            plan=plan,
+        )
+
+        assert response["target_tags"] == ["1990-11-10", "2021-02-01"]
+
+    def test_enum_map_uses_field_choices(self):
+        field_map = FieldMap.objects.get(
+            mapper=self.map,
+            source_field__name="name",
+            source_field__model=self.source_model,
+        )
+        field_map.source_field.choices = ["Mike", "Ann"]
+        field_map.source_field.save()
+        field_map.target_field.choices = ["MICHAEL", "ANNA"]
+        field_map.target_field.save()
+        field_map.transformer = Transformer.objects.create(
+            type=TransformerTypeChoices.ENUM_MAP,
+            options={"mapping": {"Mike": "MICHAEL", "Ann": "ANNA"}, "default": None},
+        )
+        field_map.save()
+
+        plan = self.plan_service.build_plan(
+            map_id=self.map.id, source_model_id=self.source_model.id
+        )
+        map_dto = PlanCompiler().compile(plan)
+
+        assert map_dto(self.source_dto)["target_name"] == "MICHAEL"
+        assert map_dto(dict(self.source_dto, name="Bob"))["target_name"] is None
+
+    def test_map_with_plan_does_not_query(self):
+        plan = self.json_mapper_service.get_mapping_plan(
+            source_model_id=self.source_model.id, map_id=self.map.id
+        )
+        with self.assertNumQueries(0):
+            response = self.json_mapper_service.map_to_target_dto_with_plan(
+                source_dto=self.source_dto, plan=plan
+            )
+
+        assert response == {
+            "target_name": "MIKE",
+            "target_tags": ["a", "b"],
+            "target_address": {"target_street": "123 Road"},
+            "target_skills": [{"target_name": "TYPING"}],
+        }
+
+    def test_build_plan_with_unmapped_field_raises_error(self):
+        FieldMap.objects.filter(mapper=self.map, source_field__name="street").delete()
+
+        with self.assertRaises(NotFoundError):
+            self.plan_service.build_plan(
+                map_id=self.map.id, source_model_id=self.source_model.id
+            )
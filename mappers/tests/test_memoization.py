@@ -0,0 +1,103 @@
+import pickle
+
+from django.test import SimpleTestCase
+
+from mappers.metrics import collect_transformer_memos
+from mappers.services.memoization import MemoizedTransform
+
+
+class Counting:
+    def __init__(self, function):
+        self.function = function
+        self.calls = 0
+
+    def __call__(self, value):
+        self.calls += 1
+        return self.function(value)
+
+
+class TestMemoizedTransform(SimpleTestCase):
+    """
+    Test suite for memoized transformers
+    """
+
+    def test_repeated_values_are_cached(self):
+        function = Counting(str.upper)
+        memo = MemoizedTransform(function, maxsize=2, transformer_type="UPPERCASE")
+
+        assert memo.transform_batch(["a", "b", "a", "a", "b"]) == list("ABAAB")
+        assert function.calls == 2
+        assert memo.stats() == {
+            "hits": 3,
+            "misses": 2,
+            "size": 2,
+            "hit_rate": 0.6,
+            "bypassed": False,
+        }
+
+    def test_least_recently_used_value_is_evicted(self):
+        function = Counting(str.upper)
+        memo = MemoizedTransform(function, maxsize=2)
+
+        for value in ["a", "b", "a", "c", "a", "b"]:
+            memo(value)
+
+        # "b" was evicted by "c", "a" stayed as it kept being used
+        assert function.calls == 4
+
+    def test_values_are_cached_by_type(self):
+        memo = MemoizedTransform(str, maxsize=8)
+
+        assert [memo(value) for value in (1, 1.0, True)] == ["1", "1.0", "True"]
+
+    def test_unhashable_values_and_errors_are_not_cached(self):
+        function = Counting(len)
+        memo = MemoizedTransform(function, maxsize=8)
+
+        assert memo([1, 2]) == 2
+        with self.assertRaises(TypeError):
+            memo(1)
+        assert memo.stats()["size"] == 0
+
+    def test_high_cardinality_fields_are_bypassed(self):
+        function = Counting(str)
+        memo = MemoizedTransform(function, maxsize=100, sample_size=10)
+
+        for value in range(20):
+            memo(value)
+
+        stats = memo.stats()
+        assert stats["bypassed"] is True
+        assert stats["size"] == 0
+        assert stats["misses"] == 10
+        assert function.calls == 20
+
+    def test_low_cardinality_fields_stay_cached(self):
+        memo = MemoizedTransform(str, maxsize=100, sample_size=10)
+
+        for value in range(20):
+            memo(value % 2)
+
+        assert memo.stats()["bypassed"] is False
+
+    def test_pickled_memo_starts_empty(self):
+        memo = MemoizedTransform(str.upper, maxsize=4, transformer_type="UPPERCASE")
+        memo("a")
+
+        copy = pickle.loads(pickle.dumps(memo))
+
+        assert copy("a") == "A"
+        assert copy.stats()["misses"] == 1
+        assert copy.transformer_type == "UPPERCASE"
+
+    def test_stats_are_exported_per_transformer(self):
+        memo = MemoizedTransform(str.upper, maxsize=4, transformer_type="TEST_UPPER")
+        memo("a")
+        memo("a")
+
+        lines = [
+            line for metric in collect_transformer_memos() for line in metric.collect()
+        ]
+
+        assert 'mapping_transformer_memo_hits{transformer="TEST_UPPER"} 1' in lines
+        assert 'mapping_transformer_memo_size{transformer="TEST_UPPER"} 1' in lines
@@ -0,0 +1,106 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test import TestCase
+
+from mappers.models import Field, FieldTypeChoices, Model
+from mappers.serializers import ModelSerializer
+from mappers.services.model_field_service import ModelFieldService
+
+
+@pytest.mark.django_db
+class TestModelFieldService(TestCase):
+    """
+    Test suite for Model Field Service
+    """
+
+    def setUp(self):
+        # Root -> level_1 -> ... -> level_8, plus an empty nested model
+        self.root = Model.objects.create(name="Root")
+        self.nested = []
+        parent = self.root
+        for depth in range(1, 9):
+            model = Model.objects.create(name=f"level_{depth}")
+            Field.objects.create(
+                name="id", type=FieldTypeChoices.STRING, model=parent, choices=["a"]
+            )
+            Field.objects.create(
+                name=f"child_{depth}",
+                type=FieldTypeChoices.OBJECT,
+                object_model=model,
+                model=parent,
+            )
+            self.nested.append(model)
+            parent = model
+        self.empty = Model.objects.create(name="empty")
+        Field.objects.create(
+            name="empty",
+            type=FieldTypeChoices.OBJECT,
+            object_model=self.empty,
+            model=parent,
+        )
+        self.unrelated = Model.objects.create(name="unrelated")
+
+    def test_get_model_graph_iterative(self):
+        with mock.patch(
+            "mappers.services.model_field_service.RECURSIVE_CTE_VENDORS", ()
+        ):
+            graph = ModelFieldService.get_model_graph(self.root.id)
+
+        self._assert_graph(graph)
+
+    def test_get_enclosing_model_ids(self):
+        assert ModelFieldService.get_enclosing_model_ids(self.nested[2].id) == {
+            self.root.id,
+            *(model.id for model in self.nested[:3]),
+        }
+        assert ModelFieldService.get_enclosing_model_ids(self.unrelated.id) == {
+            self.unrelated.id
+        }
+
+    def test_get_model_graph_recursive(self):
+        with mock.patch(
+            "mappers.services.model_field_service.RECURSIVE_CTE_VENDORS",
+            (connection.vendor,),
+        ):
+            with self.assertNumQueries(1):
+                graph = ModelFieldService.get_model_graph(self.root.id)
+
+        self._assert_graph(graph)
+
+    def test_get_model_graph_of_unknown_model_has_no_root(self):
+        graph = ModelFieldService.get_model_graph(-1)
+
+        assert graph.root is None
+
+    def test_model_graph_can_be_serialized_without_queries(self):
+        graph = ModelFieldService.get_model_graph(self.root.id)
+
+        with self.assertNumQueries(0):
+            data = ModelSerializer(graph.root).data
+
+        assert [field["name"] for field in data["fields"]] == ["id", "child_1"]
+        assert data["fields"][1]["object_model"]["name"] == "level_1"
+
+    def _assert_graph(self, graph):
+        assert graph.root == self.root
+        assert len(graph) == 10
+        assert self.unrelated.id not in graph
+        assert graph.get_fields(self.empty.id) == []
+
+        with self.assertNumQueries(0):
+            model = graph.root
+            depth = 0
+            while True:
+                fields = {field.name: field for field in model.fields.all()}
+                child = fields.get(f"child_{depth + 1}")
+                if not child:
+                    break
+                assert fields["id"].choices == ["a"]
+                assert child.model is model
+                model = child.object_model
+                depth += 1
+
+        assert depth == 8
+        assert model.name == "level_8"
@@ -0,0 +1,210 @@
+import os
+import pickle
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+import pytest
+from django.test import TestCase
+
+from mappers.constants import MappingEngine
+from mappers.factories import (
+    build_json_mapper_service,
+    build_map_service,
+    create_field_maps,
+    create_model_from_dto,
+)
+from mappers.metrics import TRANSFORMER_ERRORS
+from mappers.models import Transformer, TransformerTypeChoices
+from mappers.services.json_mapper_factory import ObjectMapper
+from mappers.services.mapping_pool import MappingProcessPool
+from mappers.services.plan_compiler import PlanCompiler
+
+
+@pytest.mark.django_db
+class TestPlanCompiler(TestCase):
+    """
+    Test suite for the code generating mapping engine
+    """
+
+    def setUp(self):
+        self.map_service = build_map_service()
+        self.json_mapper_service = build_json_mapper_service(
+            self.map_service, engine=MappingEngine.COMPILED
+        )
+        self.interpreted_service = build_json_mapper_service(
+            self.map_service, engine=MappingEngine.INTERPRETED
+        )
+
+        self.source_dto = {
+            "name": "Mike",
+            "scores": ["1.5", "2"],
+            "address": {"street": "123 Road", "geo": {"lat": 1.5}},
+            "skills": [{"name": "Typing", "tags": ["a"]}],
+        }
+        self.source_model = create_model_from_dto(
+            self.json_mapper_service, self.source_dto
+        )
+        self.target_model = create_model_from_dto(
+            self.json_mapper_service,
+            {
+                "target_name": "Mike",
+                "target_scores": ["1.5", "2"],
+                "target_address": {
+                    "target_street": "123 Road",
+                    "target_geo": {"target_lat": 1.5},
+                },
+                "target_skills": [{"target_name": "Typing", "target_tags": ["a"]}],
+            },
+        )
+        self.map = self.map_service.create_map(self.source_model, self.target_model)
+        self.transformers = {
+            "name": Transformer.objects.create(type=TransformerTypeChoices.UPPERCASE),
+            "scores": Transformer.objects.create(
+                type=TransformerTypeChoices.STRING_TO_FLOAT
+            ),
+        }
+        create_field_maps(
+            self.map_service,
+            self.map,
+            self.source_model,
+            self.target_model,
+            transformers=self.transformers,
+        )
+        self.plan = self.json_mapper_service.get_mapping_plan(
+            source_model_id=self.source_model.id, map_id=self.map.id
+        )
+
+    def test_compiled_engine_matches_interpreted_engine(self):
+        compiled = self.json_mapper_service.map_to_target_dto_with_plan(
+            source_dto=self.source_dto, plan=self.plan
+        )
+        interpreted = self.interpreted_service.map_to_target_dto_with_plan(
+            source_dto=self.source_dto, plan=self.plan
+        )
+
+        assert compiled == interpreted
+        assert compiled == {
+            "target_name": "MIKE",
+            "target_scores": [1.5, 2.0],
+            "target_address": {
+                "target_street": "123 Road",
+                "target_geo": {"target_lat": 1.5},
+            },
+            "target_skills": [{"target_name": "TYPING", "target_tags": ["a"]}],
+        }
+
+    def test_compiled_engine_counts_transformer_errors(self):
+        cases = [
+            ("STRING_TO_FLOAT", {**self.source_dto, "scores": ["x"]}, ValueError),
+            (
+                "UPPERCASE",
+                {**self.source_dto, "skills": [{"name": 1, "tags": []}]},
+                TypeError,
+            ),
+        ]
+        for transformer, source_dto, error in cases:
+            errors = TRANSFORMER_ERRORS.get(transformer=transformer)
+            with self.assertRaises(error):
+                self.json_mapper_service.map_to_target_dto_with_plan(
+                    source_dto=source_dto, plan=self.plan
+                )
+            assert TRANSFORMER_ERRORS.get(transformer=transformer) == errors + 1
+
+        # A missing value is not the transformer's error
+        errors = TRANSFORMER_ERRORS.get(transformer="UPPERCASE")
+        with self.assertRaises(KeyError):
+            self.json_mapper_service.map_to_target_dto_with_plan(
+                source_dto={"scores": []}, plan=self.plan
+            )
+        assert TRANSFORMER_ERRORS.get(transformer="UPPERCASE") == errors
+
+    def test_compiled_function_is_kept_on_the_plan(self):
+        compiler = PlanCompiler()
+        function = compiler.get_function(self.plan)
+
+        assert self.plan.compiled is function
+        assert compiler.get_function(self.plan) is function
+
+    def test_compiled_engine_raises_reference_errors(self):
+        with mock.patch.object(ObjectMapper, "map_to_target") as map_to_target:
+            with self.assertRaises(KeyError):
+                self.json_mapper_service.map_to_target_dto_with_plan(
+                    source_dto={"name": "Mike"}, plan=self.plan
+                )
+
+        # The dto is not mapped a second time by the interpreted engine
+        map_to_target.assert_not_called()
+
+    def test_plan_that_does_not_compile_is_interpreted(self):
+        with mock.patch.object(PlanCompiler, "compile", side_effect=SyntaxError):
+            response = self.json_mapper_service.map_to_target_dto_with_plan(
+                source_dto=self.source_dto, plan=self.plan
+            )
+
+        assert response["target_name"] == "MIKE"
+        assert self.plan.compiled is None
+
+    def test_plan_pickles_without_compiled_function(self):
+        PlanCompiler().get_function(self.plan)
+
+        plan = pickle.loads(pickle.dumps(self.plan))
+
+        assert plan.compiled is None
+        assert self.interpreted_service.map_to_target_dto_with_plan(
+            source_dto=self.source_dto, plan=plan
+        ) == self.interpreted_service.map_to_target_dto_with_plan(
+            source_dto=self.source_dto, plan=self.plan
+        )
+
+    def test_process_pool_maps_in_input_order(self):
+        pool = MappingProcessPool(max_workers=2, chunk_size=3)
+        self.json_mapper_service.process_pool = pool
+        self.json_mapper_service.process_pool_min_batch_size = 1
+        source_dtos = [{**self.source_dto, "name": f"name {n}"} for n in range(10)]
+
+        try:
+            target_dtos = self.json_mapper_service.map_many_to_target_dtos(
+                source_dtos=source_dtos,
+                source_model_id=self.source_model.id,
+                map_id=self.map.id,
+            )
+        finally:
+            pool.shutdown()
+
+        assert [dto["target_name"] for dto in target_dtos] == [
+            f"NAME {n}" for n in range(10)
+        ]
+        assert target_dtos[0]["target_scores"] == [1.5, 2.0]
+
+    def test_process_pool_reports_worker_transformer_errors(self):
+        pool = MappingProcessPool(max_workers=1)
+        errors = TRANSFORMER_ERRORS.get(transformer="STRING_TO_FLOAT")
+        try:
+            with self.assertRaises(ValueError):
+                pool.map(
+                    self.plan,
+                    [{**self.source_dto, "scores": ["x"]}],
+                    MappingEngine.COMPILED,
+                )
+        finally:
+            pool.shutdown()
+
+        assert TRANSFORMER_ERRORS.get(transformer="STRING_TO_FLOAT") == errors + 1
+
+    def test_process_pool_replaces_a_broken_executor(self):
+        pool = MappingProcessPool(max_workers=1)
+        try:
+            broken = pool.executor
+            with pytest.raises(BrokenProcessPool):
+                broken.submit(os._exit, 1).result()
+            with pytest.raises(BrokenProcessPool):
+                pool.map(self.plan, [self.source_dto], MappingEngine.COMPILED)
+
+            assert pool.executor is not broken
+            [target_dto] = pool.map(
+                self.plan, [self.source_dto], MappingEngine.COMPILED
+            )
+        finally:
+            pool.shutdown()
+
+        assert target_dto["target_name"] == "MIKE"
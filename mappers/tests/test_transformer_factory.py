@@ -0,0 +1,243 @@
+import pickle
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase
+
+from mappers.metrics import ENUM_UNKNOWNS
+from mappers.models import Transformer, TransformerTypeChoices
+from mappers.services.datetime_parsing import get_datetime_parser
+from mappers.services.transformer_factory import TransformerFactory
+
+
+class TestTransformerFactory(SimpleTestCase):
+    """
+    Test suite for field transformers
+    """
+
+    def setUp(self):
+        self.factory = TransformerFactory()
+
+    def test_transform_batch_matches_transform(self):
+        values = {
+            TransformerTypeChoices.UPPERCASE: ["a", "Bc", ""],
+            TransformerTypeChoices.LOWERCASE: ["A", "bC", ""],
+            TransformerTypeChoices.CAPITALIZE: ["a", "bC", ""],
+            TransformerTypeChoices.STRING_TO_FLOAT: ["1", "2.5", "-3e2"],
+            TransformerTypeChoices.STRING_TO_INTEGER: ["1", " -2 ", 3],
+            TransformerTypeChoices.STRING_TO_BOOLEAN: ["true", "No", " 1 ", False],
+            TransformerTypeChoices.NUMBER_TO_STRING: [1, 2.5, -3],
+        }
+        for type, column in values.items():
+            transformer = self.factory.get_transformer_by_type(type)
+
+            assert transformer.transform_batch(column) == [
+                transformer.transform(value) for value in column
+            ]
+
+    def test_transform_batch_raises_on_invalid_value(self):
+        transformer = self.factory.get_transformer_by_type(
+            TransformerTypeChoices.STRING_TO_FLOAT
+        )
+
+        with self.assertRaises(ValueError):
+            transformer.transform_batch(["1", "one"])
+
+    def test_every_transformer_type_is_implemented(self):
+        for type in TransformerTypeChoices:
+            assert self.factory.get_transformer_by_type(type)
+
+    def test_string_to_boolean(self):
+        transformer = self.factory.get_transformer_by_type(
+            TransformerTypeChoices.STRING_TO_BOOLEAN
+        )
+
+        assert transformer.transform_batch(["Yes", "off", "T", True]) == [
+            True,
+            False,
+            True,
+            True,
+        ]
+        with self.assertRaises(ValueError):
+            transformer.transform("maybe")
+
+    def test_chain_applies_transformers_in_order(self):
+        chain = self.factory.get_chain(
+            [
+                TransformerTypeChoices.STRING_TO_FLOAT,
+                TransformerTypeChoices.NUMBER_TO_STRING,
+                TransformerTypeChoices.UPPERCASE,
+            ]
+        )
+
+        assert chain.name == "STRING_TO_FLOAT>NUMBER_TO_STRING>UPPERCASE"
+        assert chain.transform("1e400") == "INF"
+        assert chain.transform_batch(["2", "-inf"]) == ["2.0", "-INF"]
+
+    def test_single_transformer_chain_is_not_wrapped(self):
+        chain = self.factory.get_chain([TransformerTypeChoices.UPPERCASE])
+
+        assert chain.transform is str.upper
+
+    def test_chain_survives_pickling(self):
+        chain = self.factory.get_chain(
+            [TransformerTypeChoices.LOWERCASE, TransformerTypeChoices.CAPITALIZE],
+            memoize_size=8,
+        )
+
+        copy = pickle.loads(pickle.dumps(chain))
+
+        assert copy.transform("hELLO") == "Hello"
+        assert copy.memo is not None and copy.memo.maxsize == 8
+
+    def test_datetime_transformers(self):
+        to_epoch = self.factory.get_transformer_by_type(
+            TransformerTypeChoices.DATETIME_TO_EPOCH
+        )
+        to_datetime = self.factory.get_transformer_by_type(
+            TransformerTypeChoices.EPOCH_TO_DATETIME, {"unit": "ms"}
+        )
+        reformat = self.factory.get_transformer_by_type(
+            TransformerTypeChoices.FORMAT_DATETIME,
+            {"input_format": "%d/%m/%Y %H:%M", "output_format": "%Y-%m-%d"},
+        )
+
+        assert to_epoch.transform("1990-11-10T00:00:00Z") == 658195200
+        assert to_epoch.transform_batch(
+            ["1990-11-10T00:00:00.5+01:00", "1990-11-10"]
+        ) == [658191600.5, 658195200]
+        assert to_datetime.transform(658195200500) == "1990-11-10T00:00:00.500000Z"
+        assert reformat.transform_batch(["10/11/1990 12:30"]) == ["1990-11-10"]
+
+    def test_datetime_parsers_match_strptime(self):
+        cases = [
+            ("%Y-%m-%dT%H:%M:%S.%f%z", "1990-11-10T07:05:09.25-05:30"),
+            ("%d.%m.%Y", "1.2.2021"),
+            ("%H:%M", "23:59"),
+            ("%Y%m%d", "19901110"),
+            ("%Y%m%d", "2024131"),
+            ("%H%M", "930"),
+            ("%d %m %Y", "10  11 1990"),
+            ("%H:%M%z", "10:30+05:30:15"),
+            ("%d %b %Y", "10 Nov 1990"),
+        ]
+        for format, value in cases:
+            assert get_datetime_parser(format)(value) == datetime.strptime(
+                value, format
+            )
+
+        assert get_datetime_parser("%Y-%m-%d") is get_datetime_parser("%Y-%m-%d")
+        for format, value in [
+            ("%Y-%m-%d", "1990-13-01"),
+            ("%Y-%m-%d", "1990/1/1"),
+            ("%d.%m.%Y", "31.2.2021"),
+        ]:
+            with self.assertRaises(ValueError):
+                get_datetime_parser(format)(value)
+
+    def test_invalid_options_raise(self):
+        for type, options in [
+            (TransformerTypeChoices.UPPERCASE, {"unit": "s"}),
+            (TransformerTypeChoices.FORMAT_DATETIME, {"format": "%Y"}),
+            (TransformerTypeChoices.DATETIME_TO_EPOCH, {"unit": "days"}),
+        ]:
+            with self.assertRaises(ValueError):
+                self.factory.get_transformer_by_type(type, options)
+
+    def test_transformer_clean_rejects_invalid_options(self):
+        for options in [{"unit": "days"}, {"format": "%Y"}, ["%Y"]]:
+            transformer = Transformer(
+                type=TransformerTypeChoices.DATETIME_TO_EPOCH, options=options
+            )
+            with self.assertRaises(ValidationError):
+                transformer.clean()
+
+        Transformer(
+            type=TransformerTypeChoices.DATETIME_TO_EPOCH,
+            options={"input_format": "%d.%m.%Y", "unit": "ms"},
+        ).clean()
+
+    def test_configured_chain_survives_pickling(self):
+        chain = self.factory.get_chain(
+            [TransformerTypeChoices.FORMAT_DATETIME, TransformerTypeChoices.UPPERCASE],
+            [{"output_format": "%d %b %Y"}, None],
+        )
+
+        copy = pickle.loads(pickle.dumps(chain))
+
+        assert copy.transform("1990-11-10T00:00:00Z") == "10 NOV 1990"
+
+    def test_enum_map(self):
+        transformer = self.factory.get_transformer_by_type(
+            TransformerTypeChoices.ENUM_MAP,
+            {
+                "source_choices": ["M", "F", "X"],
+                "target_choices": ["MALE", "FEMALE", "OTHER"],
+                "mapping": {"M": "MALE", "F": "FEMALE", "X": "FEMALE"},
+                "default": "UNKNOWN",
+            },
+        )
+
+        assert transformer.transform_batch(["M", "X", "F", "?"]) == [
+            "MALE",
+            "FEMALE",
+            "FEMALE",
+            "UNKNOWN",
+        ]
+
+    def test_enum_map_never_pairs_choices_by_position(self):
+        transformer = self.factory.get_transformer_by_type(
+            TransformerTypeChoices.ENUM_MAP,
+            {
+                "source_choices": ["active", "inactive", " Pending", "M"],
+                "target_choices": ["inactive", "active", "PENDING", "MALE"],
+            },
+        )
+
+        assert transformer.lookup == {
+            "active": "active",
+            "inactive": "inactive",
+            " Pending": "PENDING",
+        }
+
+    def test_enum_map_is_not_memoized(self):
+        chain = self.factory.get_chain(
+            [TransformerTypeChoices.ENUM_MAP],
+            [
+                {
+                    "source_choices": ["a"],
+                    "target_choices": ["a"],
+                    "map_id": 2,
+                    "field_id": 9,
+                }
+            ],
+            memoize_size=16,
+        )
+        unknowns = ENUM_UNKNOWNS.get(map_id=2, field_id=9)
+
+        assert chain.memo is None
+        assert chain.transform_batch(["b", "b", "a"]) == ["b", "b", "a"]
+        assert ENUM_UNKNOWNS.get(map_id=2, field_id=9) == unknowns + 2
+
+    def test_enum_map_matches_shared_choices_and_keeps_unknowns(self):
+        transformer = self.factory.get_transformer_by_type(
+            TransformerTypeChoices.ENUM_MAP,
+            {
+                "source_choices": [1, 2, 3],
+                "target_choices": [1, 2],
+                "mapping": {"3": 2},
+                "map_id": 1,
+                "field_id": 7,
+            },
+        )
+        unknowns = ENUM_UNKNOWNS.get(map_id=1, field_id=7)
+
+        assert transformer.transform_batch([1, 3, 4]) == [1, 2, 4]
+        assert ENUM_UNKNOWNS.get(map_id=1, field_id=7) == unknowns + 1
+
+    def test_enum_map_rejects_values_outside_target_choices(self):
+        with self.assertRaises(ValueError):
+            self.factory.get_transformer_by_type(
+                TransformerTypeChoices.ENUM_MAP,
+                {"target_choices": ["A"], "mapping": {"a": "B"}},
+            )
@@ -0,0 +1,222 @@
+import json
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from mappers.factories import (
+    build_json_mapper_service,
+    build_map_service,
+    create_field_maps,
+    create_model_from_dto,
+)
+from mappers.metrics import MAPPED_RECORDS, TRANSFORMER_ERRORS
+from mappers.models import Transformer, TransformerTypeChoices
+
+
+@pytest.mark.django_db
+class TestJsonMapperViewSet(TestCase):
+    """
+    Test suite for JSON Mapper views
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            user=User.objects.create_user(username="test", password="test")
+        )
+
+        self.map_service = build_map_service()
+        json_mapper_service = build_json_mapper_service(self.map_service)
+        self.source_model = create_model_from_dto(
+            json_mapper_service, {"id": 1, "name": "Mike"}
+        )
+        self.target_model = create_model_from_dto(
+            json_mapper_service, {"target_id": 1, "target_name": "M"}
+        )
+        self.map = self.map_service.create_map(self.source_model, self.target_model)
+        create_field_maps(
+            self.map_service,
+            self.map,
+            self.source_model,
+            self.target_model,
+            transformers={
+                "name": Transformer.objects.create(
+                    type=TransformerTypeChoices.UPPERCASE
+                )
+            },
+        )
+
+    def test_map_ndjson_streams_mapped_records(self):
+        body = "\n".join(
+            [
+                json.dumps({"id": 1, "name": "Mike"}),
+                "",
+                json.dumps({"id": 2, "name": "Jane"}),
+            ]
+        )
+        response = self._post_ndjson(body)
+
+        assert response.status_code == 200
+        assert response.streaming
+        assert self._read_lines(response) == [
+            {"line": 1, "data": {"target_id": 1, "target_name": "MIKE"}},
+            {"line": 3, "data": {"target_id": 2, "target_name": "JANE"}},
+        ]
+
+    def test_map_ndjson_reports_line_errors_inline(self):
+        body = "\n".join(
+            [
+                "{not json",
+                json.dumps({"id": 2}),
+                json.dumps({"id": 3, "name": 3}),
+                json.dumps({"id": 4, "name": "Jo"}),
+            ]
+        )
+        lines = self._read_lines(self._post_ndjson(body))
+
+        assert [line["line"] for line in lines] == [1, 2, 3, 4]
+        assert "error" in lines[0]
+        assert lines[1]["error"] == "Missing field: 'name'"
+        assert "error" in lines[2]
+        assert lines[3]["data"] == {"target_id": 4, "target_name": "JO"}
+
+    def test_map_ndjson_keeps_streaming_after_any_error(self):
+        body = "\n".join(json.dumps({"id": i, "name": "Jo"}) for i in (1, 2))
+        with mock.patch(
+            "mappers.api.json_mapper_api.JSONMapperService.map_to_target_dto_with_plan",
+            side_effect=[OverflowError("date value out of range"), {"target_id": 2}],
+        ):
+            lines = self._read_lines(self._post_ndjson(body))
+
+        assert lines == [
+            {"line": 1, "error": "date value out of range"},
+            {"line": 2, "data": {"target_id": 2}},
+        ]
+
+    def test_map_ndjson_requires_map_params(self):
+        response = self.client.post(
+            "/api/mappers/json/map-ndjson",
+            data="{}",
+            content_type="application/x-ndjson",
+        )
+
+        assert response.status_code == 400
+
+    def test_map_ndjson_requires_content_length(self):
+        body = json.dumps({"id": 1, "name": "Mike"})
+        response = self._post_ndjson(
+            body, CONTENT_LENGTH="", HTTP_TRANSFER_ENCODING="chunked"
+        )
+
+        assert response.status_code == 411
+
+    def test_model_from_payload_stream(self):
+        body = json.dumps({"id": 1, "address": {"street": "Road"}, "tags": ["a"]})
+        with mock.patch(
+            "mappers.api.json_mapper_api.IntegrationsApi.save_endpoint_model"
+        ) as save_endpoint_model:
+            response = self.client.post(
+                "/api/mappers/json/model-from-payload-stream"
+                "?model_name=Streamed&endpoint_id=7",
+                data=body,
+                content_type="application/json",
+            )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["name"] == "Streamed"
+        assert {field["name"]: field["type"] for field in data["fields"]} == {
+            "id": "NUMBER",
+            "address": "OBJECT",
+            "tags": "LIST",
+        }
+        save_endpoint_model.assert_called_once_with(7, model_id=data["id"])
+
+    def test_model_from_payload_stream_rejects_invalid_json(self):
+        response = self.client.post(
+            "/api/mappers/json/model-from-payload-stream"
+            "?model_name=Streamed&endpoint_id=7",
+            data='{"id": 1,',
+            content_type="application/json",
+        )
+
+        assert response.status_code == 422
+
+    def test_metrics_count_mapped_records_and_transformer_errors(self):
+        records = MAPPED_RECORDS.get(map_id=self.map.id)
+        errors = TRANSFORMER_ERRORS.get(transformer="UPPERCASE")
+        body = "\n".join(
+            [
+                json.dumps({"id": 1, "name": "Mike"}),
+                json.dumps({"id": 2, "name": "Jane"}),
+                json.dumps({"id": 3, "name": 3}),
+            ]
+        )
+        self._read_lines(self._post_ndjson(body))
+
+        response = self.client.get("/api/metrics")
+
+        assert response.status_code == 200
+        assert MAPPED_RECORDS.get(map_id=self.map.id) == records + 2
+        assert TRANSFORMER_ERRORS.get(transformer="UPPERCASE") == errors + 1
+        content = response.content.decode()
+        assert f'mapping_records_total{{map_id="{self.map.id}"}}' in content
+        assert "mapping_plan_cache_hits_total" in content
+        assert 'view="api:json-mapper-map-ndjson"' in content
+
+    def test_trace_requires_admin(self):
+        assert self.client.get("/api/mappers/json/trace").status_code == 403
+
+    def test_trace_maps_payload_with_breakdown(self):
+        self._authenticate_admin()
+
+        response = self.client.post(
+            "/api/mappers/json/trace",
+            data={
+                "json": {"id": 1, "name": "Mike"},
+                "map_id": self.map.id,
+                "source_model_id": self.source_model.id,
+            },
+            format="json",
+        )
+
+        assert response.status_code == 200
+        assert response.data["data"] == {"target_id": 1, "target_name": "MIKE"}
+        trace = response.data["trace"]
+        assert set(trace["fields"]) == {"id", "name"}
+        assert trace["transformers"]["UPPERCASE"]["count"] == 1
+        assert trace["models"][str(self.source_model.id)]["count"] == 1
+
+    @override_settings(MAPPING_TRACE_SAMPLE_RATE=1)
+    def test_sampled_mappings_are_aggregated(self):
+        self._authenticate_admin()
+        self.client.delete("/api/mappers/json/trace")
+        body = "\n".join(json.dumps({"id": n, "name": "Mike"}) for n in range(3))
+        self._read_lines(self._post_ndjson(body))
+
+        response = self.client.get(f"/api/mappers/json/trace?map_id={self.map.id}")
+
+        assert response.data[self.map.id]["fields"]["name"]["count"] == 3
+
+    def _authenticate_admin(self):
+        self.client.force_authenticate(
+            user=User.objects.create_user(
+                username="admin", password="admin", is_staff=True
+            )
+        )
+
+    def _post_ndjson(self, body: str, **extra):
+        return self.client.post(
+            f"/api/mappers/json/map-ndjson?map_id={self.map.id}"
+            f"&source_model_id={self.source_model.id}",
+            data=body,
+            content_type="application/x-ndjson",
+            **extra,
+        )
+
+    def _read_lines(self, response):
+        content = b"".join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
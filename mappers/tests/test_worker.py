@@ -0,0 +1,268 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+from unittest import mock
+
+import pytest
+from django.test import SimpleTestCase, TestCase
+
+from mappers.events.async_worker import AsyncMappingWorker
+from mappers.events.event_handlers import get_json_mapper_service
+from mappers.events.queues import InMemoryQueueBackend, SQLiteQueueBackend
+from mappers.events.worker import MappingWorker
+from mappers.services.json_mapper_service import JSONMapperService
+
+
+class TestQueueBackends(SimpleTestCase):
+    """
+    Test suite for mapping worker queue backends
+    """
+
+    def setUp(self):
+        InMemoryQueueBackend.purge_all()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.backends = [
+            InMemoryQueueBackend("events", visibility_timeout=0.1),
+            SQLiteQueueBackend(
+                "events",
+                path=os.path.join(self.tmp_dir.name, "queue.sqlite3"),
+                visibility_timeout=0.1,
+            ),
+        ]
+
+    def tearDown(self):
+        for backend in self.backends:
+            backend.close()
+        self.tmp_dir.cleanup()
+
+    def test_acked_messages_are_not_redelivered(self):
+        for backend in self.backends:
+            backend.send_messages([{"n": 1}, {"n": 2}, {"n": 3}])
+
+            first = backend.receive_messages(max_messages=2)
+            assert [message.body["n"] for message in first] == [1, 2]
+            backend.delete_messages([message.receipt_handle for message in first])
+
+            second = backend.receive_messages(max_messages=10)
+            assert [message.body["n"] for message in second] == [3]
+            # Invisible until the visibility timeout expires
+            assert backend.receive_messages(max_messages=10) == []
+            redelivered = backend.receive_messages(max_messages=10, wait_time_seconds=1)
+            assert [message.body["n"] for message in redelivered] == [3]
+
+    def test_stale_receipt_handle_does_not_ack(self):
+        for backend in self.backends:
+            backend.send_message({"n": 1})
+            stale = backend.receive_messages()[0]
+            fresh = backend.receive_messages(wait_time_seconds=1)[0]
+
+            backend.delete_messages([stale.receipt_handle])
+            assert backend.receive_messages(wait_time_seconds=1)[0].id == fresh.id
+
+    def test_message_is_dead_lettered_after_max_receive_count(self):
+        for backend in list(self.backends):
+            backend.max_receive_count = 2
+            backend.visibility_timeout = 0
+            backend.send_message({"n": 1})
+
+            counts = [backend.receive_messages()[0].receive_count for _ in range(2)]
+            assert counts == [1, 2]
+            assert backend.receive_messages() == []
+
+            dead_letters = backend.__class__(
+                "events-dead-letter", **self._get_options(backend)
+            )
+            self.backends.append(dead_letters)
+            assert [m.body for m in dead_letters.receive_messages()] == [{"n": 1}]
+
+    def test_close_closes_every_thread_connection(self):
+        backend = self.backends[1]
+        thread = threading.Thread(target=backend.receive_messages)
+        thread.start()
+        thread.join()
+        connections = list(backend._connections)
+
+        backend.close()
+
+        assert len(connections) == 2
+        for conn in connections:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                conn.execute("SELECT 1")
+        # The backend reconnects when used again
+        assert backend.receive_messages() == []
+
+    def _get_options(self, backend):
+        if isinstance(backend, SQLiteQueueBackend):
+            return {"path": backend.path}
+        return {}
+
+
+@pytest.mark.django_db
+class TestMappingWorker(TestCase):
+    """
+    Test suite for the mapping worker
+    """
+
+    def setUp(self):
+        InMemoryQueueBackend.purge_all()
+        service = get_json_mapper_service()
+        map_service = service.json_mapper_factory.map_service
+        source_model = service.create_models_and_fields_from_type_map(
+            service.map_to_json_types({"id": 1, "name": "Mike"})
+        )
+        target_model = service.create_models_and_fields_from_type_map(
+            service.map_to_json_types({"target_id": 1, "target_name": "Mike"})
+        )
+        self.map = map_service.create_map(source_model, target_model)
+        for source_field in source_model.fields.all():
+            map_service.create_field_map(
+                source_field=source_field,
+                target_field=target_model.fields.get(
+                    name="target_" + source_field.name
+                ),
+                map=self.map,
+            )
+        self.source_model = source_model
+
+        self.queue = InMemoryQueueBackend("mapping-events")
+        self.output_queue = InMemoryQueueBackend("mapped-events")
+        self.worker = MappingWorker(queue=self.queue, output_queue=self.output_queue)
+
+    def test_process_batch_maps_pushes_and_acks(self):
+        self.queue.send_messages(
+            [
+                self._event({"id": 1, "name": "Mike"}),
+                self._event({"id": 2, "name": "Jo"}),
+            ]
+            + [{"type": "map_to_json_types", "data": {"id": 1}}]
+        )
+
+        self.worker.process_batch(self.queue.receive_messages(max_messages=10))
+
+        outputs = [message.body for message in self.output_queue.receive_messages()]
+        assert [output["data"] for output in outputs] == [
+            {"target_id": 1, "target_name": "Mike"},
+            {"target_id": 2, "target_name": "Jo"},
+            {"type": "object", "properties": {"id": {"type": "number"}}},
+        ]
+        assert outputs[0]["sync_id"] == "sync-id"
+        assert len(self.queue) == 0
+        assert self.worker.processed == 3
+
+    def test_failed_event_is_not_acked(self):
+        self.queue.send_messages(
+            [self._event({"id": 1, "name": "Mike"}), self._event({"id": 2})]
+        )
+
+        self.worker.process_batch(self.queue.receive_messages(max_messages=10))
+
+        assert len(self.output_queue) == 1
+        assert len(self.queue) == 1
+        assert self.worker.failed == 1
+
+    def test_grouped_events_are_mapped_once(self):
+        self.queue.send_messages(
+            [self._event({"id": n, "name": "Mike"}) for n in range(2)]
+            + [self._event({"id": 2})]
+        )
+
+        with mock.patch.object(
+            JSONMapperService,
+            "map_to_target_dto_with_plan",
+            autospec=True,
+            side_effect=JSONMapperService.map_to_target_dto_with_plan,
+        ) as map_to_target_dto_with_plan:
+            self.worker.process_batch(self.queue.receive_messages(max_messages=10))
+
+        assert map_to_target_dto_with_plan.call_count == 3
+        assert len(self.output_queue) == 2
+        assert (self.worker.processed, self.worker.failed) == (2, 1)
+
+    def test_async_worker_maps_pushes_and_acks(self):
+        # Warm the plan so that no ORM call has to leave the test's connection
+        get_json_mapper_service().get_mapping_plan(self.source_model.id, self.map.id)
+        self.queue.send_messages(
+            [self._event({"id": n, "name": "Mike"}) for n in range(5)]
+            + [self._event({"id": 5})]
+        )
+        worker = AsyncMappingWorker(
+            queue=self.queue,
+            output_queue=self.output_queue,
+            concurrency=2,
+            prefetch=3,
+            wait_time_seconds=0,
+        )
+
+        asyncio.run(worker.serve(max_batches=3))
+
+        outputs = [message.body for message in self.output_queue.receive_messages(10)]
+        assert sorted(output["data"]["target_id"] for output in outputs) == [
+            0,
+            1,
+            2,
+            3,
+            4,
+        ]
+        assert len(self.queue) == 1
+        assert (worker.processed, worker.failed) == (5, 1)
+
+    def test_async_worker_maps_batches_through_the_service(self):
+        get_json_mapper_service().get_mapping_plan(self.source_model.id, self.map.id)
+        self.queue.send_message(
+            dict(self._event([{"id": 1, "name": "Mike"}]), type="map_many_to_target")
+        )
+        worker = AsyncMappingWorker(
+            queue=self.queue, output_queue=self.output_queue, wait_time_seconds=0
+        )
+
+        with mock.patch.object(
+            JSONMapperService,
+            "map_many_to_target_dtos_with_plan",
+            autospec=True,
+            side_effect=JSONMapperService.map_many_to_target_dtos_with_plan,
+        ) as map_many_to_target_dtos_with_plan:
+            asyncio.run(worker.serve(max_batches=1))
+
+        map_many_to_target_dtos_with_plan.assert_called_once()
+        outputs = [message.body for message in self.output_queue.receive_messages()]
+        assert outputs[0]["data"] == [{"target_id": 1, "target_name": "Mike"}]
+
+    def test_async_worker_maps_cached_plans_on_the_loop(self):
+        get_json_mapper_service().get_mapping_plan(self.source_model.id, self.map.id)
+        self.queue.send_messages(
+            [self._event({"id": n, "name": "Mike"}) for n in range(3)]
+        )
+        worker = AsyncMappingWorker(
+            queue=self.queue, output_queue=self.output_queue, wait_time_seconds=0
+        )
+        threads = set()
+        map_dto = JSONMapperService.map_to_target_dto_with_plan
+
+        def map_to_target_dto_with_plan(service, source_dto, plan):
+            threads.add(threading.current_thread())
+            return map_dto(service, source_dto, plan)
+
+        with mock.patch.object(
+            JSONMapperService,
+            "map_to_target_dto_with_plan",
+            autospec=True,
+            side_effect=map_to_target_dto_with_plan,
+        ), mock.patch.object(
+            JSONMapperService, "get_mapping_plan", autospec=True
+        ) as get_mapping_plan:
+            asyncio.run(worker.serve(max_batches=1))
+
+        get_mapping_plan.assert_not_called()
+        assert threads == {threading.main_thread()}
+        assert (worker.processed, worker.failed) == (3, 0)
+
+    def _event(self, data: dict) -> dict:
+        return {
+            "type": "map_to_target",
+            "data": data,
+            "sync_id": "sync-id",
+            "source_model_id": self.source_model.id,
+            "map_id": self.map.id,
+        }
@@ -0,0 +1,141 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+FIELD = "fields"
+MODEL = "models"
+TRANSFORMER = "transformers"
+
+
+class SpanStats:
+    __slots__ = ("count", "total_time", "max_time")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def add(self, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+
+    def as_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "total_ms": self.total_time * 1000,
+            "mean_ms": self.total_time * 1000 / self.count if self.count else 0.0,
+            "max_ms": self.max_time * 1000,
+        }
+
+
+class TraceStore:
+    """Process-wide aggregate of traced mappings, per map_id and span"""
+
+    def __init__(self):
+        self._spans: Dict[Tuple[int, str, str], SpanStats] = {}
+        self._lock = threading.Lock()
+
+    def merge(self, spans: Dict[Tuple[int, str, str], SpanStats]) -> None:
+        with self._lock:
+            for key, stats in spans.items():
+                total = self._spans.get(key)
+                if total is None:
+                    total = self._spans[key] = SpanStats()
+                total.count += stats.count
+                total.total_time += stats.total_time
+                total.max_time = max(total.max_time, stats.max_time)
+
+    def get_breakdown(self, map_id: Optional[int] = None) -> Dict[int, Dict]:
+        """Returns `{map_id: {"fields": {path: stats}, "models": {model_id: \
+            stats}, "transformers": {type: stats}}}`, slowest spans first. \
+            Field and model times include the time of their nested fields.
+        """
+        with self._lock:
+            items = sorted(
+                self._spans.items(), key=lambda item: item[1].total_time, reverse=True
+            )
+            breakdown: Dict[int, Dict] = {}
+            for (span_map_id, kind, name), stats in items:
+                if map_id is not None and span_map_id != map_id:
+                    continue
+                spans = breakdown.setdefault(
+                    span_map_id, {FIELD: {}, MODEL: {}, TRANSFORMER: {}}
+                )
+                spans[kind][name] = stats.as_dict()
+            return breakdown
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+
+trace_store = TraceStore()
+
+
+class NoopTracer:
+    enabled = False
+
+
+class Tracer:
+    """Collects spans of the mappings run while it is active, see `tracing`
+
+    Fields are named by their path from the root model, e.g. `address.geo.lat`.
+    A tracer belongs to one context, spans are merged into the store when the
+    context exits.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.spans: Dict[Tuple[int, str, str], SpanStats] = {}
+        self._path: List[str] = []
+
+    def enter_field(self, name: str) -> float:
+        self._path.append(name)
+        return time.perf_counter()
+
+    def exit_field(self, map_id: int, start: float) -> float:
+        elapsed = time.perf_counter() - start
+        self.add(map_id, FIELD, ".".join(self._path), elapsed)
+        self._path.pop()
+        return elapsed
+
+    def add(self, map_id: int, kind: str, name: str, elapsed: float) -> None:
+        key = (map_id, kind, name)
+        stats = self.spans.get(key)
+        if stats is None:
+            stats = self.spans[key] = SpanStats()
+        stats.add(elapsed)
+
+
+NOOP_TRACER = NoopTracer()
+_tracer: ContextVar = ContextVar("mapping_tracer", default=NOOP_TRACER)
+
+
+def get_tracer():
+    return _tracer.get()
+
+
+@contextmanager
+def tracing(store: TraceStore = trace_store) -> Iterator[Tracer]:
+    """Traces the mappings run in this context and merges them into `store`"""
+    tracer = Tracer()
+    token = _tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _tracer.reset(token)
+        store.merge(tracer.spans)
+
+
+def should_trace() -> bool:
+    """Samples `settings.MAPPING_TRACE_SAMPLE_RATE` of the mapping batches"""
+    rate = getattr(settings, "MAPPING_TRACE_SAMPLE_RATE", 0)
+    return rate > 0 and random.random() < rate
@@ -1,16 +1,27 @@
 import logging
+from io import BytesIO
+from json import JSONDecodeError
 
+from django.http import StreamingHttpResponse
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
 from core.exceptions import UnprocessableError
 from mappers.api.json_mapper_api import JsonMapperApi
 from mappers.api.models_api import ModelsApi
-from mappers.serializers import CreateModelFromPayload, ModelSerializer
+from mappers.exceptions import InvalidType, NotFoundError
+from mappers.serializers import (
+    CreateModelFromPayload,
+    CreateModelFromStream,
+    MapNDJSONSerializer,
+    ModelSerializer,
+    TraceMappingSerializer,
+    TraceQuerySerializer,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +58,114 @@ class JsonMapperViewSet(ViewSet):
                 errors[k] = map(lambda detail: detail.title(), v)
             return Response(errors, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="model-from-payload-stream",
+        name="Create model from a streamed JSON payload",
+    )
+    def model_from_payload_stream(self, request):
+        """Creates a model from an example JSON object sent as the raw request
+        body, with `model_name` and `endpoint_id` as query params. The body is
+        tokenized as it is read, so memory follows the size of the schema
+        rather than of the example."""
+        serializer = CreateModelFromStream(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+
+        try:
+            model = self.api.create_model_from_json_stream(
+                stream=request.stream if request.stream is not None else BytesIO(),
+                model_name=data["model_name"],
+                endpoint_id=data["endpoint_id"],
+            )
+        except (InvalidType, JSONDecodeError, UnicodeDecodeError) as e:
+            return Response(str(e), status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return Response(ModelSerializer(model).data)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="map-ndjson",
+        name="Map NDJSON source records",
+    )
+    def map_ndjson(self, request):
+        """Streams back one mapped record per NDJSON line of the request body.
+        The body is read line by line as the response is consumed, so memory
+        stays flat regardless of upload size. Chunked uploads without a
+        Content-Length can't be read under WSGI and get a 411."""
+        serializer = MapNDJSONSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+
+        try:
+            plan = self.api.get_mapping_plan(
+                source_model_id=data["source_model_id"], map_id=data["map_id"]
+            )
+        except NotFoundError as e:
+            return Response(str(e), status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        if request.stream is None and not request.META.get("CONTENT_LENGTH"):
+            return Response(
+                "A Content-Length header is required",
+                status=status.HTTP_411_LENGTH_REQUIRED,
+            )
+
+        lines = request.stream if request.stream is not None else []
+        return StreamingHttpResponse(
+            self.api.map_ndjson_lines(lines=lines, plan=plan),
+            content_type="application/x-ndjson",
+        )
+
+    @action(
+        detail=False,
+        methods=["get", "post", "delete"],
+        url_path="trace",
+        name="Mapping traces",
+        permission_classes=(IsAdminUser,),
+    )
+    def trace(self, request):
+        """Debug view of where mapping time goes, per map_id
+
+        GET returns the traces aggregated in this process, optionally for one
+        `map_id`; see `MAPPING_TRACE_SAMPLE_RATE`. POST maps the `json` payload
+        under a tracer and returns its own breakdown. DELETE resets the traces.
+        """
+        if request.method == "DELETE":
+            self.api.reset_traces()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        if request.method == "GET":
+            serializer = TraceQuerySerializer(data=request.query_params)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            return Response(
+                self.api.get_trace_breakdown(
+                    map_id=serializer.validated_data.get("map_id")
+                )
+            )
+
+        serializer = TraceMappingSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        try:
+            return Response(
+                self.api.trace_mapping(
+                    source_dto=data["json"],
+                    source_model_id=data["source_model_id"],
+                    map_id=data["map_id"],
+                )
+            )
+        except NotFoundError as e:
+            return Response(str(e), status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        except KeyError as e:
+            return Response(
+                f"Missing field: {e}", status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+
 
 class ModelViewSet(ViewSet):
 